@@ -0,0 +1,137 @@
+'''
+Autenticación HTTP Basic contra la tabla `user`.
+
+Las contraseñas se guardan con scrypt (`hashlib.scrypt`, de la biblioteca estándar), un hash
+deliberadamente lento: verificar una contraseña cuesta decenas de milisegundos de CPU. Por eso:
+
+- La verificación se ejecuta en el thread pool (`run_in_threadpool`) y no bloquea el event loop.
+- Las credenciales verificadas se guardan en una caché en proceso con un TTL corto
+  (`AUTH_CACHE_TTL`), así las solicitudes siguientes del mismo cliente no repiten el hash ni
+  la consulta. La clave es un HMAC de usuario y contraseña con un secreto aleatorio del
+  proceso: la caché nunca contiene la contraseña ni un hash reutilizable fuera del proceso.
+  Un cambio de contraseña o una baja tardan como mucho el TTL en surtir efecto.
+
+Uso en un router:
+    @router.get("/")
+    async def read(user: CurrentUserDep): ...
+
+Alta de usuarios:
+    python -m app.auth <usuario> <contraseña>
+'''
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+from typing import Annotated
+
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPBasic, HTTPBasicCredentials
+from sqlmodel import select
+from starlette.concurrency import run_in_threadpool
+
+from db import AsyncSessionDep
+from models import User, UserRead
+from .cache import MemoryCache
+
+# Parámetros de scrypt: n=2**14, r=8 usan 16 MiB de memoria por verificación
+SCRYPT_N = 2**14
+SCRYPT_R = 8
+SCRYPT_P = 1
+SCRYPT_SALT_BYTES = 16
+SCRYPT_KEY_BYTES = 32
+AUTH_CACHE_TTL = int(os.getenv("AUTH_CACHE_TTL", "60"))
+
+# Secreto de las claves de la caché: distinto en cada proceso y nunca persistido
+_cache_secret = secrets.token_bytes(32)
+credential_cache = MemoryCache(maxsize=int(os.getenv("AUTH_CACHE_MAXSIZE", "1024")))
+security = HTTPBasic()
+
+
+def _b64(value: bytes) -> str:
+    return base64.b64encode(value).decode("ascii")
+
+
+def hash_password(password: str, n: int = SCRYPT_N, r: int = SCRYPT_R, p: int = SCRYPT_P) -> str:
+    '''
+    Calcula el hash de una contraseña con una sal aleatoria.
+    Retorna:
+    - `scrypt$n$r$p$sal$hash` (sal y hash en base64), con los parámetros para verificarlo aunque cambien.
+    '''
+    salt = secrets.token_bytes(SCRYPT_SALT_BYTES)
+    key = hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, dklen=SCRYPT_KEY_BYTES)
+    return f"scrypt${n}${r}${p}${_b64(salt)}${_b64(key)}"
+
+
+def verify_password(password: str, password_hash: str) -> bool:
+    '''
+    Verifica una contraseña contra su hash. La comparación final es de tiempo constante.
+    '''
+    try:
+        algorithm, n, r, p, salt, expected = password_hash.split("$")
+        expected = base64.b64decode(expected)
+        key = hashlib.scrypt(
+            password.encode(), salt=base64.b64decode(salt), n=int(n), r=int(r), p=int(p), dklen=len(expected)
+        )
+    except ValueError:
+        return False
+    return algorithm == "scrypt" and hmac.compare_digest(key, expected)
+
+
+# Hash contra el que se verifica cuando el usuario no existe, para no revelarlo por el tiempo de respuesta
+_dummy_hash = hash_password(secrets.token_urlsafe(16))
+
+
+def credential_key(username: str, password: str) -> str:
+    '''
+    Clave de caché de unas credenciales: HMAC-SHA256 con el secreto del proceso.
+    '''
+    message = username.encode() + b"\0" + password.encode()
+    return "auth:" + hmac.new(_cache_secret, message, hashlib.sha256).hexdigest()
+
+
+async def authenticate(credentials: Annotated[HTTPBasicCredentials, Depends(security)], session: AsyncSessionDep) -> UserRead:
+    '''
+    Dependencia que autentica la solicitud con HTTP Basic.
+    Parámetros:
+    - credentials: Usuario y contraseña de la cabecera `Authorization`.
+    - session: La sesión asíncrona de base de datos (solo se usa si las credenciales no están en caché).
+    Retorna:
+    - El usuario autenticado.
+    Raises:
+    - HTTPException 401: Si el usuario no existe, está inactivo o la contraseña no coincide.
+    '''
+    key = credential_key(credentials.username, credentials.password)
+    cached = await credential_cache.get(key)
+    if cached is not None:
+        return cached
+    user = (await session.exec(select(User).where(User.username == credentials.username))).first()
+    password_hash = user.password_hash if user is not None else _dummy_hash
+    valid = await run_in_threadpool(verify_password, credentials.password, password_hash)
+    if not valid or user is None or not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Credenciales incorrectas",
+            headers={"WWW-Authenticate": "Basic"},
+        )
+    authenticated = UserRead.model_validate(user)
+    await credential_cache.set(key, authenticated, AUTH_CACHE_TTL)
+    return authenticated
+
+
+CurrentUserDep = Annotated[UserRead, Depends(authenticate)] # Dependencia para exigir un usuario autenticado
+
+
+if __name__ == "__main__":
+    import sys
+
+    from sqlmodel import Session
+
+    from db import engine
+
+    username, password = sys.argv[1:3]
+    User.__table__.create(engine, checkfirst=True)
+    with Session(engine) as session:
+        session.add(User(username=username, password_hash=hash_password(password)))
+        session.commit()
+    print(f"Usuario creado: {username}")
@@ -0,0 +1,188 @@
+'''
+Caché de lectura (read-through) para consultas muy leídas y poco escritas.
+
+Por defecto usa una caché en proceso con TTL + LRU. Con `CACHE_URL=redis://...`
+se usa un backend compatible con Redis (requiere el paquete opcional `redis`).
+Los valores guardados son datos serializables a JSON (`model_dump(mode="json")`),
+nunca objetos ORM ligados a una sesión.
+'''
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Protocol
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # Dependencia opcional
+    redis = None
+
+# Claves y tiempos de vida (segundos)
+PLANS_KEY = "plans:list"
+PLANS_TTL = 300
+CUSTOMER_TTL = 60
+
+
+def plans_key(etag: str) -> str:
+    '''
+    Clave de caché de la lista de planes en una versión de la tabla (su ETag de `table_version`).
+    Una escritura de cualquier proceso cambia la versión y con ella la clave.
+    '''
+    return f"{PLANS_KEY}:{etag}"
+
+
+def customer_key(customer_id: int) -> str:
+    '''
+    Clave de caché de un cliente.
+    '''
+    return f"customer:{customer_id}"
+
+
+class CacheBackend(Protocol):
+    '''
+    Contrato de un backend de caché.
+    '''
+
+    async def get(self, key: str) -> Any | None: ...
+
+    async def set(self, key: str, value: Any, ttl: int) -> None: ...
+
+    async def delete(self, *keys: str) -> None: ...
+
+    async def clear(self) -> None: ...
+
+
+class MemoryCache:
+    '''
+    Backend en proceso con expiración (TTL) y desalojo del menos usado (LRU).
+    * Parámetros:
+        - maxsize: Número máximo de claves.
+    '''
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    async def get(self, key: str) -> Any | None:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: int) -> None:
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._data.pop(key, None)
+
+    async def clear(self) -> None:
+        self._data.clear()
+
+
+class RedisCache:
+    '''
+    Backend compatible con Redis. Acepta cualquier cliente asíncrono con
+    `get`, `set(ex=)`, `delete` y `scan_iter` (por ejemplo `redis.asyncio.Redis` o un fake local).
+    * Parámetros:
+        - client: El cliente Redis.
+        - prefix: Prefijo de las claves de esta aplicación.
+    '''
+
+    def __init__(self, client, prefix: str = "fastapi:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Any | None:
+        raw = await self.client.get(self.prefix + key)
+        return None if raw is None else json.loads(raw)
+
+    async def set(self, key: str, value: Any, ttl: int) -> None:
+        await self.client.set(self.prefix + key, json.dumps(value), ex=ttl)
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self.client.delete(*(self.prefix + key for key in keys))
+
+    async def clear(self) -> None:
+        keys = [key async for key in self.client.scan_iter(match=self.prefix + "*")]
+        if keys:
+            await self.client.delete(*keys)
+
+
+class ReadThroughCache:
+    '''
+    Caché de lectura con contadores de aciertos y fallos.
+    * Parámetros:
+        - backend: El backend donde se guardan los valores.
+    '''
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]], ttl: int) -> Any:
+        '''
+        Retorna el valor en caché o lo carga con `loader` y lo guarda.
+        Si `loader` retorna None no se guarda nada (los "no encontrado" no se cachean).
+        Parámetros:
+        - key: Clave de caché.
+        - loader: Función asíncrona que consulta la base de datos.
+        - ttl: Tiempo de vida en segundos.
+        Retorna:
+        - El valor en caché o el recién cargado.
+        '''
+        value = await self.backend.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = await loader()
+        if value is not None:
+            await self.backend.set(key, value, ttl)
+        return value
+
+    async def invalidate(self, *keys: str) -> None:
+        '''
+        Elimina claves tras una escritura.
+        '''
+        await self.backend.delete(*keys)
+
+    async def clear(self) -> None:
+        '''
+        Vacía la caché y reinicia los contadores.
+        '''
+        await self.backend.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        '''
+        Contadores de aciertos y fallos.
+        '''
+        return {"backend": type(self.backend).__name__, "hits": self.hits, "misses": self.misses}
+
+
+def create_cache_backend(url: str | None) -> CacheBackend:
+    '''
+    Crea el backend según `CACHE_URL`: Redis si la URL empieza por `redis://`, en memoria si no.
+    Raises:
+    - RuntimeError: Si se pide Redis sin tener instalado el paquete `redis`.
+    '''
+    if url and url.startswith(("redis://", "rediss://")):
+        if redis is None:
+            raise RuntimeError("CACHE_URL usa Redis pero el paquete 'redis' no está instalado")
+        return RedisCache(redis.from_url(url))
+    return MemoryCache(maxsize=int(os.getenv("CACHE_MAXSIZE", "1024")))
+
+
+cache = ReadThroughCache(create_cache_backend(os.getenv("CACHE_URL")))
@@ -0,0 +1,79 @@
+'''
+GET condicional (ETag / Last-Modified) para endpoints de listas.
+
+El ETag se deriva de la versión de las tablas en `table_version`, que los triggers
+incrementan en cada escritura. Comprobarlo cuesta una lectura por clave primaria,
+así que un `304 Not Modified` evita la consulta principal y la serialización.
+'''
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request, Response, status
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models import TableVersion
+
+
+async def table_etag(session: AsyncSession, request: Request, *tables: str) -> tuple[str, datetime | None]:
+    '''
+    Calcula el ETag y la fecha de última modificación de una respuesta.
+    El ETag incluye los parámetros de la URL, porque cada combinación es una respuesta distinta.
+    Parámetros:
+    - session: La sesión asíncrona de base de datos.
+    - request: La solicitud entrante.
+    - tables: Tablas de las que depende la respuesta.
+    Retorna:
+    - Una tupla (ETag débil, última modificación o None).
+    '''
+    versions = (await session.exec(select(TableVersion).where(TableVersion.name.in_(tables)))).all()
+    by_name = {version.name: version for version in versions}
+    tag = "-".join(f"{table}.{by_name[table].version if table in by_name else 0}" for table in tables)
+    if request.url.query:
+        tag += "-" + hashlib.blake2s(request.url.query.encode(), digest_size=8).hexdigest()
+    last_modified = max((version.updated_at for version in versions), default=None)
+    return f'W/"{tag}"', last_modified
+
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime | None) -> bool:
+    '''
+    Evalúa `If-None-Match` (prioritario) o `If-Modified-Since` de la solicitud.
+    '''
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = {candidate.strip() for candidate in if_none_match.split(",")}
+        return "*" in candidates or etag in candidates
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+            # Fechas sin zona (`-0000`) se interpretan en UTC, como indica RFC 5322
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=timezone.utc)
+            return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+        except (TypeError, ValueError):
+            # Una cabecera inválida se ignora
+            return False
+    return False
+
+
+async def conditional_get(request: Request, response: Response, session: AsyncSession, *tables: str) -> Response | None:
+    '''
+    Resuelve un GET condicional antes de ejecutar la consulta del endpoint.
+    Parámetros:
+    - request: La solicitud entrante.
+    - response: La respuesta del endpoint, a la que se agregan `ETag` y `Last-Modified`.
+    - session: La sesión asíncrona de base de datos.
+    - tables: Tablas de las que depende la respuesta.
+    Retorna:
+    - Una respuesta `304 Not Modified` si el cliente ya tiene los datos, o None para continuar.
+    '''
+    etag, last_modified = await table_etag(session, request, *tables)
+    headers = {"ETag": etag}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified.replace(tzinfo=timezone.utc), usegmt=True)
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
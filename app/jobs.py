@@ -0,0 +1,289 @@
+'''
+Trabajos en segundo plano dentro del proceso de la API.
+
+`JobRunner` guarda cada trabajo en la tabla `job`, lo encola en una `asyncio.Queue` acotada
+y lo ejecuta en uno de sus workers (tareas asyncio), así la solicitud que lo crea responde
+de inmediato con 202 y el estado se consulta en `GET /jobs/{id}`. Como mucho se ejecutan
+`JOB_WORKERS` trabajos a la vez; con la cola llena se rechazan nuevos con 503.
+
+Los handlers son corrutinas: el trabajo de base de datos ya es asíncrono y no bloquea el
+event loop. Los pasos intensivos en CPU se envían al pool de procesos con
+`JobContext.run_in_process`.
+
+Con varios procesos de la API (uvicorn `--workers`) cada uno tiene su cola, pero comparten la
+tabla. Un worker reclama el trabajo con un UPDATE condicional (`status = pendiente`), así
+nunca lo ejecutan dos a la vez, y mientras corre renueva su reserva (`lease_expires_at`).
+Al arrancar, solo los trabajos en curso con la reserva vencida (su proceso murió) se marcan
+como fallidos, y los pendientes se vuelven a encolar; si otro proceso ya los tomó, el
+reclamo falla y se omiten.
+'''
+import asyncio
+import multiprocessing
+import os
+from collections.abc import Awaitable, Callable
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from typing import Any
+
+from fastapi import HTTPException, status
+from sqlalchemy import update
+from sqlmodel import select
+
+from db import async_session_maker, settings
+from models import Job, JobStatusEnum, utcnow
+from app.metrics import configure_access_logger
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "100"))
+JOB_PROCESSES = int(os.getenv("JOB_PROCESSES", str(min(4, os.cpu_count() or 1))))
+# Segundos que se sugiere esperar antes de reintentar con la cola llena
+JOB_RETRY_AFTER = 5
+# Segundos de reserva de un trabajo en curso; se renueva cada tercio mientras corre
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "60"))
+
+job_logger = configure_access_logger("app.jobs")
+
+
+class JobContext:
+    '''
+    Lo que un handler puede usar mientras se ejecuta su trabajo.
+    * Parámetros:
+        - runner: El `JobRunner` que ejecuta el trabajo.
+        - job_id: El ID del trabajo.
+    '''
+
+    def __init__(self, runner: "JobRunner", job_id: int):
+        self.runner = runner
+        self.job_id = job_id
+
+    def session(self):
+        '''
+        Abre una sesión asíncrona propia del trabajo (`async with job.session() as session`).
+        '''
+        return self.runner.session_maker()
+
+    async def report(self, progress: int, total: int | None = None) -> None:
+        '''
+        Guarda el avance del trabajo para que se vea al consultarlo.
+        '''
+        values = {"progress": progress} if total is None else {"progress": progress, "total": total}
+        await self.runner.update_job(self.job_id, **values)
+
+    async def run_in_process(self, function: Callable, *args) -> Any:
+        '''
+        Ejecuta una función (importable y con argumentos serializables) en el pool de procesos.
+        '''
+        return await self.runner.run_in_process(function, *args)
+
+
+JobHandler = Callable[[dict, JobContext], Awaitable[dict]]
+
+
+class JobRunner:
+    '''
+    Cola de trabajos con un número fijo de workers asyncio y un pool de procesos.
+    * Parámetros:
+        - workers: Trabajos que se ejecutan a la vez.
+        - queue_size: Trabajos pendientes como máximo.
+        - processes: Procesos del pool para pasos intensivos en CPU (se crea al primer uso).
+    '''
+
+    def __init__(self, workers: int = JOB_WORKERS, queue_size: int = JOB_QUEUE_SIZE, processes: int = JOB_PROCESSES):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.processes = processes
+        self.handlers: dict[str, JobHandler] = {}
+        # Sesiones de los workers y URL síncrona para los procesos; los tests las sustituyen
+        self.session_maker = async_session_maker
+        self.database_url = settings.url
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.Queue[int] | None = None
+        self._tasks: list[asyncio.Task] = []
+        # Lugares de la cola apartados por `submit` mientras guarda el trabajo
+        self._reserved = 0
+        self._pool: ProcessPoolExecutor | None = None
+
+    def register(self, kind: str) -> Callable[[JobHandler], JobHandler]:
+        '''
+        Decorador que registra el handler de un tipo de trabajo.
+        El handler recibe los parámetros y un `JobContext`, y retorna el resultado (JSON).
+        '''
+        def decorator(handler: JobHandler) -> JobHandler:
+            self.handlers[kind] = handler
+            return handler
+        return decorator
+
+    @property
+    def running(self) -> bool:
+        '''
+        Si los workers están corriendo en el event loop actual.
+        '''
+        try:
+            return self._loop is asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+
+    def _has_room(self) -> bool:
+        '''
+        Si queda lugar en la cola contando los lugares apartados.
+        '''
+        return self._queue.qsize() + self._reserved < self.queue_size
+
+    async def start(self) -> None:
+        '''
+        Arranca los workers en el event loop actual y recupera los trabajos huérfanos: marca como
+        fallidos los que quedaron en curso con la reserva vencida y encola los pendientes.
+        Los que ejecuta otro proceso vivo (reserva vigente) no se tocan.
+        '''
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(self.queue_size)
+        self._reserved = 0
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        now = utcnow()
+        async with self.session_maker() as session:
+            await session.exec(
+                update(Job)
+                .where(Job.status == JobStatusEnum.RUNNING)
+                .where((Job.lease_expires_at == None) | (Job.lease_expires_at < now)) # noqa: E711
+                .values(status=JobStatusEnum.FAILED, error="Interrumpido por un reinicio", finished_at=now)
+            )
+            await session.commit()
+            pending = (await session.exec(
+                select(Job.id).where(Job.status == JobStatusEnum.PENDING).order_by(Job.id).limit(self.queue_size)
+            )).all()
+        for job_id in pending:
+            if not self._has_room():
+                break # El resto sigue pendiente en la tabla
+            self._queue.put_nowait(job_id)
+
+    async def stop(self) -> None:
+        '''
+        Detiene los workers y el pool de procesos. Los trabajos pendientes siguen en la tabla
+        y se retoman en el próximo arranque.
+        '''
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._loop = None
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    async def join(self) -> None:
+        '''
+        Espera a que la cola quede vacía y no haya trabajos en curso.
+        '''
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def submit(self, kind: str, params: dict) -> Job:
+        '''
+        Guarda un trabajo como pendiente y lo encola.
+        Parámetros:
+        - kind: Tipo de trabajo registrado.
+        - params: Parámetros serializables a JSON.
+        Retorna:
+        - El trabajo creado.
+        Raises:
+        - HTTPException 503: Si la cola está llena.
+        '''
+        if kind not in self.handlers:
+            raise ValueError(f"Tipo de trabajo no registrado: {kind}")
+        if not self.running:
+            await self.start()
+        if not self._has_room():
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="La cola de trabajos está llena; reintente más tarde",
+                headers={"Retry-After": str(JOB_RETRY_AFTER)},
+            )
+        # Se aparta el lugar antes de guardar: otra solicitud no puede llenar la cola mientras tanto
+        self._reserved += 1
+        try:
+            job = Job(kind=kind, params=params)
+            async with self.session_maker() as session:
+                session.add(job)
+                await session.commit()
+        finally:
+            self._reserved -= 1
+        self._queue.put_nowait(job.id)
+        return job
+
+    async def claim(self, job_id: int) -> bool:
+        '''
+        Reclama un trabajo pendiente para este worker con un UPDATE condicional.
+        Retorna:
+        - True si lo reclamó; False si ya no estaba pendiente (lo tomó otro worker o proceso).
+        '''
+        now = utcnow()
+        async with self.session_maker() as session:
+            result = await session.exec(
+                update(Job)
+                .where(Job.id == job_id, Job.status == JobStatusEnum.PENDING)
+                .values(status=JobStatusEnum.RUNNING, started_at=now, lease_expires_at=now + timedelta(seconds=JOB_LEASE_SECONDS))
+            )
+            await session.commit()
+        return result.rowcount == 1
+
+    async def _renew_lease(self, job_id: int) -> None:
+        '''
+        Renueva la reserva de un trabajo en curso hasta que se cancela.
+        '''
+        while True:
+            await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+            await self.update_job(job_id, lease_expires_at=utcnow() + timedelta(seconds=JOB_LEASE_SECONDS))
+
+    async def update_job(self, job_id: int, **values) -> None:
+        '''
+        Actualiza columnas de un trabajo en su propia transacción.
+        '''
+        async with self.session_maker() as session:
+            await session.exec(update(Job).where(Job.id == job_id).values(**values))
+            await session.commit()
+
+    async def run_in_process(self, function: Callable, *args) -> Any:
+        '''
+        Ejecuta una función en el pool de procesos sin bloquear el event loop.
+        Los procesos se inician con `spawn`: no heredan los hilos ni las conexiones de la API.
+        '''
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.processes, mp_context=multiprocessing.get_context("spawn"))
+        return await asyncio.get_running_loop().run_in_executor(self._pool, function, *args)
+
+    async def _work(self) -> None:
+        '''
+        Worker: toma trabajos de la cola hasta que se cancela.
+        '''
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception:
+                job_logger.exception("job worker error", extra={"fields": {"job_id": job_id}})
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: int) -> None:
+        '''
+        Ejecuta un trabajo y guarda su resultado o su error.
+        '''
+        if not await self.claim(job_id):
+            return
+        async with self.session_maker() as session:
+            job = await session.get(Job, job_id)
+        job_logger.info("job started", extra={"fields": {"job_id": job_id, "kind": job.kind}})
+        lease = asyncio.create_task(self._renew_lease(job_id))
+        try:
+            result = await self.handlers[job.kind](dict(job.params), JobContext(self, job_id))
+        except Exception as error:
+            job_logger.exception("job failed", extra={"fields": {"job_id": job_id, "kind": job.kind}})
+            await self.update_job(job_id, status=JobStatusEnum.FAILED, error=str(error) or type(error).__name__, finished_at=utcnow(), lease_expires_at=None)
+            return
+        finally:
+            lease.cancel()
+        await self.update_job(job_id, status=JobStatusEnum.SUCCEEDED, result=result, finished_at=utcnow(), lease_expires_at=None)
+        job_logger.info("job finished", extra={"fields": {"job_id": job_id, "kind": job.kind}})
+
+
+job_runner = JobRunner()
@@ -1,76 +1,80 @@
+import os
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime, timezone
 from typing import Annotated
-from zoneinfo import ZoneInfo
-import time
-from datetime import datetime
 
-from fastapi import Depends, FastAPI, HTTPException, status, Request
-from fastapi.security import HTTPBasic, HTTPBasicCredentials
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import PlainTextResponse
 from models import Transaction, Invoice
-from db import create_all_tables
-from .routers import customers, transactions, invoice, plans
+from db import async_engine, create_all_tables, engine
+from .routers import analytics, customers, jobs, transactions, invoice, plans
+from .auth import CurrentUserDep
+from .cache import cache
+from .jobs import job_runner
+from .metrics import MetricsMiddleware, access_logger, request_metrics
+from .query_stats import QueryStatsMiddleware, instrument_engine
+from .responses import FastJSONResponse
+from .timezones import country_timezones
 
 
-app = FastAPI(lifespan=create_all_tables)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    '''
+    Crea las tablas y arranca los workers de trabajos en segundo plano; al cerrar, los detiene.
+    '''
+    with contextmanager(create_all_tables)(app):
+        await job_runner.start()
+        try:
+            yield
+        finally:
+            await job_runner.stop()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 app.include_router(customers.router, tags=["customers"])
 app.include_router(transactions.router, prefix="/transactions", tags=["transactions"])
 app.include_router(invoice.router, prefix="/invoices", tags=["invoices"])
 app.include_router(plans.router, tags=["plans"])
+app.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
+app.include_router(jobs.router, tags=["jobs"])
+
+
+app.add_middleware(
+    MetricsMiddleware,
+    metrics=request_metrics,
+    logger=access_logger,
+    sample_rate=float(os.getenv("ACCESS_LOG_SAMPLE_RATE", "1.0")),
+)
+app.add_middleware(QueryStatsMiddleware)
 
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
 
-@app.middleware("http")
-async def log_request_time(request: Request, call_next) -> Request:
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> PlainTextResponse:
     '''
-    Middleware para registrar el tiempo de procesamiento de una solicitud.
-    Parámetros:
-    - request: La solicitud entrante.
+    Expone las métricas HTTP en formato de texto de Prometheus.
     '''
-    star_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - star_time
-    print(f"Request: {request.url}, completed in {process_time:.4f} seconds")
-    return response
+    return PlainTextResponse(request_metrics.render(), media_type="text/plain; version=0.0.4")
 
-@app.middleware("http")
-async def log_request_headers(request: Request, call_next) -> Request:
+@app.get("/cache/stats", tags=["cache"])
+async def cache_stats() -> dict:
     '''
-    Middleware para registrar los encabezados de la solicitud.
-    Parámetros:
-    - request: La solicitud entrante.
+    Retorna los contadores de aciertos y fallos de la caché de lectura.
     '''
-    print(f"Request headers: {request.headers}")
-    response = await call_next(request)
-    return response
-
-security = HTTPBasic()
+    return cache.stats()
 
 @app.get("/")
-async def root(
-    credentials: Annotated[HTTPBasicCredentials, Depends(security)]
-):
-    if credentials.username == "luis" and credentials.password == "luis":
-        return {"message": "Hola Luis!"}
-    raise HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Credenciales incorrectas",
-        headers={"WWW-Authenticate": "Basic"},
-    )
-
-
-    print(credentials)
-    return {"message": "Hola Luis!", "timestamp": datetime.now()}
-
-country_timezones = {
-    "US": "America/New_York",
-    "MX": "America/Mexico_City",
-    "AR": "America/Argentina/Buenos_Aires",
-    "CL": "America/Santiago",
-    "CO": "America/Bogota",
-    "PE": "America/Lima",
-}
+async def root(user: CurrentUserDep) -> dict:
+    '''
+    Saluda al usuario autenticado con HTTP Basic.
+    '''
+    return {"message": f"Hola {user.username}!"}
 
-# Mapeo de códigos ISO de países a zonas horarias
+# Mapeo de códigos ISO de países a zonas horarias (índice precargado desde tzdata)
 @app.get("/time/{iso_code}")
-async def get_time_by_iso_code(iso_code: str) -> str:
+async def get_time_by_iso_code(iso_code: str) -> dict:
     '''
     Retorna la hora actual en la zona horaria del país especificado por su código ISO.
     Parámetros:
@@ -79,16 +83,10 @@ async def get_time_by_iso_code(iso_code: str) -> str:
     - Un diccionario con la hora actual en formato ISO.
     '''
     iso_code = iso_code.upper()
-    timezone = country_timezones.get(iso_code)
+    tz = country_timezones.get(iso_code)
     # Si el código ISO no es válido, retorna un error 404
-    if timezone is None:
+    if tz is None:
         raise HTTPException(status_code=404, detail=f"Unknown ISO code: {iso_code}")
-    try:
-        tz = ZoneInfo(timezone)
-    # Para capturar el error de zona inválida
-    except Exception:
-        # ZoneInfo raises zoneinfo.ZoneInfoNotFoundError para zonas inválidas
-        raise HTTPException(status_code=500, detail=f"Invalid timezone configured: {timezone}")
     # Retorna la hora actual en formato ISO
     return {"time": datetime.now(tz).isoformat()}
 
@@ -120,4 +118,42 @@ async def time_format(time_format: str) -> dict:
         return {"time": formatted_time}
     # Para capturar errores de formato
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error al formatear la hora: {e}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error al formatear la hora: {e}")
+
+
+def split_codes(value: str) -> list[str]:
+    '''
+    Separa una lista por comas (`US,MX`) sin vacíos ni repetidos, conservando el orden.
+    '''
+    return list(dict.fromkeys(item.strip() for item in value.split(",") if item.strip()))
+
+
+@app.get("/time")
+async def get_times_by_iso_codes(
+    codes: Annotated[str, Query(description="Códigos ISO separados por comas, por ejemplo `US,MX,AR`")],
+    time_formats: Annotated[str, Query(alias="formats", description="Formatos separados por comas: 12h, 24h, iso")] = "iso",
+) -> dict:
+    '''
+    Retorna la hora actual de varios países en una sola llamada, en uno o varios formatos.
+    Todas las horas parten del mismo instante.
+    Parámetros:
+    - codes: Códigos ISO de los países.
+    - formats: Formatos de `/format` a incluir.
+    Retorna:
+    - Un diccionario por código ISO con la zona horaria y la hora en cada formato pedido.
+    '''
+    iso_codes = [code.upper() for code in split_codes(codes)]
+    unknown = [code for code in iso_codes if code not in country_timezones]
+    if not iso_codes or unknown:
+        raise HTTPException(status_code=404, detail=f"Unknown ISO code: {', '.join(unknown) or codes}")
+    format_names = [name.lower() for name in split_codes(time_formats)]
+    unknown = [name for name in format_names if name not in formats]
+    if not format_names or unknown:
+        raise HTTPException(status_code=404, detail=f"formato desconocido: {', '.join(unknown) or time_formats}")
+    now = datetime.now(timezone.utc)
+    times = {}
+    for code in iso_codes:
+        tz = country_timezones[code]
+        local = now.astimezone(tz)
+        times[code] = {"timezone": tz.key} | {name: local.strftime(formats[name]) for name in format_names}
+    return times
@@ -0,0 +1,210 @@
+'''
+Métricas HTTP en formato de texto de Prometheus y log de accesos estructurado.
+
+`MetricsMiddleware` es un middleware ASGI puro (sin `BaseHTTPMiddleware`): mide cada
+solicitud con un reloj monotónico y registra, por método y ruta (la plantilla,
+p. ej. `/read_customers/{customer_id}`, no la URL), un histograma de latencia,
+un contador por código de estado y un gauge de solicitudes en curso.
+
+El log de accesos se escribe en JSON a través de un `QueueHandler`: la solicitud solo
+encola el registro y un hilo aparte lo escribe. Nunca se registran encabezados
+(contienen, por ejemplo, las credenciales de Basic auth).
+'''
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+# Límites superiores (segundos) de los buckets del histograma de latencia
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def escape_label(value: str) -> str:
+    '''
+    Escapa el valor de una etiqueta según el formato de texto de Prometheus.
+    '''
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class RequestMetrics:
+    '''
+    Registro en memoria de las métricas HTTP.
+    * Parámetros:
+        - buckets: Límites superiores de los buckets del histograma (segundos).
+    '''
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.in_flight: dict[str, int] = defaultdict(int)
+        self.status_counts: dict[tuple[str, str, int], int] = defaultdict(int)
+        self.latency_buckets: dict[tuple[str, str], list[int]] = {}
+        self.latency_sum: dict[tuple[str, str], float] = defaultdict(float)
+        self.latency_count: dict[tuple[str, str], int] = defaultdict(int)
+
+    def observe(self, method: str, route: str, status_code: int, seconds: float) -> None:
+        '''
+        Registra una solicitud terminada.
+        '''
+        key = (method, route)
+        counts = self.latency_buckets.get(key)
+        if counts is None:
+            counts = self.latency_buckets[key] = [0] * (len(self.buckets) + 1)
+        counts[bisect_left(self.buckets, seconds)] += 1
+        self.latency_sum[key] += seconds
+        self.latency_count[key] += 1
+        self.status_counts[(method, route, status_code)] += 1
+
+    def render(self) -> str:
+        '''
+        Genera las métricas en formato de texto de Prometheus (versión 0.0.4).
+        '''
+        lines = [
+            "# HELP http_requests_in_flight Solicitudes HTTP en curso.",
+            "# TYPE http_requests_in_flight gauge",
+        ]
+        for method, value in sorted(self.in_flight.items()):
+            lines.append(f'http_requests_in_flight{{method="{method}"}} {value}')
+
+        lines += [
+            "# HELP http_requests_total Solicitudes HTTP por ruta y código de estado.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route, status_code), value in sorted(self.status_counts.items()):
+            lines.append(
+                f'http_requests_total{{method="{method}",route="{escape_label(route)}",status="{status_code}"}} {value}'
+            )
+
+        lines += [
+            "# HELP http_request_duration_seconds Latencia de las solicitudes HTTP.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route), counts in sorted(self.latency_buckets.items()):
+            labels = f'method="{method}",route="{escape_label(route)}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {self.latency_count[(method, route)]}')
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {self.latency_sum[(method, route)]}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {self.latency_count[(method, route)]}")
+        return "\n".join(lines) + "\n"
+
+
+class JsonFormatter(logging.Formatter):
+    '''
+    Formatea cada registro como una línea JSON con los campos de `extra={"fields": {...}}`
+    y, si lo hay, el traceback de la excepción.
+    '''
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {"level": record.levelname, "logger": record.name, "message": record.getMessage()}
+        payload.update(getattr(record, "fields", {}))
+        # `exc_text` es el traceback ya renderizado por `StructuredQueueHandler`
+        exception = self.formatException(record.exc_info) if record.exc_info else record.exc_text
+        if exception:
+            payload["exception"] = exception
+        return json.dumps(payload, ensure_ascii=False)
+
+
+class StructuredQueueHandler(logging.handlers.QueueHandler):
+    '''
+    `QueueHandler` que no formatea en el hilo que registra. El `prepare` estándar aplica el
+    formatter aquí y mete el traceback dentro de `message`; este solo resuelve el mensaje y
+    renderiza el traceback en `exc_text`, y el formato JSON se aplica en el `QueueListener`.
+    '''
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # El traceback retiene los frames: se encola como texto
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def configure_access_logger(name: str = "app.access") -> logging.Logger:
+    '''
+    Configura el logger de accesos con un `QueueHandler` no bloqueante.
+    Un `QueueListener` escribe los registros en stderr desde su propio hilo.
+    Retorna:
+    - El logger configurado.
+    '''
+    logger = logging.getLogger(name)
+    if logger.handlers:
+        return logger
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(JsonFormatter())
+    listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    listener.start()
+    atexit.register(listener.stop)
+    logger.addHandler(StructuredQueueHandler(log_queue))
+    logger.setLevel(os.getenv("ACCESS_LOG_LEVEL", "INFO"))
+    logger.propagate = False
+    return logger
+
+
+class MetricsMiddleware:
+    '''
+    Middleware ASGI que registra métricas y el log de accesos de cada solicitud HTTP.
+    * Parámetros:
+        - app: La aplicación ASGI.
+        - metrics: El registro de métricas.
+        - logger: Logger de accesos.
+        - sample_rate: Fracción de solicitudes correctas que se registran en el log (0 a 1).
+          Las respuestas 5xx se registran siempre.
+    '''
+
+    def __init__(self, app, metrics: RequestMetrics, logger: logging.Logger, sample_rate: float = 1.0):
+        self.app = app
+        self.metrics = metrics
+        self.logger = logger
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        self.metrics.in_flight[method] += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.metrics.in_flight[method] -= 1
+            # FastAPI guarda la ruta encontrada en el scope; se usa su plantilla para no crear una serie por ID
+            route = scope.get("route")
+            route_path = getattr(route, "path", UNMATCHED_ROUTE)
+            self.metrics.observe(method, route_path, status_code, elapsed)
+            if status_code >= 500 or random.random() < self.sample_rate:
+                self.logger.info("request", extra={"fields": {
+                    "method": method,
+                    "route": route_path,
+                    "path": scope["path"],
+                    "status": status_code,
+                    "duration_ms": round(elapsed * 1000, 3),
+                }})
+
+
+request_metrics = RequestMetrics()
+access_logger = configure_access_logger()
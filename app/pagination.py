@@ -0,0 +1,211 @@
+import base64
+import binascii
+import json
+import os
+import time
+from datetime import date, datetime
+from typing import Any, Callable, Generic, TypeVar
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+from sqlalchemy import Date, DateTime, Float, Numeric, func, tuple_
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+# Encabezado de respuesta con el cursor de la siguiente página
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# Tamaño de página cuando se recibe un cursor sin límite explícito
+DEFAULT_PAGE_SIZE = 10
+# Segundos que vale un conteo en caché; acota el desfase por escrituras de otros procesos
+COUNT_CACHE_TTL = float(os.getenv("COUNT_CACHE_TTL", "30"))
+# Tamaño máximo de página de los listados paginados por cursor
+MAX_PAGE_SIZE = 1000
+
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    '''
+    Respuesta paginada por número de página.
+    Parámetros:
+    - items: Registros de la página.
+    - total: Número total de registros.
+    - pages: Número total de páginas.
+    - page: Número de la página actual.
+    '''
+    items: list[T]
+    total: int
+    pages: int
+    page: int
+
+
+def encode_cursor(values: list[Any]) -> str:
+    '''
+    Codifica los valores de la clave de la última fila en un cursor opaco.
+    Parámetros:
+    - values: Valores de las columnas de la clave, en orden.
+    Retorna:
+    - El cursor en base64 (url-safe).
+    '''
+    raw = json.dumps(values, default=lambda value: value.isoformat(), separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> list[Any]:
+    '''
+    Decodifica un cursor generado por `encode_cursor`.
+    Parámetros:
+    - cursor: El cursor recibido del cliente.
+    Retorna:
+    - La lista de valores de la clave.
+    Raises:
+    - HTTPException 400: Si el cursor no es válido.
+    '''
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido")
+    if not isinstance(values, list):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido")
+    return values
+
+
+class KeysetPaginator:
+    '''
+    Paginador por cursor (keyset): busca a partir de la última clave vista en lugar de usar OFFSET,
+    por lo que la página N cuesta lo mismo que la página 1.
+    * Parámetros:
+        - key_columns: Columnas que definen el orden. La última debe ser única (por ejemplo, el id).
+    '''
+
+    def __init__(self, *key_columns):
+        self.key_columns = key_columns
+
+    def _cursor_values(self, cursor: str) -> list[Any]:
+        '''
+        Convierte el cursor en valores comparables con las columnas de la clave.
+        '''
+        values = decode_cursor(cursor)
+        if len(values) != len(self.key_columns):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido")
+        return [self._cursor_value(column, value) for column, value in zip(self.key_columns, values)]
+
+    @staticmethod
+    def _cursor_value(column, value: Any) -> Any:
+        '''
+        Comprueba que un valor del cursor tenga el tipo de su columna (las fechas llegan como texto ISO).
+        '''
+        invalid = HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido")
+        if value is None:
+            return value
+        if isinstance(column.type, (Date, DateTime)):
+            if not isinstance(value, str):
+                raise invalid
+            parse = datetime.fromisoformat if isinstance(column.type, DateTime) else date.fromisoformat
+            try:
+                return parse(value)
+            except ValueError:
+                raise invalid
+        expected = (int, float) if isinstance(column.type, (Float, Numeric)) else column.type.python_type
+        if isinstance(value, bool) or not isinstance(value, expected):
+            raise invalid
+        return value
+
+    def apply(self, query, cursor: str | None, limit: int):
+        '''
+        Aplica el filtro de búsqueda, el orden y el límite a la consulta.
+        Se pide una fila extra para saber si existe una página siguiente.
+        Parámetros:
+        - query: La consulta `select` a paginar.
+        - cursor: Cursor de la página anterior, o None para la primera página.
+        - limit: Número de registros por página.
+        Retorna:
+        - La consulta paginada.
+        '''
+        if cursor is not None:
+            values = self._cursor_values(cursor)
+            if len(self.key_columns) == 1:
+                query = query.where(self.key_columns[0] > values[0])
+            else:
+                query = query.where(tuple_(*self.key_columns) > tuple_(*values))
+        return query.order_by(*self.key_columns).limit(limit + 1)
+
+    def page(self, rows, limit: int) -> tuple[list, str | None]:
+        '''
+        Recorta las filas a la página y calcula el cursor siguiente.
+        Parámetros:
+        - rows: Filas obtenidas con la consulta de `apply`.
+        - limit: Número de registros por página.
+        Retorna:
+        - Una tupla (filas de la página, cursor siguiente o None si es la última página).
+        '''
+        items = list(rows[:limit])
+        if len(rows) <= limit:
+            return items, None
+        last = items[-1]
+        return items, encode_cursor([getattr(last, column.key) for column in self.key_columns])
+
+    async def fetch(self, session: AsyncSession, query, cursor: str | None, limit: int) -> tuple[list, str | None]:
+        '''
+        Ejecuta la consulta paginada.
+        Parámetros:
+        - session: La sesión asíncrona de base de datos.
+        - query: La consulta `select` a paginar.
+        - cursor: Cursor de la página anterior, o None para la primera página.
+        - limit: Número de registros por página.
+        Retorna:
+        - Una tupla (filas de la página, cursor siguiente o None).
+        '''
+        rows = (await session.exec(self.apply(query, cursor, limit))).all()
+        return self.page(rows, limit)
+
+
+class CountCache:
+    '''
+    Caché en memoria de conteos de tablas (`COUNT(*)`).
+    Evita repetir el conteo en cada página. Este proceso la invalida al insertar o eliminar
+    registros; las escrituras de otros procesos (otros workers, seed, migraciones, cargas
+    externas) se reflejan cuando vence el TTL.
+    * Parámetros:
+        - ttl: Segundos que vale cada conteo.
+        - clock: Reloj monótono (los tests lo sustituyen).
+    '''
+
+    def __init__(self, ttl: float = COUNT_CACHE_TTL, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self._counts: dict[str, tuple[float, int]] = {}
+
+    async def count(self, session: AsyncSession, model) -> int:
+        '''
+        Retorna el número de filas del modelo, usando el valor en caché si existe y no venció.
+        Parámetros:
+        - session: La sesión asíncrona de base de datos.
+        - model: El modelo (tabla) a contar.
+        Retorna:
+        - El número de filas.
+        '''
+        key = model.__tablename__
+        entry = self._counts.get(key)
+        if entry is not None and entry[0] > self.clock():
+            return entry[1]
+        count = (await session.exec(select(func.count()).select_from(model))).one()
+        self._counts[key] = (self.clock() + self.ttl, count)
+        return count
+
+    def invalidate(self, model) -> None:
+        '''
+        Descarta el conteo en caché del modelo.
+        Parámetros:
+        - model: El modelo (tabla) modificado.
+        '''
+        self._counts.pop(model.__tablename__, None)
+
+    def clear(self) -> None:
+        '''
+        Descarta todos los conteos en caché.
+        '''
+        self._counts.clear()
+
+
+count_cache = CountCache()
@@ -0,0 +1,49 @@
+'''
+Proyección de columnas (sparse fieldsets) con el parámetro `fields=`.
+
+`FieldSelection` traduce `fields=id,name,email` en las columnas del `SELECT`, así la base de
+datos solo lee y envía esas columnas y la respuesta solo las serializa. Las columnas que
+la consulta necesita aunque no se pidan (por ejemplo, la clave del cursor) se seleccionan
+pero no se incluyen en la respuesta.
+'''
+from typing import Any
+
+from fastapi import HTTPException, status
+
+FIELDS_DESCRIPTION = "Campos a incluir, separados por comas (por defecto, todos)"
+
+
+class FieldSelection:
+    '''
+    Campos pedidos de un modelo (tabla).
+    * Parámetros:
+        - model: El modelo cuyas columnas se pueden pedir.
+        - fields: El valor de `fields=`; None para todas las columnas.
+        - required: Columnas que la consulta necesita siempre (por ejemplo, `paginator.key_columns`).
+    * Raises:
+        - HTTPException 400: Si se pide un campo que no existe o la lista está vacía.
+    '''
+
+    def __init__(self, model, fields: str | None, required: tuple = ()):
+        table_columns = model.__table__.columns
+        if fields is None:
+            self.names = list(table_columns.keys())
+        else:
+            self.names = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+            unknown = [name for name in self.names if name not in table_columns]
+            if unknown or not self.names:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"fields no válido: {', '.join(unknown) or 'vacío'}; opciones: {', '.join(table_columns.keys())}",
+                )
+        self.partial = fields is not None
+        extra = [column.key for column in required if column.key not in self.names]
+        self.columns = tuple(table_columns[name] for name in self.names + extra)
+        # Claves de la respuesta, o None si coinciden con las columnas seleccionadas
+        self.keys = self.names if extra else None
+
+    def filter(self, data: dict[str, Any]) -> dict[str, Any]:
+        '''
+        Recorta un registro ya serializado (por ejemplo, leído de la caché) a los campos pedidos.
+        '''
+        return {name: data[name] for name in self.names}
@@ -0,0 +1,120 @@
+'''
+Instrumentación de consultas SQL: número de consultas y tiempo de base de datos por solicitud.
+
+Los eventos `before_cursor_execute`/`after_cursor_execute` de SQLAlchemy miden cada sentencia.
+`QueryStatsMiddleware` abre un contador por solicitud (en un `ContextVar`, que también ven las
+consultas del engine asíncrono) y lo publica en el encabezado `Server-Timing`.
+Las consultas más lentas que `SLOW_QUERY_THRESHOLD_MS` se registran en el log `app.sql`.
+'''
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import Engine, event
+
+from app.metrics import configure_access_logger
+
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "100"))
+# Longitud máxima de la sentencia en el log de consultas lentas
+SLOW_QUERY_MAX_STATEMENT = 500
+
+slow_query_logger = configure_access_logger("app.sql")
+
+
+@dataclass
+class QueryStats:
+    '''
+    Consultas ejecutadas durante una solicitud.
+    Parámetros:
+    - count: Número de sentencias.
+    - seconds: Tiempo total en la base de datos.
+    '''
+    count: int = 0
+    seconds: float = 0.0
+
+
+current_query_stats: ContextVar[QueryStats | None] = ContextVar("current_query_stats", default=None)
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+    if elapsed * 1000 >= SLOW_QUERY_THRESHOLD_MS:
+        slow_query_logger.warning("slow query", extra={"fields": {
+            "duration_ms": round(elapsed * 1000, 3),
+            "statement": statement[:SLOW_QUERY_MAX_STATEMENT],
+            "executemany": executemany,
+        }})
+
+
+def instrument_engine(engine: Engine) -> None:
+    '''
+    Registra la medición de consultas en un engine (para el asíncrono, en su `sync_engine`).
+    '''
+    if not event.contains(engine, "after_cursor_execute", after_cursor_execute):
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", after_cursor_execute)
+
+
+class QueryStatsMiddleware:
+    '''
+    Middleware ASGI que cuenta las consultas de cada solicitud y agrega el encabezado
+    `Server-Timing: db;dur=<ms>;desc="<n> queries"`.
+    * Parámetros:
+        - app: La aplicación ASGI.
+    '''
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                server_timing = f'db;dur={stats.seconds * 1000:.3f};desc="{stats.count} queries"'
+                message.setdefault("headers", []).append((b"server-timing", server_timing.encode()))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_query_stats.reset(token)
+
+
+@contextmanager
+def assert_max_queries(engine: Engine, maximum: int):
+    '''
+    Ayuda para tests: falla si dentro del bloque se ejecutan más de `maximum` consultas en el engine.
+    Cuenta todas las consultas del engine, incluidas las de otros hilos (como el de `TestClient`).
+    Parámetros:
+    - engine: El engine a observar (para el asíncrono, su `sync_engine`).
+    - maximum: Número máximo de consultas permitido.
+    Retorna:
+    - Un objeto `QueryStats` con las consultas contadas.
+    '''
+    stats = QueryStats()
+
+    def count_query(*args) -> None:
+        stats.count += 1
+
+    event.listen(engine, "after_cursor_execute", count_query)
+    try:
+        yield stats
+    finally:
+        event.remove(engine, "after_cursor_execute", count_query)
+    assert stats.count <= maximum, f"Se ejecutaron {stats.count} consultas; el máximo es {maximum}"
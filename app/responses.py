@@ -0,0 +1,66 @@
+'''
+Respuestas JSON rápidas.
+
+`FastJSONResponse` es la clase de respuesta por defecto de la aplicación: serializa con
+`orjson` (dependencia opcional; sin ella usa el codificador estándar).
+Para listas grandes, `rows_response` serializa directamente filas de columnas
+(`select(Model.col, ...)`) sin crear objetos ORM ni validar con el `response_model`.
+'''
+from typing import Any, Sequence
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import Row
+
+try:
+    import orjson
+except ImportError:  # Dependencia opcional
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    '''
+    Respuesta JSON serializada con `orjson`, que convierte datetime, UUID y enums sin `jsonable_encoder`.
+    '''
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(jsonable_encoder(content))
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def json_response(content: Any, response: Response | None = None) -> FastJSONResponse:
+    '''
+    Crea una respuesta JSON sin pasar por el `response_model`, con los encabezados del endpoint.
+    Parámetros:
+    - content: Contenido serializable por `FastJSONResponse`.
+    - response: Respuesta inyectada del endpoint, cuyos encabezados (ETag, cursor...) se copian.
+    Retorna:
+    - La respuesta JSON.
+    '''
+    fast_response = FastJSONResponse(content)
+    if response is not None:
+        for name, value in response.headers.items():
+            if name != "content-length":
+                fast_response.headers.append(name, value)
+    return fast_response
+
+
+def rows_response(
+    rows: Sequence[Row], response: Response | None = None, keys: Sequence[str] | None = None
+) -> FastJSONResponse:
+    '''
+    Crea la respuesta de una lista a partir de filas de columnas, sin crear objetos ORM.
+    Las columnas seleccionadas deben coincidir con los campos del modelo de respuesta documentado
+    (o con los pedidos en `fields=`).
+    Parámetros:
+    - rows: Filas de una consulta `select` por columnas.
+    - response: Respuesta inyectada del endpoint, cuyos encabezados se copian.
+    - keys: Columnas a incluir, si la consulta seleccionó otras además (por ejemplo, la clave del cursor).
+    Retorna:
+    - La respuesta JSON.
+    '''
+    if keys is None:
+        return json_response([row._asdict() for row in rows], response)
+    return json_response([{key: row._mapping[key] for key in keys} for row in rows], response)
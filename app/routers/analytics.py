@@ -0,0 +1,91 @@
+from datetime import date
+from typing import Literal
+
+from fastapi import APIRouter, Query, Response
+from sqlalchemy import func
+from sqlmodel import select
+
+from db import AsyncSessionDep
+from models import CustomerPlan, StatusEnum, TransactionRollup, TransactionTotals
+from app.pagination import KeysetPaginator, NEXT_CURSOR_HEADER
+from app.responses import rows_response
+
+# Para crear el router en APIRouter
+router = APIRouter()
+
+ANALYTICS_PAGE_SIZE = 1000
+ANALYTICS_PAGE_MAX = 10_000
+
+# Paginadores por agrupación: recorren (periodo, cliente) o (periodo, plan)
+analytics_paginators = {
+    "customer": KeysetPaginator(TransactionRollup.period_start, TransactionRollup.customer_id),
+    "plan": KeysetPaginator(TransactionRollup.period_start, CustomerPlan.plan_id),
+}
+
+
+@router.get("/transactions", response_model=list[TransactionTotals], tags=["analytics"])
+async def transaction_totals(
+    response: Response,
+    session: AsyncSessionDep,
+    bucket: Literal["day", "week", "month"] = Query("day", description="Granularidad de los periodos"),
+    group_by: Literal["customer", "plan"] = Query("customer", description="Totales por cliente o por plan"),
+    customer_id: int | None = Query(None, description="Filtrar por cliente"),
+    plan_id: int | None = Query(None, description="Filtrar por plan (suscriptores activos)"),
+    date_from: date | None = Query(None, description="Primer periodo (inclusive), por su fecha de inicio"),
+    date_to: date | None = Query(None, description="Último periodo (exclusivo), por su fecha de inicio"),
+    limit: int = Query(ANALYTICS_PAGE_SIZE, ge=1, le=ANALYTICS_PAGE_MAX, description="Número de registros"),
+    cursor: str | None = Query(None, description="Cursor de la página siguiente (encabezado X-Next-Cursor)"),
+) -> list[TransactionTotals]:
+    '''
+    Retorna los totales de transacciones por periodo (día, semana o mes) y por cliente o plan.
+    Se leen de `transaction_rollup`, que se actualiza con cada alta, sin recorrer `transaction`.
+    Los totales de un plan suman todas las transacciones de sus suscriptores activos; las
+    suscripciones inactivas no cuentan. Un cliente con varios planes activos cuenta en cada uno.
+    * Parámetros:
+        - bucket: `day`, `week` (semanas ISO, desde el lunes) o `month`.
+        - group_by: `customer` o `plan`.
+        - customer_id / plan_id: Filtrar por cliente o por plan.
+        - date_from / date_to: Periodos cuyo inicio está en `[date_from, date_to)`.
+        - cursor: Cursor devuelto en el encabezado `X-Next-Cursor` de la página anterior.
+    * Retorna:
+        - Los totales ordenados por periodo. Si hay más páginas, el cursor siguiente va en `X-Next-Cursor`.
+    '''
+    if group_by == "customer":
+        # Cada fila del rollup ya es el total de un cliente en un periodo
+        query = select(
+            TransactionRollup.period_start,
+            TransactionRollup.customer_id,
+            TransactionRollup.total,
+            TransactionRollup.transaction_count,
+        )
+        if plan_id is not None:
+            subscribers = select(CustomerPlan.customer_id).where(
+                CustomerPlan.plan_id == plan_id, CustomerPlan.status == StatusEnum.ACTIVE
+            )
+            query = query.where(TransactionRollup.customer_id.in_(subscribers))
+    else:
+        query = (
+            select(
+                TransactionRollup.period_start,
+                CustomerPlan.plan_id,
+                func.sum(TransactionRollup.total).label("total"),
+                func.sum(TransactionRollup.transaction_count).label("transaction_count"),
+            )
+            .join(CustomerPlan, CustomerPlan.customer_id == TransactionRollup.customer_id)
+            .where(CustomerPlan.status == StatusEnum.ACTIVE)
+            .group_by(TransactionRollup.period_start, CustomerPlan.plan_id)
+        )
+        if plan_id is not None:
+            query = query.where(CustomerPlan.plan_id == plan_id)
+    query = query.where(TransactionRollup.bucket == bucket)
+    if customer_id is not None:
+        query = query.where(TransactionRollup.customer_id == customer_id)
+    if date_from is not None:
+        query = query.where(TransactionRollup.period_start >= date_from)
+    if date_to is not None:
+        query = query.where(TransactionRollup.period_start < date_to)
+
+    rows, next_cursor = await analytics_paginators[group_by].fetch(session, query, cursor, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return rows_response(rows, response)
@@ -1,17 +1,80 @@
-from fastapi import APIRouter, Query, status, HTTPException
+import json
+from typing import Any, AsyncIterator
+
+from fastapi import APIRouter, Query, Request, Response, status, HTTPException
+from pydantic import ValidationError
+from sqlalchemy import delete, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import load_only, selectinload
 from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 
-from models import Customer, CustomerCreate, CustomerUpdate, Plan, CustomerPlan, StatusEnum
-from db import SessionDep, create_all_tables
+from models import Customer, CustomerBalance, CustomerCreate, CustomerRead, CustomerUpdate, Plan, CustomerPlan, StatusEnum, BulkImportResult, BulkRowError, TransactionRollup
+from db import AsyncSessionDep
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, KeysetPaginator, NEXT_CURSOR_HEADER
+from app.cache import CUSTOMER_TTL, cache, customer_key
+from app.conditional import conditional_get
+from app.projection import FIELDS_DESCRIPTION, FieldSelection
+from app.responses import FastJSONResponse, json_response, rows_response
 
 # Para crear el router en APIRouter
 router = APIRouter()
 
+customer_paginator = KeysetPaginator(Customer.id)
+
+# Relaciones aceptadas en `?include=`: (relación a cargar, tablas versionadas de las que depende)
+CUSTOMER_INCLUDES = {
+    "plans": (Customer.plans, ("plan", "customerplan")),
+    "transactions": (Customer.transaction, ()),
+}
+
+
+def parse_customer_includes(include: str | None) -> list[str]:
+    '''
+    Convierte el parámetro `include` en la lista de relaciones a cargar.
+    Parámetros:
+    - include: Nombres separados por comas, o None.
+    Retorna:
+    - Los nombres sin repetir, en el orden de `CUSTOMER_INCLUDES`.
+    '''
+    names = {name.strip() for name in (include or "").split(",") if name.strip()}
+    unknown = names - CUSTOMER_INCLUDES.keys()
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"include no válido: {', '.join(sorted(unknown))}; opciones: {', '.join(CUSTOMER_INCLUDES)}",
+        )
+    return [name for name in CUSTOMER_INCLUDES if name in names]
+
+# Importación masiva: filas por lote (una consulta IN y una transacción por lote)
+BULK_BATCH_SIZE = 500
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+async def save_customer(customer: Customer, session: AsyncSession) -> None:
+    '''
+    Guarda un cliente en la base de datos.
+    La unicidad del email la garantiza el índice único de `customer.email`,
+    sin consultas previas por cada validación.
+    * Parámetros:
+        - customer: El cliente a guardar.
+        - session: La sesión de base de datos.
+    * Raises:
+        - HTTPException 409: Si ya existe un cliente con el mismo email.
+    '''
+    session.add(customer) # Agregar el cliente a la sesión
+    try:
+        await session.commit() # Guardar los cambios en la base de datos
+    except IntegrityError:
+        await session.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Ya existe un cliente con esta dirección de correo electrónico")
+    await session.refresh(customer) # Refrescar el objeto cliente para obtener los datos actualizados
+
 
 # Crear un cliente
 @router.post("/customers/", response_model=Customer, tags=["customers"], status_code=status.HTTP_201_CREATED)
-async def create_customer(customer_data: CustomerCreate, session: SessionDep) -> Customer:
+async def create_customer(customer_data: CustomerCreate, session: AsyncSessionDep) -> Customer:
     '''
     Crea un nuevo cliente en la base de datos.
     * Parámetros:
@@ -20,44 +83,236 @@ async def create_customer(customer_data: CustomerCreate, session: SessionDep) ->
         - El cliente creado.
     '''
     customer = Customer.model_validate(customer_data.model_dump()) # Convertir CustomerCreate a Customer en formato dict
-    session.add(customer) # Agregar el nuevo cliente a la sesión
-    session.commit() # Guardar los cambios en la base de datos
-    session.refresh(customer) # Refrescar el objeto cliente para obtener los datos actualizados
+    await save_customer(customer, session)
     return customer
 
+async def read_bulk_rows(request: Request) -> AsyncIterator[tuple[int, Any]]:
+    '''
+    Lee las filas de una importación masiva, como arreglo JSON o como flujo NDJSON.
+    Con NDJSON las filas se procesan a medida que llegan, sin cargar todo el cuerpo.
+    * Parámetros:
+        - request: La solicitud entrante.
+    * Retorna:
+        - Un iterador asíncrono de (posición, fila). La fila es un dict (JSON) o bytes (línea NDJSON).
+    * Raises:
+        - HTTPException 400: Si el cuerpo JSON no es un arreglo válido.
+    '''
+    if request.headers.get("content-type", "").startswith(NDJSON_MEDIA_TYPE):
+        index = 0
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield index, line
+                    index += 1
+        if buffer.strip():
+            yield index, buffer
+        return
+
+    try:
+        rows = await request.json()
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="El cuerpo debe ser un arreglo JSON o NDJSON")
+    if not isinstance(rows, list):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="El cuerpo debe ser un arreglo JSON o NDJSON")
+    for index, row in enumerate(rows):
+        yield index, row
+
+
+def validation_detail(error: ValidationError) -> str:
+    '''
+    Resume los errores de validación de una fila en un solo texto.
+    '''
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in detail['loc'])}: {detail['msg']}" if detail["loc"] else detail["msg"]
+        for detail in error.errors()
+    )
+
+
+async def import_customer_batch(
+    batch: list[tuple[int, CustomerCreate]], seen_emails: set[str], result: BulkImportResult, session: AsyncSession
+) -> None:
+    '''
+    Inserta un lote de clientes ya validados en una sola transacción.
+    Los emails se deduplican en memoria y contra la base de datos con una única consulta IN.
+    * Parámetros:
+        - batch: Lista de (posición, cliente) del lote.
+        - seen_emails: Emails ya aceptados en lotes anteriores de la misma importación.
+        - result: Resultado acumulado de la importación.
+        - session: La sesión de base de datos.
+    '''
+    emails = [customer.email for _, customer in batch if customer.email is not None]
+    existing_emails: set[str] = set()
+    if emails:
+        existing_emails = set((await session.exec(select(Customer.email).where(Customer.email.in_(emails)))).all())
+
+    rows: list[tuple[int, dict]] = []
+    for index, customer in batch:
+        if customer.email is not None:
+            if customer.email in seen_emails or customer.email in existing_emails:
+                result.errors.append(BulkRowError(index=index, detail="Ya existe un cliente con esta dirección de correo electrónico"))
+                continue
+            seen_emails.add(customer.email)
+        rows.append((index, customer.model_dump()))
+    if not rows:
+        return
+
+    try:
+        await session.exec(insert(Customer), params=[row for _, row in rows]) # executemany en una transacción
+        await session.commit()
+        result.created += len(rows)
+    except IntegrityError:
+        # Alguna fila viola una restricción (p. ej. un email insertado concurrentemente):
+        # se reintenta fila por fila para reportar solo las filas afectadas.
+        await session.rollback()
+        for index, row in rows:
+            try:
+                await session.exec(insert(Customer), params=[row])
+                await session.commit()
+                result.created += 1
+            except IntegrityError as error:
+                await session.rollback()
+                result.errors.append(BulkRowError(index=index, detail=str(error.orig)))
+
+
+# Importar clientes de forma masiva
+@router.post("/customers/bulk", response_model=BulkImportResult, tags=["customers"])
+async def bulk_create_customers(request: Request, session: AsyncSessionDep) -> BulkImportResult:
+    '''
+    Crea clientes de forma masiva a partir de un arreglo JSON o de un flujo NDJSON
+    (`Content-Type: application/x-ndjson`).
+    * Parámetros:
+        - request: La solicitud con las filas de clientes.
+    * Retorna:
+        - El número de clientes creados y los errores por fila. Una fila inválida no detiene el lote.
+    '''
+    result = BulkImportResult()
+    seen_emails: set[str] = set()
+    batch: list[tuple[int, CustomerCreate]] = []
+    async for index, row in read_bulk_rows(request):
+        try:
+            if isinstance(row, bytes):
+                customer = CustomerCreate.model_validate_json(row)
+            else:
+                customer = CustomerCreate.model_validate(row)
+        except ValidationError as error:
+            result.errors.append(BulkRowError(index=index, detail=validation_detail(error)))
+            continue
+        batch.append((index, customer))
+        if len(batch) >= BULK_BATCH_SIZE:
+            await import_customer_batch(batch, seen_emails, result, session)
+            batch = []
+    if batch:
+        await import_customer_batch(batch, seen_emails, result, session)
+    result.errors.sort(key=lambda error: error.index)
+    return result
+
 # Listar todos los clientes
-@router.get("/customers/", response_model=list[Customer], tags=["customers"])
-async def list_customers(session: SessionDep) -> list[Customer]:
+@router.get("/customers/", response_model=list[CustomerRead], tags=["customers"])
+async def list_customers(
+    request: Request,
+    response: Response,
+    session: AsyncSessionDep,
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Número de registros por página (sin límite si se omite)"),
+    cursor: str | None = Query(None, description="Cursor de la página siguiente (encabezado X-Next-Cursor)"),
+    include: str | None = Query(None, description="Relaciones a incluir, separadas por comas: plans, transactions"),
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+) -> list[CustomerRead]:
     '''
     Retorna una lista de todos los clientes en la base de datos.
     * Parámetros:
         - session: La sesión de base de datos.
+        - limit: Si se indica, pagina por cursor y devuelve el siguiente en `X-Next-Cursor`.
+        - cursor: Cursor de la página anterior.
+        - include: Relaciones a anidar en cada cliente; cada una cuesta una sola consulta más
+          (`selectinload`), sin importar cuántos clientes haya.
+        - fields: Columnas del cliente a devolver (por ejemplo `id,name,email`); solo esas se leen en el SELECT.
     * Retorna:
-        - Una lista de clientes.
+        - Una lista de clientes, o 304 si no cambió desde el ETag del cliente.
     '''
-    customers_db = session.exec(select(Customer)).all()
+    includes = parse_customer_includes(include)
+    selection = FieldSelection(Customer, fields, customer_paginator.key_columns)
+    # Sin tabla versionada para las transacciones no hay ETag fiable: se omite el GET condicional
+    if "transactions" not in includes:
+        tables = ["customer"] + [table for name in includes for table in CUSTOMER_INCLUDES[name][1]]
+        if (not_modified := await conditional_get(request, response, session, *tables)) is not None:
+            return not_modified
+    if includes:
+        query = select(Customer).options(
+            load_only(*(getattr(Customer, name) for name in selection.names)),
+            *(selectinload(CUSTOMER_INCLUDES[name][0]) for name in includes),
+        )
+    else:
+        # Sin relaciones basta con las columnas: se serializan directamente, sin objetos ORM
+        query = select(*selection.columns)
+    if limit is None and cursor is None:
+        customers_db = (await session.exec(query)).all()
+    else:
+        customers_db, next_cursor = await customer_paginator.fetch(session, query, cursor, limit or DEFAULT_PAGE_SIZE)
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
     if len(customers_db) == 0:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No se encontraron clientes")
-    return customers_db
+    if not includes:
+        return rows_response(customers_db, response, selection.keys)
+    return json_response([
+        {name: getattr(customer, name) for name in selection.names} | {
+            name: [related.model_dump() for related in getattr(customer, CUSTOMER_INCLUDES[name][0].key)]
+            for name in includes
+        }
+        for customer in customers_db
+    ], response)
 
 # retornar un cliente por su ID 
+
 @router.get("/read_customers/{customer_id}", response_model=Customer, tags=["customers"])
-async def get_customer(customer_id: int, session: SessionDep) -> Customer:
+async def get_customer(
+    customer_id: int,
+    session: AsyncSessionDep,
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+) -> Customer:
     '''
     Retorna un cliente por su ID.
     * Parámetros:
         - customer_id: El ID del cliente a retornar.
+        - fields: Campos a devolver. El cliente completo se lee de la caché, así que se recorta la respuesta.
     * Retorna:
         - El cliente con el ID especificado.
     '''
-    customer_db = session.get(Customer, customer_id)
-    if not customer_db:
+    selection = FieldSelection(Customer, fields)
+    async def load_customer() -> dict | None:
+        customer_db = await session.get(Customer, customer_id)
+        return customer_db.model_dump(mode="json") if customer_db else None
+
+    customer = await cache.get_or_load(customer_key(customer_id), load_customer, CUSTOMER_TTL)
+    if not customer:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Cliente con ID {customer_id} no encontrado")
-    return customer_db
+    if selection.partial:
+        return FastJSONResponse(selection.filter(customer))
+    return Customer.model_validate(customer)
+
+@router.get("/customers/{customer_id}/summary", response_model=CustomerBalance, tags=["customers"])
+async def get_customer_summary(customer_id: int, session: AsyncSessionDep) -> CustomerBalance:
+    '''
+    Retorna el saldo, el número de transacciones y la fecha de la última transacción de un cliente.
+    Lee una fila de `customer_balance` por clave primaria, sin recorrer `transaction`.
+    * Parámetros:
+        - customer_id: El ID del cliente.
+    * Retorna:
+        - El resumen del cliente (en cero si aún no tiene transacciones).
+    '''
+    summary = await session.get(CustomerBalance, customer_id)
+    if summary is not None:
+        return summary
+    if (await session.exec(select(Customer.id).where(Customer.id == customer_id))).first() is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Cliente con ID {customer_id} no encontrado")
+    return CustomerBalance(customer_id=customer_id)
 
 # eliminar un cliente por su ID
 @router.delete("/delete_customers/{customer_id}", tags=["customers"])
-async def delete_customer(customer_id: int, session: SessionDep) -> dict:
+async def delete_customer(customer_id: int, session: AsyncSessionDep) -> dict:
     '''
     Elimina un cliente por su ID.
     * Parámetros:
@@ -65,16 +320,19 @@ async def delete_customer(customer_id: int, session: SessionDep) -> dict:
     * Retorna:
         - Un mensaje de éxito.
     '''
-    customer_db = session.get(Customer, customer_id)
+    customer_db = await session.get(Customer, customer_id)
     if not customer_db:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Cliente con ID {customer_id} no encontrado")
-    session.delete(customer_db)
-    session.commit()
+    await session.delete(customer_db)
+    await session.exec(delete(CustomerBalance).where(CustomerBalance.customer_id == customer_id))
+    await session.exec(delete(TransactionRollup).where(TransactionRollup.customer_id == customer_id))
+    await session.commit()
+    await cache.invalidate(customer_key(customer_id))
     return {"detail":"OK"}
 
 # actualizar un cliente por su ID
 @router.patch("/update_customers/{customer_id}", response_model=Customer, status_code=status.HTTP_200_OK, tags=["customers"])
-async def update_customer(customer_id: int, customer_data: CustomerUpdate, session: SessionDep) -> Customer:
+async def update_customer(customer_id: int, customer_data: CustomerUpdate, session: AsyncSessionDep) -> Customer:
     '''
     Actualiza un cliente por su ID.
     * Parámetros:
@@ -83,18 +341,17 @@ async def update_customer(customer_id: int, customer_data: CustomerUpdate, sessi
     * Retorna:
         - El cliente actualizado.
     '''
-    customer_db = session.get(Customer, customer_id)
+    customer_db = await session.get(Customer, customer_id)
     if not customer_db:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Cliente con ID {customer_id} no encontrado")
     customer_data_dict = customer_data.model_dump(exclude_unset=True) # Convertir CustomerUpdate a dict
     customer_db.sqlmodel_update(customer_data_dict) # Actualizar el cliente en la base de datos
-    session.add(customer_db) # Agregar el cliente actualizado a la sesión
-    session.commit() # Guardar los cambios en la base de datos
-    session.refresh(customer_db) # Refrescar el objeto cliente para obtener los datos actualizados
+    await save_customer(customer_db, session)
+    await cache.invalidate(customer_key(customer_id))
     return customer_db
 
 @router.post("/customers/{customer_id}/plans/{plan_id}/", status_code=status.HTTP_201_CREATED, tags=["customers"])
-async def subscribe_customer_to_plan(customer_id: int, plan_id: int, session: SessionDep, plan_status: StatusEnum = Query()) -> CustomerPlan:
+async def subscribe_customer_to_plan(customer_id: int, plan_id: int, session: AsyncSessionDep, plan_status: StatusEnum = Query()) -> CustomerPlan:
     '''
     Suscribe un cliente a un plan.
     * Parámetros:
@@ -103,36 +360,37 @@ async def subscribe_customer_to_plan(customer_id: int, plan_id: int, session: Se
     * Retorna:
         - El objeto `CustomerPlan` que representa la nueva suscripción.
     '''
-    customer_db = session.get(Customer, customer_id)
-    plan_db = session.get(Plan, plan_id)
-    
-    if not customer_db or not plan_db:
+    # Una sola consulta por clave primaria comprueba que existan ambos, sin cargar los objetos
+    plan_exists = select(Plan.id).where(Plan.id == plan_id).exists()
+    exists_query = select(Customer.id).where(Customer.id == customer_id, plan_exists)
+    if (await session.exec(exists_query)).first() is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Cliente o plan no encontrado")
     
     # Añadir el plan a la lista de planes del cliente
-    customer_plan_db = CustomerPlan(plan_id=plan_db.id, customer_id=customer_db.id, status=plan_status)
+    customer_plan_db = CustomerPlan(plan_id=plan_id, customer_id=customer_id, status=plan_status)
     session.add(customer_plan_db)
-    session.commit()
-    session.refresh(customer_plan_db)
+    await session.commit() # expire_on_commit=False: el id ya está asignado, no hace falta refresh
 
     return customer_plan_db
 
 @router.get("/customers/plans/", response_model=list[CustomerPlan], status_code=status.HTTP_200_OK, tags=["customers"])
-async def list_customer_plans(session: SessionDep) -> list[CustomerPlan]:
+async def list_customer_plans(request: Request, response: Response, session: AsyncSessionDep) -> list[CustomerPlan]:
     '''
     Retorna una lista de todos los planes en la base de datos.
     * Parámetros:
         - customer_plan_db; La sesión de base de datos.
     * Retorna:
-        - Una lista de planes
+        - Una lista de planes, o 304 si no cambió desde el ETag del cliente.
     '''
-    customer_plan_db = session.exec(select(CustomerPlan)).all()
+    if (not_modified := await conditional_get(request, response, session, "customerplan")) is not None:
+        return not_modified
+    customer_plan_db = (await session.exec(select(CustomerPlan))).all()
     if len(customer_plan_db) == 0:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No se encontraron planes")
     return customer_plan_db
 
 @router.get("/customers/{customer_id}/plans/", response_model=list[CustomerPlan], status_code=status.HTTP_200_OK, tags=["customers"])
-async def list_customer_plans(customer_id: int, session: SessionDep, plan_status: StatusEnum = Query()) -> list[CustomerPlan]:
+async def list_customer_plans(customer_id: int, session: AsyncSessionDep, plan_status: StatusEnum = Query()) -> list[CustomerPlan]:
     '''
     Retorna una lista de todos los planes en la base de datos.
     * Parámetros:
@@ -146,7 +404,7 @@ async def list_customer_plans(customer_id: int, session: SessionDep, plan_status
         .where(CustomerPlan.status == plan_status)
     )
     
-    customer_plan_db = session.exec(query).all()
+    customer_plan_db = (await session.exec(query)).all()
     if not customer_plan_db:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No se encuentran planes activos asociados al cliente con el id {customer_id}")
     return customer_plan_db
@@ -1,10 +1,181 @@
-from fastapi import APIRouter
-from models import Invoice
+from fastapi import APIRouter, HTTPException, Response, status
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from db import AsyncSessionDep
+from models import Customer, Invoice, InvoiceBatchCreate, InvoiceBatchResult, InvoiceCreate, Job, Transaction
+from app.jobs import JobContext, job_runner
 
 # Para crear el router en APIRouter
 router = APIRouter()
 
+# Facturación en segundo plano: clientes por tramo (una transacción por tramo)
+INVOICE_JOB_CHUNK = 1000
+
+
+def transactions_in_period(query, period_start, period_end):
+    '''
+    Filtra una consulta sobre `transaction` al periodo `[period_start, period_end)`.
+    '''
+    return query.where(Transaction.date >= period_start).where(Transaction.date < period_end)
+
+
+@router.post("/invoices/", response_model=Invoice, status_code=status.HTTP_201_CREATED, tags=["invoices"])
+async def create_invoice(invoice_data: InvoiceCreate, session: AsyncSessionDep) -> Invoice:
+    '''
+    Genera la factura de un cliente para un periodo.
+    El total y el número de transacciones se calculan con una sola consulta `SUM`/`COUNT`.
+    * Parámetros:
+        - invoice_data: Cliente y periodo a facturar.
+    * Retorna:
+        - La factura creada.
+    '''
+    customer_db = await session.get(Customer, invoice_data.customer_id)
+    if not customer_db:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Cliente con ID {invoice_data.customer_id} no encontrado")
+
+    query = select(func.count(Transaction.id), func.coalesce(func.sum(Transaction.ammount), 0)).where(
+        Transaction.customer_id == invoice_data.customer_id
+    )
+    transaction_count, total = (await session.exec(
+        transactions_in_period(query, invoice_data.period_start, invoice_data.period_end)
+    )).one()
+
+    invoice_db = Invoice.model_validate(invoice_data.model_dump() | {"transaction_count": transaction_count, "total": total})
+    session.add(invoice_db)
+    try:
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="El cliente ya tiene una factura para este periodo")
+    await session.refresh(invoice_db)
+    return invoice_db
+
+
+async def invoice_period(
+    period: InvoiceBatchCreate, session: AsyncSession, customer_ids: tuple[int, int] | None = None
+) -> InvoiceBatchResult:
+    '''
+    Factura a los clientes con transacciones en el periodo, en una sola pasada:
+    una consulta agrupada por cliente, una consulta de facturas existentes y una inserción masiva.
+    La inserción es `ON CONFLICT DO NOTHING ... RETURNING`: si otro lote factura el mismo periodo
+    a la vez, sus facturas cuentan como omitidas en lugar de fallar por el índice único.
+    * Parámetros:
+        - period: Periodo a facturar.
+        - session: La sesión de base de datos.
+        - customer_ids: Rango de IDs de clientes `[primero, último]`, o None para todos.
+    * Retorna:
+        - El número de facturas creadas, las omitidas por existir ya y el total facturado.
+    '''
+    totals_query = transactions_in_period(
+        select(Transaction.customer_id, func.count(Transaction.id), func.sum(Transaction.ammount)),
+        period.period_start,
+        period.period_end,
+    ).group_by(Transaction.customer_id)
+    invoiced_query = (
+        select(Invoice.customer_id)
+        .where(Invoice.period_start == period.period_start)
+        .where(Invoice.period_end == period.period_end)
+    )
+    if customer_ids is not None:
+        totals_query = totals_query.where(Transaction.customer_id.between(*customer_ids))
+        invoiced_query = invoiced_query.where(Invoice.customer_id.between(*customer_ids))
+    totals = (await session.exec(totals_query)).all()
+    invoiced_customers = set((await session.exec(invoiced_query)).all())
+
+    rows = [
+        {
+            "customer_id": customer_id,
+            "period_start": period.period_start,
+            "period_end": period.period_end,
+            "transaction_count": transaction_count,
+            "total": total,
+        }
+        for customer_id, transaction_count, total in totals
+        if customer_id not in invoiced_customers
+    ]
+    created_totals = []
+    if rows:
+        statement = sqlite_insert(Invoice).on_conflict_do_nothing().returning(Invoice.total)
+        created_totals = (await session.exec(statement, params=rows)).scalars().all()
+        await session.commit()
+    return InvoiceBatchResult(
+        created=len(created_totals),
+        skipped=len(totals) - len(created_totals),
+        total=sum(created_totals),
+    )
+
+
+@router.post("/invoices/batch", response_model=InvoiceBatchResult, status_code=status.HTTP_201_CREATED, tags=["invoices"])
+async def create_invoices_batch(period: InvoiceBatchCreate, session: AsyncSessionDep) -> InvoiceBatchResult:
+    '''
+    Factura a todos los clientes con transacciones en el periodo dentro de la solicitud.
+    Para muchos clientes, usar `POST /invoices/batch/jobs`.
+    * Parámetros:
+        - period: Periodo a facturar.
+    * Retorna:
+        - El número de facturas creadas, las omitidas por existir ya y el total facturado.
+    '''
+    return await invoice_period(period, session)
+
+
+@router.post("/invoices/batch/jobs", response_model=Job, status_code=status.HTTP_202_ACCEPTED, tags=["invoices"])
+async def submit_invoices_batch_job(period: InvoiceBatchCreate, response: Response) -> Job:
+    '''
+    Encola la facturación de todos los clientes del periodo como trabajo en segundo plano.
+    * Parámetros:
+        - period: Periodo a facturar.
+    * Retorna:
+        - El trabajo creado; su estado y resultado se consultan en `GET /jobs/{id}` (encabezado `Location`).
+    '''
+    job = await job_runner.submit("invoice_batch", period.model_dump(mode="json"))
+    response.headers["Location"] = f"/jobs/{job.id}"
+    return job
+
+
+@job_runner.register("invoice_batch")
+async def run_invoices_batch_job(params: dict, job: JobContext) -> dict:
+    '''
+    Factura el periodo por tramos de `INVOICE_JOB_CHUNK` clientes, cada uno en su propia
+    transacción: el lock de escritura de SQLite se libera entre tramos y las altas de la API
+    no esperan a que termine toda la facturación.
+    '''
+    period = InvoiceBatchCreate.model_validate(params)
+    result = InvoiceBatchResult(created=0, skipped=0, total=0)
+    async with job.session() as session:
+        total_customers = (await session.exec(select(func.count()).select_from(Customer))).one()
+        await job.report(0, total_customers)
+        processed = 0
+        last_id = 0
+        while True:
+            customer_ids = (await session.exec(
+                select(Customer.id).where(Customer.id > last_id).order_by(Customer.id).limit(INVOICE_JOB_CHUNK)
+            )).all()
+            if not customer_ids:
+                break
+            last_id = customer_ids[-1]
+            chunk = await invoice_period(period, session, (customer_ids[0], last_id))
+            result.created += chunk.created
+            result.skipped += chunk.skipped
+            result.total += chunk.total
+            processed += len(customer_ids)
+            await job.report(processed)
+    return result.model_dump()
+
 
-@router.post("/invoices/")
-async def create_invoice(invoice_data: Invoice):
-    return invoice_data
\ No newline at end of file
+@router.get("/invoices/{invoice_id}", response_model=Invoice, tags=["invoices"])
+async def get_invoice(invoice_id: int, session: AsyncSessionDep) -> Invoice:
+    '''
+    Retorna una factura por su ID.
+    * Parámetros:
+        - invoice_id: El ID de la factura.
+    * Retorna:
+        - La factura con el ID especificado.
+    '''
+    invoice_db = await session.get(Invoice, invoice_id)
+    if not invoice_db:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Factura con ID {invoice_id} no encontrada")
+    return invoice_db
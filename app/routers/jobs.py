@@ -0,0 +1,77 @@
+import os
+
+from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.responses import FileResponse
+from sqlmodel import select
+
+from db import AsyncSessionDep
+from models import Job, JobStatusEnum
+from app.exports import EXPORT_DIR, EXPORT_MEDIA_TYPES
+
+# Para crear el router en APIRouter
+router = APIRouter()
+
+
+async def get_job_or_404(job_id: int, session: AsyncSessionDep) -> Job:
+    '''
+    Retorna un trabajo por su ID o responde 404.
+    '''
+    job = await session.get(Job, job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Trabajo con ID {job_id} no encontrado")
+    return job
+
+
+@router.get("/jobs/", response_model=list[Job], tags=["jobs"])
+async def list_jobs(
+    session: AsyncSessionDep,
+    kind: str | None = Query(None, description="Filtrar por tipo de trabajo"),
+    job_status: JobStatusEnum | None = Query(None, alias="status", description="Filtrar por estado"),
+    limit: int = Query(50, ge=1, le=500, description="Número de registros"),
+) -> list[Job]:
+    '''
+    Retorna los trabajos más recientes.
+    * Parámetros:
+        - kind: Tipo de trabajo, por ejemplo `invoice_batch`.
+        - status: Estado del trabajo.
+    * Retorna:
+        - Los trabajos, del más reciente al más antiguo.
+    '''
+    query = select(Job).order_by(Job.id.desc()).limit(limit)
+    if kind is not None:
+        query = query.where(Job.kind == kind)
+    if job_status is not None:
+        query = query.where(Job.status == job_status)
+    return (await session.exec(query)).all()
+
+
+@router.get("/jobs/{job_id}", response_model=Job, tags=["jobs"])
+async def get_job(job_id: int, session: AsyncSessionDep) -> Job:
+    '''
+    Retorna el estado, el avance y, al terminar, el resultado o el error de un trabajo.
+    * Parámetros:
+        - job_id: El ID del trabajo.
+    * Retorna:
+        - El trabajo.
+    '''
+    return await get_job_or_404(job_id, session)
+
+
+@router.get("/jobs/{job_id}/file", tags=["jobs"])
+async def download_job_file(job_id: int, session: AsyncSessionDep) -> FileResponse:
+    '''
+    Descarga el archivo generado por un trabajo de exportación completado.
+    * Parámetros:
+        - job_id: El ID del trabajo.
+    * Retorna:
+        - El archivo, o 409 si el trabajo todavía no terminó.
+    '''
+    job = await get_job_or_404(job_id, session)
+    if job.status != JobStatusEnum.SUCCEEDED:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"El trabajo está {job.status.value}")
+    if not job.result or "file" not in job.result:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="El trabajo no genera archivos")
+    path = os.path.join(EXPORT_DIR, job.result["file"])
+    if not os.path.exists(path):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="El archivo ya no existe")
+    return FileResponse(path, media_type=EXPORT_MEDIA_TYPES[job.result["format"]], filename=job.result["file"])
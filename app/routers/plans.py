@@ -1,15 +1,22 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
 from models import Plan, PlanCreate
-from db import SessionDep
+from db import AsyncSessionDep
 from sqlmodel import select
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, KeysetPaginator, NEXT_CURSOR_HEADER
+from app.cache import PLANS_TTL, cache, plans_key
+from app.conditional import conditional_get
+from app.projection import FIELDS_DESCRIPTION, FieldSelection
+from app.responses import json_response, rows_response
 
 
 # Para crear el router en APIRouter
 
 router = APIRouter()
 
+plan_paginator = KeysetPaginator(Plan.id)
+
 @router.post("/plans/", response_model=Plan, status_code=status.HTTP_201_CREATED, tags=["plans"])
-async def create_plan(plan_data: PlanCreate, session: SessionDep) -> Plan:
+async def create_plan(plan_data: PlanCreate, session: AsyncSessionDep) -> Plan:
     '''
     Retorna una lista de todos los planes en la base de datos.
     * Parámetros:
@@ -19,13 +26,45 @@ async def create_plan(plan_data: PlanCreate, session: SessionDep) -> Plan:
     '''
     plan_db = Plan.model_validate(plan_data.model_dump())
     session.add(plan_db)
-    session.commit()
-    session.refresh(plan_db)
+    await session.commit()
+    await session.refresh(plan_db)
     return plan_db
 
 @router.get("/plans/", response_model=list[Plan], status_code=status.HTTP_200_OK, tags=["plans"])
-async def list_plans(session: SessionDep) -> list[Plan]:
-    plans_db = session.exec(select(Plan)).all()
-    if len(plans_db) == 0:
+async def list_plans(
+    request: Request,
+    response: Response,
+    session: AsyncSessionDep,
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Número de registros por página (sin límite si se omite)"),
+    cursor: str | None = Query(None, description="Cursor de la página siguiente (encabezado X-Next-Cursor)"),
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+) -> list[Plan]:
+    '''
+    Retorna la lista de planes. Sin paginar se lee de la caché; paginada, por columnas.
+    * Parámetros:
+        - limit: Si se indica, pagina por cursor y devuelve el siguiente en `X-Next-Cursor`.
+        - cursor: Cursor de la página anterior.
+        - fields: Columnas a devolver (por ejemplo `id,name,price`).
+    * Retorna:
+        - Una lista de planes, o 304 si no cambió desde el ETag del cliente.
+    '''
+    if (not_modified := await conditional_get(request, response, session, "plan")) is not None:
+        return not_modified
+    selection = FieldSelection(Plan, fields, plan_paginator.key_columns)
+    if limit is None and cursor is None:
+        async def load_plans() -> list[dict] | None:
+            plans = (await session.exec(select(Plan))).all()
+            return [plan.model_dump(mode="json") for plan in plans] or None
+
+        # La clave lleva la versión de la tabla: el cuerpo siempre corresponde al ETag emitido
+        plans = await cache.get_or_load(plans_key(response.headers["ETag"]), load_plans, PLANS_TTL)
+        if not plans:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No se encontraron planes")
+        return json_response([selection.filter(plan) for plan in plans], response)
+
+    rows, next_cursor = await plan_paginator.fetch(session, select(*selection.columns), cursor, limit or DEFAULT_PAGE_SIZE)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    if len(rows) == 0:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No se encontraron planes")
-    return plans_db
\ No newline at end of file
+    return rows_response(rows, response, selection.keys)
\ No newline at end of file
@@ -1,64 +1,396 @@
+import asyncio
 import math
-from fastapi import APIRouter, HTTPException, Query, status
+import os
+import shutil
+from datetime import datetime
+from typing import Annotated, AsyncIterator, Literal
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import column, func, insert, literal_column, table
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import select
 
-from db import SessionDep
-from models import Customer, Transaction, TransactionCreate
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from balances import balance_increments, increment_balances_statement
+from db import AsyncSessionDep
+from rollups import increment_rollups_statement, rollup_increments
+from models import (
+    TRANSACTION_FTS_TABLE, BulkRowError, Customer, Job, Transaction, TransactionBatchResult, TransactionCreate,
+    TransactionExportJobCreate, to_naive_utc,
+)
+from app.exports import EXPORT_CHUNK_SIZE, EXPORT_COLUMNS, EXPORT_DIR, EXPORT_MEDIA_TYPES, export_header, export_partition, format_rows
+from app.jobs import JobContext, job_runner
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, KeysetPaginator, NEXT_CURSOR_HEADER, Page, count_cache
+from app.projection import FIELDS_DESCRIPTION, FieldSelection
+from app.responses import json_response, rows_response
 
 router = APIRouter()
 
+# Paginadores por criterio de orden; el id desempata cuando varias transacciones comparten fecha
+transaction_paginators = {
+    "id": KeysetPaginator(Transaction.id),
+    "date": KeysetPaginator(Transaction.date, Transaction.id),
+}
+
+# Ingesta por lotes: máximo de transacciones por solicitud
+TRANSACTION_BATCH_MAX = 5000
+
+# Búsqueda: tamaño de página por defecto y máximo
+SEARCH_PAGE_SIZE = 50
+SEARCH_PAGE_MAX = 1000
+# El tokenizador trigram solo indexa subcadenas de 3 caracteres o más; las más cortas usan LIKE
+FTS_MIN_LENGTH = 3
+transaction_fts = table(TRANSACTION_FTS_TABLE, column("rowid"))
+
+
+def is_idempotency_conflict(error: IntegrityError) -> bool:
+    '''
+    Si el error es la violación del índice único de `idempotency_key` (y no otra restricción).
+    '''
+    return "idempotency_key" in str(error.orig)
+
 
 @router.post(
     "/transactions", status_code=status.HTTP_201_CREATED, tags=["transactions"]
 )
-async def create_transation(transaction_data: TransactionCreate, session: SessionDep):
+async def create_transation(transaction_data: TransactionCreate, session: AsyncSessionDep):
     transaction_data_dict = transaction_data.model_dump()
-    customer = session.get(Customer, transaction_data_dict.get("customer_id"))
-    if not customer:
+    # Solo se necesita saber si el cliente existe, no cargarlo completo
+    customer_query = select(Customer.id).where(Customer.id == transaction_data_dict.get("customer_id"))
+    if (await session.exec(customer_query)).first() is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Customer doesn't exist"
         )
 
     transaction_db = Transaction.model_validate(transaction_data_dict)
     session.add(transaction_db)
-    session.commit()
-    session.refresh(transaction_db)
+    # El agregado del cliente y los totales por periodo se actualizan en la misma transacción que el alta
+    await session.exec(increment_balances_statement(), params=balance_increments([transaction_db]))
+    await session.exec(increment_rollups_statement(), params=rollup_increments([transaction_db]))
+    try:
+        await session.commit()
+    except IntegrityError as error:
+        await session.rollback()
+        if not is_idempotency_conflict(error):
+            raise
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Ya existe una transacción con esta idempotency_key")
+    count_cache.invalidate(Transaction)
 
     return transaction_db
 
+
+async def insert_transaction_batch(
+    transactions: list[TransactionCreate], session: AsyncSession
+) -> TransactionBatchResult:
+    '''
+    Valida e inserta un lote de transacciones en una sola transacción de base de datos.
+    Los clientes se validan con una única consulta IN y las claves de idempotencia se
+    deduplican en memoria y contra la base de datos con otra.
+    * Parámetros:
+        - transactions: Las transacciones del lote.
+        - session: La sesión de base de datos.
+    * Retorna:
+        - El resultado del lote.
+    '''
+    result = TransactionBatchResult()
+    customer_ids = {transaction.customer_id for transaction in transactions}
+    existing_customers = set((await session.exec(select(Customer.id).where(Customer.id.in_(customer_ids)))).all())
+    keys = {transaction.idempotency_key for transaction in transactions if transaction.idempotency_key is not None}
+    seen_keys: set[str] = set()
+    if keys:
+        seen_keys = set((await session.exec(select(Transaction.idempotency_key).where(Transaction.idempotency_key.in_(keys)))).all())
+
+    new_transactions: list[TransactionCreate] = []
+    for index, transaction in enumerate(transactions):
+        if transaction.customer_id not in existing_customers:
+            result.errors.append(BulkRowError(index=index, detail=f"Cliente con ID {transaction.customer_id} no encontrado"))
+            continue
+        if transaction.idempotency_key is not None:
+            if transaction.idempotency_key in seen_keys:
+                result.duplicates += 1
+                continue
+            seen_keys.add(transaction.idempotency_key)
+        new_transactions.append(transaction)
+
+    if new_transactions:
+        # INSERT de Core sobre la tabla: el bulk insert del ORM separaría en otro INSERT las filas sin clave
+        rows = [transaction.model_dump() for transaction in new_transactions]
+        await session.exec(insert(Transaction.__table__), params=rows) # executemany en una transacción
+        await session.exec(increment_balances_statement(), params=balance_increments(new_transactions))
+        await session.exec(increment_rollups_statement(), params=rollup_increments(new_transactions))
+        await session.commit()
+    result.created = len(new_transactions)
+    return result
+
+
+@router.post("/transactions/batch", response_model=TransactionBatchResult, status_code=status.HTTP_201_CREATED, tags=["transactions"])
+async def create_transactions_batch(
+    transactions: Annotated[list[TransactionCreate], Body(min_length=1, max_length=TRANSACTION_BATCH_MAX)],
+    session: AsyncSessionDep,
+) -> TransactionBatchResult:
+    '''
+    Crea hasta `TRANSACTION_BATCH_MAX` transacciones en una sola transacción de base de datos.
+    Reenviar un lote es seguro: las transacciones cuya `idempotency_key` ya existe se omiten.
+    * Parámetros:
+        - transactions: Arreglo JSON de transacciones, con `idempotency_key` opcional por transacción.
+    * Retorna:
+        - Creadas, duplicadas omitidas y filas con error (clientes inexistentes).
+    '''
+    try:
+        result = await insert_transaction_batch(transactions, session)
+    except IntegrityError as error:
+        await session.rollback()
+        if not is_idempotency_conflict(error):
+            raise
+        # Otra solicitud registró alguna de las claves entre la consulta y el INSERT: se reintenta una vez
+        try:
+            result = await insert_transaction_batch(transactions, session)
+        except IntegrityError as error:
+            await session.rollback()
+            if not is_idempotency_conflict(error):
+                raise
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Conflicto con otra ingesta de las mismas idempotency_key")
+    if result.created:
+        count_cache.invalidate(Transaction)
+    return result
+
 @router.get("/transactions", tags=["transactions"])
 async def list_transaction(
-    session: SessionDep,
+    response: Response,
+    session: AsyncSessionDep,
     skip: int = Query(0, description="Registros a omitir"),
-    limit: int = Query(10, description="Número de registros"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Número de registros"),
+    cursor: str | None = Query(None, description="Cursor de la página siguiente (encabezado X-Next-Cursor)"),
+    order_by: Literal["id", "date"] = Query("id", description="Orden de la paginación"),
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
 )-> list[Transaction]:
-    query = select(Transaction).offset(skip).limit(limit)
-    transactions = session.exec(query).all()
-    return transactions
+    '''
+    Retorna una página de transacciones usando paginación por cursor (keyset).
+    Las filas se leen por columnas y se serializan con `orjson`, sin objetos ORM ni validación.
+    * Parámetros:
+        - cursor: Cursor devuelto en el encabezado `X-Next-Cursor` de la página anterior.
+        - order_by: Orden por `id` o por `(date, id)`.
+        - fields: Columnas a devolver (por ejemplo `id,ammount,date`); solo esas se leen en el SELECT.
+    * Retorna:
+        - Una lista de transacciones. Si hay más páginas, el cursor siguiente va en `X-Next-Cursor`.
+    '''
+    paginator = transaction_paginators[order_by]
+    selection = FieldSelection(Transaction, fields, paginator.key_columns)
+    query = select(*selection.columns).offset(skip)
+    rows, next_cursor = await paginator.fetch(session, query, cursor, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return rows_response(rows, response, selection.keys)
+
+def description_condition(text: str):
+    '''
+    Condición de búsqueda de una subcadena en la descripción.
+    Con 3 caracteres o más se resuelve con el índice FTS5 (frase entre comillas, sin operadores);
+    con menos no hay trigramas que buscar y se usa LIKE.
+    Parámetros:
+    - text: La subcadena a buscar (sin distinguir mayúsculas).
+    Retorna:
+    - La condición para el WHERE de la consulta de transacciones.
+    '''
+    if len(text) < FTS_MIN_LENGTH:
+        return Transaction.description.contains(text, autoescape=True)
+    phrase = '"' + text.replace('"', '""') + '"'
+    matches = select(transaction_fts.c.rowid).where(literal_column(TRANSACTION_FTS_TABLE).op("MATCH")(phrase))
+    return Transaction.id.in_(matches)
+
+
+def transaction_filters(
+    customer_id: int | None = Query(None, description="Filtrar por cliente"),
+    ammount_min: int | None = Query(None, description="Monto mínimo (inclusive)"),
+    ammount_max: int | None = Query(None, description="Monto máximo (inclusive)"),
+    date_from: datetime | None = Query(None, description="Fecha inicial (inclusive)"),
+    date_to: datetime | None = Query(None, description="Fecha final (exclusiva)"),
+    q: str | None = Query(None, min_length=1, max_length=200, description="Texto contenido en la descripción"),
+) -> list:
+    '''
+    Filtros de transacciones compartidos por la búsqueda y la exportación.
+    Cada combinación usa un índice de `transaction`: (customer_id, date), (customer_id, ammount),
+    (date) o (ammount); la descripción, la tabla FTS5 `transaction_fts`.
+    Retorna:
+    - Las condiciones del WHERE.
+    '''
+    conditions = []
+    if customer_id is not None:
+        conditions.append(Transaction.customer_id == customer_id)
+    if ammount_min is not None:
+        conditions.append(Transaction.ammount >= ammount_min)
+    if ammount_max is not None:
+        conditions.append(Transaction.ammount <= ammount_max)
+    # Las fechas se guardan en UTC sin zona: los límites con zona se convierten igual
+    if date_from is not None:
+        conditions.append(Transaction.date >= to_naive_utc(date_from))
+    if date_to is not None:
+        conditions.append(Transaction.date < to_naive_utc(date_to))
+    if q is not None:
+        conditions.append(description_condition(q))
+    return conditions
 
-@router.get("/transactions/number", tags=["transactions"])
+TransactionFiltersDep = Annotated[list, Depends(transaction_filters)] # Condiciones de búsqueda de transacciones
+
+
+@router.get("/transactions/search", tags=["transactions"])
+async def search_transactions(
+    response: Response,
+    session: AsyncSessionDep,
+    filters: TransactionFiltersDep,
+    limit: int = Query(SEARCH_PAGE_SIZE, ge=1, le=SEARCH_PAGE_MAX, description="Número de registros"),
+    cursor: str | None = Query(None, description="Cursor de la página siguiente (encabezado X-Next-Cursor)"),
+    order_by: Literal["id", "date"] = Query("id", description="Orden de la paginación"),
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+) -> list[Transaction]:
+    '''
+    Busca transacciones por cliente, rango de montos, rango de fechas y texto de la descripción.
+    Las páginas se recorren por cursor (keyset), así cada página cuesta lo mismo sin importar cuántas
+    filas coincidan; para descargar todas las coincidencias en un flujo, usar `/transactions/export`.
+    * Parámetros:
+        - customer_id: Filtrar por cliente.
+        - ammount_min / ammount_max: Rango de montos `[ammount_min, ammount_max]`.
+        - date_from / date_to: Rango de fechas `[date_from, date_to)`.
+        - q: Texto contenido en la descripción, sin distinguir mayúsculas.
+        - cursor: Cursor devuelto en el encabezado `X-Next-Cursor` de la página anterior.
+        - order_by: Orden por `id` o por `(date, id)`.
+        - fields: Columnas a devolver.
+    * Retorna:
+        - Una lista de transacciones. Si hay más páginas, el cursor siguiente va en `X-Next-Cursor`.
+    '''
+    paginator = transaction_paginators[order_by]
+    selection = FieldSelection(Transaction, fields, paginator.key_columns)
+    rows, next_cursor = await paginator.fetch(session, select(*selection.columns).where(*filters), cursor, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return rows_response(rows, response, selection.keys)
+
+@router.get("/transactions/number", response_model=Page[Transaction], tags=["transactions"])
 async def list_number_transactions(
-    session: SessionDep,
-    registros_por_pagina: int = Query(10, description="Número de registros por pagina"),
-    numero_pagina: int = Query(1, description="Número de página"),
-)-> list[Transaction]:
+    session: AsyncSessionDep,
+    registros_por_pagina: int = Query(10, ge=1, description="Número de registros por pagina"),
+    numero_pagina: int = Query(1, ge=1, description="Número de página"),
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+)-> Page[Transaction]:
     '''
-    Retorna una lista de todos los clientes en la base de datos.
+    Retorna una página de transacciones por número de página.
     * Parámetros:
         - session: La sesión de base de datos.
+        - registros_por_pagina: Número de registros por página.
+        - numero_pagina: Número de la página solicitada.
+        - fields: Columnas a devolver en `items`.
     * Retorna:
-        - Una lista de clientes
+        - Un objeto con `items`, `total`, `pages` y `page`.
     '''
-    transaction_db: int = session.exec(select(Transaction.id)).all()
-    number_transaction : int = len(transaction_db)
+    number_transaction: int = await count_cache.count(session, Transaction)
     number_pages = math.ceil(number_transaction / registros_por_pagina)
-    
+
     skip = ((numero_pagina - 1) * registros_por_pagina)
-    query = select(Transaction).offset(skip).limit(registros_por_pagina)
-    
-    transactions = session.exec(query).all()
-    count_pages: str = f"Cantidad de páginas: {number_pages}"
-    return transactions, count_pages
-    
-
-    
\ No newline at end of file
+    selection = FieldSelection(Transaction, fields)
+    query = select(*selection.columns).order_by(Transaction.id).offset(skip).limit(registros_por_pagina)
+
+    rows = (await session.exec(query)).all()
+    return json_response({
+        "items": [row._asdict() for row in rows],
+        "total": number_transaction,
+        "pages": number_pages,
+        "page": numero_pagina,
+    })
+
+
+async def stream_transactions(session: AsyncSession, query, export_format: str) -> AsyncIterator[str]:
+    '''
+    Genera la exportación por fragmentos leyendo las filas con un cursor del servidor.
+    Solo hay `EXPORT_CHUNK_SIZE` filas en memoria a la vez, sin importar el tamaño de la tabla.
+    Parámetros:
+    - session: La sesión asíncrona de base de datos.
+    - query: La consulta de columnas a exportar.
+    - export_format: `ndjson` o `csv`.
+    Retorna:
+    - Un iterador asíncrono de fragmentos de texto.
+    '''
+    if header := export_header(export_format):
+        yield header
+    result = await session.stream(query.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+    async for partition in result.partitions():
+        yield format_rows(partition, export_format)
+
+
+@router.get("/transactions/export", tags=["transactions"])
+async def export_transactions(
+    session: AsyncSessionDep,
+    filters: TransactionFiltersDep,
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format", description="Formato de exportación"),
+) -> StreamingResponse:
+    '''
+    Exporta las transacciones en NDJSON o CSV como un flujo, sin cargar la tabla en memoria.
+    * Parámetros:
+        - format: `ndjson` (por defecto) o `csv`.
+        - customer_id, ammount_min / ammount_max, date_from / date_to, q: Los mismos filtros de `/transactions/search`.
+    * Retorna:
+        - Una respuesta en streaming con una fila por línea.
+    '''
+    query = select(*EXPORT_COLUMNS).where(*filters).order_by(Transaction.id)
+
+    return StreamingResponse(
+        stream_transactions(session, query, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f"attachment; filename=transactions.{export_format}"},
+    )
+
+
+@router.post(
+    "/transactions/export/jobs", response_model=Job, status_code=status.HTTP_202_ACCEPTED, tags=["transactions"]
+)
+async def submit_export_job(export: TransactionExportJobCreate, response: Response) -> Job:
+    '''
+    Encola la exportación completa de transacciones a un archivo, en segundo plano.
+    * Parámetros:
+        - export: Formato y los mismos filtros de `/transactions/search`.
+    * Retorna:
+        - El trabajo creado; su estado se consulta en `GET /jobs/{id}` (encabezado `Location`)
+          y el archivo se descarga en `GET /jobs/{id}/file`.
+    '''
+    job = await job_runner.submit("transaction_export", export.model_dump(mode="json"))
+    response.headers["Location"] = f"/jobs/{job.id}"
+    return job
+
+
+@job_runner.register("transaction_export")
+async def run_export_job(params: dict, job: JobContext) -> dict:
+    '''
+    Exporta las transacciones a `EXPORT_DIR` repartiendo rangos de IDs entre los procesos del pool.
+    Cada proceso escribe su parte y al final se concatenan en orden.
+    '''
+    export = TransactionExportJobCreate.model_validate(params)
+    filters = export.model_dump(exclude={"format"})
+    async with job.session() as session:
+        first_id, last_id = (await session.exec(select(func.min(Transaction.id), func.max(Transaction.id)))).one()
+
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    file_name = f"job-{job.job_id}.{export.format}"
+    path = os.path.join(EXPORT_DIR, file_name)
+    ranges = []
+    if first_id is not None:
+        size = (last_id - first_id) // job.runner.processes + 1
+        ranges = [(start, min(start + size - 1, last_id)) for start in range(first_id, last_id + 1, size)]
+    part_paths = [f"{path}.part{number}" for number in range(len(ranges))]
+    await job.report(0, len(ranges))
+    counts = await asyncio.gather(*(
+        job.run_in_process(export_partition, job.runner.database_url, filters, export.format, start, end, part_path)
+        for (start, end), part_path in zip(ranges, part_paths)
+    ))
+
+    def concatenate() -> None:
+        with open(path, "w", encoding="utf-8", newline="") as output:
+            output.write(export_header(export.format))
+            for part_path in part_paths:
+                with open(part_path, encoding="utf-8", newline="") as part:
+                    shutil.copyfileobj(part, output)
+                os.remove(part_path)
+
+    await asyncio.to_thread(concatenate)
+    await job.report(len(ranges), len(ranges))
+    return {"file": file_name, "format": export.format, "rows": sum(counts)}
@@ -0,0 +1,42 @@
+'''
+Fábricas de datos compartidas por los tests de la API (usan el fixture `client` de la raíz).
+'''
+import pytest
+from fastapi import status
+
+# Valores de las transacciones de prueba para los campos que no se indican
+TRANSACTION_DEFAULTS = {"ammount": 100, "description": "Compra", "date": "2024-01-15T10:00:00"}
+
+
+@pytest.fixture
+def create_customer(client):
+    '''
+    Fábrica de clientes: `create_customer(number)` crea "Cliente {number}" con el email
+    `cliente{number}@prueba.com` (o el `email` indicado) y retorna su ID.
+    '''
+    def create(number: int = 0, email: str | None = None) -> int:
+        response = client.post("/customers/", json={
+            "name": f"Cliente {number}", "email": email or f"cliente{number}@prueba.com", "age": 30,
+        })
+        assert response.status_code == status.HTTP_201_CREATED
+        return response.json()["id"]
+    return create
+
+
+@pytest.fixture
+def create_transactions(client):
+    '''
+    Fábrica de transacciones: `create_transactions(customer_id, [{"ammount": 250}, ...])` crea una
+    transacción del cliente por cada diccionario, con `TRANSACTION_DEFAULTS` en los campos que
+    falten, y retorna las transacciones creadas.
+    '''
+    def create(customer_id: int, transactions: list[dict]) -> list[dict]:
+        created = []
+        for transaction in transactions:
+            response = client.post("/transactions/transactions", json={
+                **TRANSACTION_DEFAULTS, **transaction, "customer_id": customer_id,
+            })
+            assert response.status_code == status.HTTP_201_CREATED
+            created.append(response.json())
+        return created
+    return create
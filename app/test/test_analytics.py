@@ -0,0 +1,123 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from fastapi import status
+from sqlmodel import select
+
+from models import CustomerPlan, StatusEnum, Transaction, TransactionRollup
+from rollups import BUCKETS, period_starts, rebuild_transaction_rollups
+
+
+def create_history(client) -> tuple[list[int], list[int]]:
+    '''
+    Crea tres clientes suscritos a dos planes (uno a ambos y otro con una suscripción inactiva)
+    con transacciones repartidas en varios días, semanas y meses, una a una y por lotes.
+    '''
+    customer_ids = [
+        client.post("/customers/", json={"name": f"Cliente {x}", "email": f"cliente{x}@prueba.com", "age": 30}).json()["id"]
+        for x in range(3)
+    ]
+    plan_ids = [
+        client.post("/plans/", json={"name": f"Plan {x}", "price": 10, "description": "Plan"}).json()["id"]
+        for x in range(2)
+    ]
+    for customer_id, plan_id in ((customer_ids[0], plan_ids[0]), (customer_ids[1], plan_ids[0]), (customer_ids[1], plan_ids[1])):
+        client.post(f"/customers/{customer_id}/plans/{plan_id}/", params={"plan_status": "activo"})
+    client.post(f"/customers/{customer_ids[2]}/plans/{plan_ids[1]}/", params={"plan_status": "inactivo"})
+
+    start = datetime(2024, 1, 27, 9, 30)
+    batch = []
+    for x in range(30):
+        transaction = {
+            "customer_id": customer_ids[x % 3],
+            "ammount": 10 * (x + 1),
+            "description": f"Compra {x}",
+            "date": (start + timedelta(days=x // 2, hours=x)).isoformat(),
+        }
+        if x % 2:
+            batch.append(transaction)
+        else:
+            client.post("/transactions/transactions", json=transaction)
+    client.post("/transactions/transactions/batch", json=batch)
+    return customer_ids, plan_ids
+
+
+def raw_totals(session, bucket: str, group_by: str) -> list[dict]:
+    '''
+    Recalcula los totales directamente desde `transaction`, sin el rollup.
+    '''
+    subscriptions = defaultdict(list)
+    for subscription in session.exec(select(CustomerPlan).where(CustomerPlan.status == StatusEnum.ACTIVE)).all():
+        subscriptions[subscription.customer_id].append(subscription.plan_id)
+    totals = defaultdict(lambda: [0, 0])
+    for transaction in session.exec(select(Transaction)).all():
+        period_start = period_starts(transaction.date)[bucket]
+        keys = [transaction.customer_id] if group_by == "customer" else subscriptions[transaction.customer_id]
+        for key in keys:
+            totals[(period_start, key)][0] += transaction.ammount
+            totals[(period_start, key)][1] += 1
+    return [
+        {"period_start": period_start.isoformat(), f"{group_by}_id": key, "total": total, "transaction_count": count}
+        for (period_start, key), (total, count) in sorted(totals.items())
+    ]
+
+
+def test_analytics_match_raw_recomputation(client, session):
+    '''
+    Test para verificar que los totales del rollup coinciden con recalcularlos desde las transacciones.
+    '''
+    create_history(client)
+    for bucket in BUCKETS:
+        for group_by in ("customer", "plan"):
+            response = client.get("/analytics/transactions", params={"bucket": bucket, "group_by": group_by})
+            assert response.status_code == status.HTTP_200_OK
+            assert response.json() == raw_totals(session, bucket, group_by), (bucket, group_by)
+
+
+def test_analytics_backfill_matches_incremental(client, session):
+    '''
+    Test para verificar que el backfill reconstruye exactamente los totales mantenidos en cada alta.
+    '''
+    create_history(client)
+    rollup_query = select(TransactionRollup).order_by(
+        TransactionRollup.bucket, TransactionRollup.period_start, TransactionRollup.customer_id
+    )
+    incremental = [row.model_dump() for row in session.exec(rollup_query).all()]
+    assert incremental
+
+    rebuild_transaction_rollups(session.connection())
+    session.commit()
+    session.expire_all()
+    assert [row.model_dump() for row in session.exec(rollup_query).all()] == incremental
+
+
+def test_analytics_filters_and_cursor(client, session):
+    '''
+    Test para filtrar por cliente, plan y rango de periodos, y recorrer los totales por cursor.
+    '''
+    customer_ids, plan_ids = create_history(client)
+    response = client.get("/analytics/transactions", params={
+        "bucket": "month", "customer_id": customer_ids[0], "date_from": "2024-02-01",
+    })
+    assert [row["period_start"] for row in response.json()] == ["2024-02-01"]
+    assert response.json() == [row for row in raw_totals(session, "month", "customer")
+                               if row["customer_id"] == customer_ids[0] and row["period_start"] >= "2024-02-01"]
+
+    response = client.get("/analytics/transactions", params={"bucket": "week", "plan_id": plan_ids[1]})
+    assert {row["customer_id"] for row in response.json()} == {customer_ids[1]}
+    response = client.get("/analytics/transactions", params={"bucket": "week", "group_by": "plan", "plan_id": plan_ids[1]})
+    assert {row["plan_id"] for row in response.json()} == {plan_ids[1]}
+    # La suscripción inactiva de customer_ids[2] al plan 1 no suma a sus totales
+    customer_total = client.get("/analytics/transactions", params={"bucket": "month", "customer_id": customer_ids[1]}).json()
+    plan_total = client.get("/analytics/transactions", params={"bucket": "month", "group_by": "plan", "plan_id": plan_ids[1]}).json()
+    assert sum(row["total"] for row in plan_total) == sum(row["total"] for row in customer_total)
+
+    rows = []
+    params = {"bucket": "day", "limit": 4}
+    while True:
+        response = client.get("/analytics/transactions", params=params)
+        rows += response.json()
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["X-Next-Cursor"]
+    assert rows == raw_totals(session, "day", "customer")
@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+from fastapi import status
+from sqlmodel import Session
+
+from app.auth import credential_cache, hash_password, verify_password
+from models import User
+
+
+@pytest.fixture
+def user(client, session: Session) -> User:
+    '''
+    Usuario de pruebas con la caché de credenciales vacía.
+    '''
+    asyncio.run(credential_cache.clear())
+    user = User(username="luis", password_hash=hash_password("secreto"))
+    session.add(user)
+    session.commit()
+    session.refresh(user)
+    return user
+
+
+def test_hash_and_verify_password():
+    '''
+    Test para verificar contraseñas con hashes de sal aleatoria y rechazar hashes mal formados.
+    '''
+    password_hash = hash_password("secreto")
+    assert password_hash.startswith("scrypt$") and "secreto" not in password_hash
+    assert password_hash != hash_password("secreto")
+    assert verify_password("secreto", password_hash)
+    assert not verify_password("otro", password_hash)
+    assert not verify_password("secreto", "no-es-un-hash")
+
+
+def test_root_requires_valid_credentials(client, user):
+    '''
+    Test para rechazar con 401 las solicitudes sin credenciales, con un usuario desconocido o con otra contraseña.
+    '''
+    assert client.get("/").status_code == status.HTTP_401_UNAUTHORIZED
+    for credentials in [("luis", "otra"), ("nadie", "secreto")]:
+        response = client.get("/", auth=credentials)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response.headers["WWW-Authenticate"] == "Basic"
+
+    response = client.get("/", auth=("luis", "secreto"))
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"message": "Hola luis!"}
+
+
+def test_verified_credentials_cached(client, user, session: Session, max_queries):
+    '''
+    Test para responder desde la caché sin consultar la base de datos y no cachear credenciales inválidas.
+    '''
+    with max_queries(1):
+        assert client.get("/", auth=("luis", "secreto")).status_code == status.HTTP_200_OK
+    with max_queries(0):
+        assert client.get("/", auth=("luis", "secreto")).status_code == status.HTTP_200_OK
+
+    user.is_active = False
+    session.add(user)
+    session.commit()
+    # Las credenciales ya verificadas siguen en caché hasta su TTL
+    assert client.get("/", auth=("luis", "secreto")).status_code == status.HTTP_200_OK
+    asyncio.run(credential_cache.clear())
+    assert client.get("/", auth=("luis", "secreto")).status_code == status.HTTP_401_UNAUTHORIZED
+    assert client.get("/", auth=("luis", "otra")).status_code == status.HTTP_401_UNAUTHORIZED
@@ -0,0 +1,52 @@
+import json
+
+from fastapi import status
+
+
+def test_bulk_create_customers_json(client):
+    '''
+    Test para la importación masiva con un arreglo JSON y errores por fila.
+    '''
+    client.post("/customers/", json={"name": "Existente", "email": "existente@prueba.com", "age": 40})
+    customers_data = [
+        {"name": "Cliente 0", "email": "cliente0@prueba.com", "age": 30},
+        {"name": "Cliente 1", "email": "cliente0@prueba.com", "age": 31},   # duplicado en la entrada
+        {"name": "Cliente 2", "email": "no-es-un-email", "age": 32},        # email inválido
+        {"name": "Cliente 3", "email": "existente@prueba.com", "age": 33},  # ya existe en la base de datos
+        {"name": "Cliente 4", "email": "cliente4@prueba.com", "age": 34},
+    ]
+    response = client.post("/customers/bulk", json=customers_data)
+    assert response.status_code == status.HTTP_200_OK
+
+    result = response.json()
+    assert result["created"] == 2
+    assert [error["index"] for error in result["errors"]] == [1, 2, 3]
+
+    emails = {customer["email"] for customer in client.get("/customers/").json()}
+    assert emails == {"existente@prueba.com", "cliente0@prueba.com", "cliente4@prueba.com"}
+
+
+def test_bulk_create_customers_ndjson(client):
+    '''
+    Test para la importación masiva con un flujo NDJSON.
+    '''
+    lines = [json.dumps({"name": f"Cliente {x}", "email": f"cliente{x}@prueba.com", "age": 30}) for x in range(3)]
+    lines.insert(1, "{no es json")
+    response = client.post(
+        "/customers/bulk",
+        content="\n".join(lines) + "\n",
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    result = response.json()
+    assert result["created"] == 3
+    assert [error["index"] for error in result["errors"]] == [1]
+
+
+def test_bulk_create_customers_invalid_body(client):
+    '''
+    Test para verificar que un cuerpo que no es un arreglo retorna 400.
+    '''
+    response = client.post("/customers/bulk", json={"name": "John Doe"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
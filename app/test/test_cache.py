@@ -0,0 +1,108 @@
+import fnmatch
+
+import pytest
+from fastapi import status
+
+from app.cache import MemoryCache, ReadThroughCache, RedisCache
+
+
+class FakeRedis:
+    '''
+    Cliente Redis falso en memoria con la parte de la API que usa `RedisCache`.
+    '''
+
+    def __init__(self):
+        self.data: dict[str, str] = {}
+        self.expirations: dict[str, int] = {}
+
+    async def get(self, key: str):
+        return self.data.get(key)
+
+    async def set(self, key: str, value: str, ex: int | None = None):
+        self.data[key] = value
+        self.expirations[key] = ex
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self.data.pop(key, None)
+
+    async def scan_iter(self, match: str):
+        for key in list(self.data):
+            if fnmatch.fnmatch(key, match):
+                yield key
+
+
+def test_get_customer_cached_and_invalidated(client):
+    '''
+    Test para leer un cliente desde la caché e invalidarlo al actualizarlo y eliminarlo.
+    '''
+    response = client.post("/customers/", json={"name": "John Doe", "email": "prueba@prueba.com", "age": 30})
+    customer_id: int = response.json()["id"]
+
+    assert client.get(f"/read_customers/{customer_id}").status_code == status.HTTP_200_OK
+    assert client.get(f"/read_customers/{customer_id}").status_code == status.HTTP_200_OK
+    stats = client.get("/cache/stats").json()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+    client.patch(f"/update_customers/{customer_id}", json={"name": "John Updated"})
+    assert client.get(f"/read_customers/{customer_id}").json()["name"] == "John Updated"
+
+    client.delete(f"/delete_customers/{customer_id}")
+    assert client.get(f"/read_customers/{customer_id}").status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_list_plans_cached_and_invalidated(client):
+    '''
+    Test para verificar que crear un plan cambia la clave de la lista de planes en caché.
+    '''
+    client.post("/plans/", json={"name": "Básico", "price": 10, "description": "Plan básico"})
+    assert len(client.get("/plans/").json()) == 1
+    assert len(client.get("/plans/").json()) == 1
+    assert client.get("/cache/stats").json()["hits"] == 1
+
+    client.post("/plans/", json={"name": "Premium", "price": 30, "description": "Plan premium"})
+    assert [plan["name"] for plan in client.get("/plans/").json()] == ["Básico", "Premium"]
+
+
+@pytest.mark.anyio
+async def test_memory_cache_ttl_and_lru():
+    '''
+    Test para la expiración por TTL y el desalojo LRU del backend en memoria.
+    '''
+    backend = MemoryCache(maxsize=2)
+    await backend.set("a", 1, ttl=60)
+    await backend.set("b", 2, ttl=60)
+    await backend.get("a")
+    await backend.set("c", 3, ttl=60)  # desaloja "b", el menos usado
+    assert await backend.get("b") is None
+    assert await backend.get("a") == 1
+
+    await backend.set("d", 4, ttl=0)
+    assert await backend.get("d") is None
+
+
+@pytest.mark.anyio
+async def test_read_through_cache_with_redis_backend():
+    '''
+    Test para la caché de lectura con el backend Redis sobre un cliente falso.
+    '''
+    client = FakeRedis()
+    cache = ReadThroughCache(RedisCache(client))
+    loads = []
+
+    async def loader():
+        loads.append(1)
+        return {"id": 1, "name": "Básico"}
+
+    assert await cache.get_or_load("plan:1", loader, ttl=30) == {"id": 1, "name": "Básico"}
+    assert await cache.get_or_load("plan:1", loader, ttl=30) == {"id": 1, "name": "Básico"}
+    assert len(loads) == 1
+    assert client.expirations["fastapi:plan:1"] == 30
+
+    await cache.invalidate("plan:1")
+    await cache.get_or_load("plan:1", loader, ttl=30)
+    assert len(loads) == 2
+    assert cache.stats() == {"backend": "RedisCache", "hits": 1, "misses": 2}
+
+    await cache.clear()
+    assert client.data == {}
@@ -0,0 +1,49 @@
+import asyncio
+import sqlite3
+import time
+
+import httpx
+import pytest
+from fastapi import status
+
+from app.main import app
+from conftest import sqlite_name
+
+
+@pytest.mark.anyio
+async def test_concurrent_requests_do_not_block_event_loop(client):
+    '''
+    Test para verificar que las consultas asíncronas no bloquean el event loop.
+    Una conexión externa bloquea la base de datos; mientras las lecturas esperan
+    el lock, otras peticiones deben seguir respondiendo y las lecturas no se serializan.
+    '''
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+        response = await async_client.post("/customers/", json={"name": "John Doe", "email": "prueba@prueba.com", "age": 30})
+        assert response.status_code == status.HTTP_201_CREATED
+
+        # Bloqueo exclusivo: los lectores esperan dentro del driver (en su propio hilo)
+        locker = sqlite3.connect(sqlite_name)
+        locker.execute("BEGIN EXCLUSIVE")
+        lock_seconds = 0.5
+        asyncio.get_running_loop().call_later(lock_seconds, locker.rollback)
+
+        try:
+            start = time.monotonic()
+            readers = [asyncio.create_task(async_client.get("/customers/")) for _ in range(5)]
+            await asyncio.sleep(0.05)
+
+            # Una petición sin base de datos responde mientras los lectores siguen bloqueados
+            response_format = await async_client.get("/format/24h")
+            assert response_format.status_code == status.HTTP_200_OK
+            assert time.monotonic() - start < lock_seconds
+            assert not any(reader.done() for reader in readers)
+
+            responses = await asyncio.gather(*readers)
+            elapsed = time.monotonic() - start
+        finally:
+            locker.close()
+
+    assert all(r.status_code == status.HTTP_200_OK for r in responses)
+    # Las lecturas se solapan: el total es cercano a un solo bloqueo, no a 5 en serie
+    assert elapsed < lock_seconds * 2
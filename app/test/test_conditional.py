@@ -0,0 +1,93 @@
+from fastapi import status
+from sqlmodel import Session
+
+from models import Plan
+
+
+def test_list_plans_not_modified(client):
+    '''
+    Test para responder 304 mientras la tabla de planes no cambie.
+    '''
+    client.post("/plans/", json={"name": "Básico", "price": 10, "description": "Plan básico"})
+    response = client.get("/plans/")
+    assert response.status_code == status.HTTP_200_OK
+    etag = response.headers["ETag"]
+    assert "Last-Modified" in response.headers
+
+    response_cached = client.get("/plans/", headers={"If-None-Match": etag})
+    assert response_cached.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response_cached.content == b""
+
+    client.post("/plans/", json={"name": "Premium", "price": 30, "description": "Plan premium"})
+    response_changed = client.get("/plans/", headers={"If-None-Match": etag})
+    assert response_changed.status_code == status.HTTP_200_OK
+    assert response_changed.headers["ETag"] != etag
+
+
+def test_list_plans_external_write_not_stale(client, session: Session):
+    '''
+    Test para no servir la lista en caché con el ETag nuevo tras una escritura de otro proceso.
+    '''
+    client.post("/plans/", json={"name": "Básico", "price": 10, "description": "Plan básico"})
+    etag = client.get("/plans/").headers["ETag"]
+
+    # Escritura por otro engine, sin pasar por la API (otro worker, una carga externa)
+    session.add(Plan(name="Premium", price=30, description="Plan premium"))
+    session.commit()
+    response = client.get("/plans/", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["ETag"] != etag
+    assert [plan["name"] for plan in response.json()] == ["Básico", "Premium"]
+    assert client.get("/plans/", headers={"If-None-Match": response.headers["ETag"]}).status_code == status.HTTP_304_NOT_MODIFIED
+
+
+def test_list_customers_etag_changes_on_update_and_delete(client):
+    '''
+    Test para verificar que actualizar o eliminar un cliente cambia el ETag.
+    '''
+    response = client.post("/customers/", json={"name": "John Doe", "email": "john@prueba.com", "age": 30})
+    customer_id: int = response.json()["id"]
+    client.post("/customers/", json={"name": "Jane Doe", "email": "jane@prueba.com", "age": 28})
+
+    etag = client.get("/customers/").headers["ETag"]
+    assert client.get("/customers/", headers={"If-None-Match": etag}).status_code == status.HTTP_304_NOT_MODIFIED
+    # Cada combinación de parámetros tiene su propio ETag
+    assert client.get("/customers/", params={"limit": 1}).headers["ETag"] != etag
+
+    client.patch(f"/update_customers/{customer_id}", json={"name": "John Updated"})
+    response_updated = client.get("/customers/", headers={"If-None-Match": etag})
+    assert response_updated.status_code == status.HTTP_200_OK
+    assert response_updated.json()[0]["updated_at"] is not None
+
+    etag = response_updated.headers["ETag"]
+    client.delete(f"/delete_customers/{customer_id}")
+    assert client.get("/customers/", headers={"If-None-Match": etag}).status_code == status.HTTP_200_OK
+
+
+def test_list_customer_plans_if_modified_since(client):
+    '''
+    Test para responder 304 con If-Modified-Since en las suscripciones.
+    '''
+    customer_id = client.post("/customers/", json={"name": "John Doe", "email": "john@prueba.com", "age": 30}).json()["id"]
+    plan_id = client.post("/plans/", json={"name": "Básico", "price": 10, "description": "Plan básico"}).json()["id"]
+    client.post(f"/customers/{customer_id}/plans/{plan_id}/", params={"plan_status": "activo"})
+
+    response = client.get("/customers/plans/")
+    assert response.status_code == status.HTTP_200_OK
+    last_modified = response.headers["Last-Modified"]
+
+    response_cached = client.get("/customers/plans/", headers={"If-Modified-Since": last_modified})
+    assert response_cached.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+def test_if_modified_since_without_zone_or_invalid(client):
+    '''
+    Test para interpretar en UTC una fecha `-0000` e ignorar cabeceras If-Modified-Since inválidas.
+    '''
+    client.post("/plans/", json={"name": "Básico", "price": 10, "description": "Plan básico"})
+    last_modified = client.get("/plans/").headers["Last-Modified"]
+
+    zoneless = last_modified.replace("GMT", "-0000")
+    assert client.get("/plans/", headers={"If-Modified-Since": zoneless}).status_code == status.HTTP_304_NOT_MODIFIED
+    assert client.get("/plans/", headers={"If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 -0000"}).status_code == status.HTTP_200_OK
+    assert client.get("/plans/", headers={"If-Modified-Since": "no es una fecha"}).status_code == status.HTTP_200_OK
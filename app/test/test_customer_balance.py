@@ -0,0 +1,81 @@
+from datetime import datetime
+
+from fastapi import status
+from sqlalchemy import insert
+from sqlmodel import select
+
+from balances import rebuild_customer_balances
+from models import CustomerBalance, Transaction
+
+
+def test_customer_summary(client, create_customer, create_transactions):
+    '''
+    Test para mantener el resumen del cliente al crear transacciones.
+    '''
+    customer_id = create_customer()
+    response = client.get(f"/customers/{customer_id}/summary")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["balance"] == 0
+    assert response.json()["transaction_count"] == 0
+    assert response.json()["last_transaction_date"] is None
+
+    create_transactions(customer_id, [
+        {"ammount": 100, "date": "2024-03-01T10:00:00"},
+        {"ammount": 250, "date": "2024-05-01T10:00:00"},
+        {"ammount": 50, "date": "2024-01-01T10:00:00"},
+    ])
+    summary = client.get(f"/customers/{customer_id}/summary").json()
+    assert summary["balance"] == 400
+    assert summary["transaction_count"] == 3
+    assert summary["last_transaction_date"] == "2024-05-01T10:00:00"
+
+
+def test_transaction_dates_normalized_to_utc(client, create_customer, create_transactions):
+    '''
+    Test para convertir a UTC las fechas con zona horaria, también en un lote que mezcla fechas con y sin zona.
+    '''
+    customer_id = create_customer()
+    [transaction] = create_transactions(customer_id, [{"date": "2024-03-01T20:00:00-05:00"}])
+    assert transaction["date"] == "2024-03-02T01:00:00"
+
+    batch = [
+        {"customer_id": customer_id, "ammount": 10, "description": "Con zona", "date": "2024-05-01T10:00:00+02:00"},
+        {"customer_id": customer_id, "ammount": 20, "description": "Sin zona", "date": "2024-05-01T09:00:00"},
+        {"customer_id": customer_id, "ammount": 30, "description": "Zulu", "date": "2024-04-01T00:00:00Z"},
+    ]
+    response = client.post("/transactions/transactions/batch", json=batch)
+    assert response.status_code == status.HTTP_201_CREATED
+    summary = client.get(f"/customers/{customer_id}/summary").json()
+    assert summary["transaction_count"] == 4
+    assert summary["last_transaction_date"] == "2024-05-01T09:00:00"
+    dates = [row["date"] for row in client.get("/transactions/transactions", params={"fields": "id,date"}).json()]
+    assert dates == ["2024-03-02T01:00:00", "2024-05-01T08:00:00", "2024-05-01T09:00:00", "2024-04-01T00:00:00"]
+
+
+def test_customer_summary_not_found(client):
+    '''
+    Test para un cliente inexistente.
+    '''
+    response = client.get("/customers/999/summary")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_rebuild_customer_balances(client, session, create_customer, create_transactions):
+    '''
+    Test para reconstruir el agregado con transacciones cargadas por fuera de la API.
+    '''
+    customer_id = create_customer()
+    other_customer_id = create_customer(1)
+    create_transactions(customer_id, [{"date": "2024-01-01T10:00:00"}])
+    session.exec(insert(Transaction), params=[
+        {"customer_id": customer_id, "ammount": 20, "description": "Carga", "date": datetime(2024, 2, 1, 10)},
+        {"customer_id": other_customer_id, "ammount": 5, "description": "Carga", "date": datetime(2023, 2, 1, 10)},
+    ])
+    session.commit()
+
+    assert rebuild_customer_balances(session.connection()) == 2
+    session.commit()
+    balances = {row.customer_id: row for row in session.exec(select(CustomerBalance)).all()}
+    assert (balances[customer_id].balance, balances[customer_id].transaction_count) == (120, 2)
+    assert (balances[other_customer_id].balance, balances[other_customer_id].transaction_count) == (5, 1)
+    assert client.get(f"/customers/{customer_id}/summary").json()["balance"] == 120
@@ -0,0 +1,56 @@
+import pytest
+from fastapi import status
+
+
+@pytest.fixture
+def create_customers(client, create_customer, create_transactions):
+    '''
+    Fábrica de clientes suscritos a un plan y con dos transacciones cada uno.
+    '''
+    def create(number_customers: int) -> None:
+        plan = client.post("/plans/", json={"name": "Básico", "price": 10, "description": "Plan básico"}).json()
+        for x in range(number_customers):
+            customer_id = create_customer(x)
+            client.post(f"/customers/{customer_id}/plans/{plan['id']}/", params={"plan_status": "activo"})
+            create_transactions(customer_id, [{"ammount": 100}, {"ammount": 200}])
+    return create
+
+
+def test_list_customers_include_relations(client, max_queries, create_customers):
+    '''
+    Test para incluir planes y transacciones con un número constante de consultas.
+    '''
+    create_customers(5)
+    # Clientes + planes (con la tabla intermedia) + transacciones, sin importar cuántos clientes haya
+    with max_queries(3):
+        response = client.get("/customers/", params={"include": "plans,transactions"})
+    assert response.status_code == status.HTTP_200_OK
+    customers = response.json()
+    assert len(customers) == 5
+    for customer in customers:
+        assert [plan["name"] for plan in customer["plans"]] == ["Básico"]
+        assert sorted(transaction["ammount"] for transaction in customer["transactions"]) == [100, 200]
+        assert all(transaction["customer_id"] == customer["id"] for transaction in customer["transactions"])
+
+
+def test_list_customers_include_paginated(client, create_customers):
+    '''
+    Test para incluir relaciones en una página por cursor y omitir las que no se piden.
+    '''
+    create_customers(3)
+    response = client.get("/customers/", params={"include": "plans", "limit": 2})
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()) == 2
+    assert "X-Next-Cursor" in response.headers
+    assert all("transactions" not in customer and len(customer["plans"]) == 1 for customer in response.json())
+
+    response = client.get("/customers/")
+    assert all("plans" not in customer and "transactions" not in customer for customer in response.json())
+
+
+def test_list_customers_include_invalid(client):
+    '''
+    Test para rechazar relaciones desconocidas en include.
+    '''
+    response = client.get("/customers/", params={"include": "plans,invoices"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -73,3 +73,34 @@ def test_update_customer(client):
     # 3. (Opcional pero recomendado) Verificar que los otros datos no cambiaron.
     assert updated_response_data["description"] == customer_data["description"]
     assert updated_response_data["email"] == customer_data["email"]
+
+def test_create_customer_duplicate_email(client):
+    '''
+    Test para verificar que un email duplicado retorna 409 (índice único).
+    '''
+    customer_data = {
+        "name": "John Doe",
+        "description": "This is a test customer",
+        "email": "prueba@prueba.com",
+        "age": 30
+    }
+    response = client.post("/customers/", json=customer_data)
+    assert response.status_code == status.HTTP_201_CREATED
+
+    response_duplicate = client.post("/customers/", json={**customer_data, "name": "Jane Doe"})
+    assert response_duplicate.status_code == status.HTTP_409_CONFLICT
+
+def test_update_customer_duplicate_email(client):
+    '''
+    Test para verificar que actualizar con el email de otro cliente retorna 409.
+    '''
+    client.post("/customers/", json={"name": "John Doe", "email": "john@prueba.com", "age": 30})
+    response = client.post("/customers/", json={"name": "Jane Doe", "email": "jane@prueba.com", "age": 28})
+    customer_id: int = response.json()["id"]
+
+    response_update = client.patch(f"/update_customers/{customer_id}", json={"email": "john@prueba.com"})
+    assert response_update.status_code == status.HTTP_409_CONFLICT
+
+    # Actualizar otros campos de un cliente no choca con su propio email
+    response_update = client.patch(f"/update_customers/{customer_id}", json={"name": "Jane Updated"})
+    assert response_update.status_code == status.HTTP_200_OK
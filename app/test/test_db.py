@@ -0,0 +1,54 @@
+import pytest
+from sqlalchemy import text
+
+from db import DatabaseSettings, create_db_engines
+
+
+def test_database_settings_from_env(monkeypatch):
+    '''
+    Test para leer la configuración de la base de datos desde variables de entorno.
+    '''
+    monkeypatch.setenv("DATABASE_URL", "sqlite:///otra.sqlite3")
+    monkeypatch.delenv("ASYNC_DATABASE_URL", raising=False)
+    monkeypatch.setenv("DB_POOL_SIZE", "20")
+    monkeypatch.setenv("DB_POOL_PRE_PING", "true")
+
+    settings = DatabaseSettings.from_env()
+    assert settings.url == "sqlite:///otra.sqlite3"
+    # Sin ASYNC_DATABASE_URL, la asíncrona apunta a la misma base de datos
+    assert settings.async_url == "sqlite+aiosqlite:///otra.sqlite3"
+    assert settings.pool_size == 20
+    assert settings.pool_pre_ping is True
+    assert settings.max_overflow == DatabaseSettings().max_overflow
+
+    monkeypatch.setenv("DATABASE_URL", "postgresql://app:secreto@db/app")
+    assert DatabaseSettings.from_env().async_url == "postgresql+asyncpg://app:secreto@db/app"
+    monkeypatch.setenv("ASYNC_DATABASE_URL", "postgresql+psycopg://app:secreto@db/app")
+    assert DatabaseSettings.from_env().async_url == "postgresql+psycopg://app:secreto@db/app"
+
+
+@pytest.mark.anyio
+async def test_sqlite_pragmas_applied(tmp_path):
+    '''
+    Test para verificar los PRAGMA de SQLite en los engines síncrono y asíncrono.
+    '''
+    database = tmp_path / "pragmas.sqlite3"
+    settings = DatabaseSettings(
+        url=f"sqlite:///{database}",
+        async_url=f"sqlite+aiosqlite:///{database}",
+        pool_size=3,
+        sqlite_busy_timeout_ms=1234,
+    )
+    engine, async_engine = create_db_engines(settings)
+    assert engine.pool.size() == 3
+
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar_one() == "wal"
+        assert connection.execute(text("PRAGMA synchronous")).scalar_one() == 1  # NORMAL
+        assert connection.execute(text("PRAGMA busy_timeout")).scalar_one() == 1234
+    async with async_engine.connect() as connection:
+        assert (await connection.execute(text("PRAGMA busy_timeout"))).scalar_one() == 1234
+        assert (await connection.execute(text("PRAGMA mmap_size"))).scalar_one() == settings.sqlite_mmap_size
+
+    engine.dispose()
+    await async_engine.dispose()
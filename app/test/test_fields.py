@@ -0,0 +1,62 @@
+from fastapi import status
+
+
+def test_list_customers_fields(client, create_customer):
+    '''
+    Test para verificar que `fields=` devuelve solo las columnas pedidas, también con cursor.
+    '''
+    for x in range(3):
+        create_customer(x)
+    response = client.get("/customers/", params={"fields": "name,email", "limit": 2})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [
+        {"name": "Cliente 0", "email": "cliente0@prueba.com"},
+        {"name": "Cliente 1", "email": "cliente1@prueba.com"},
+    ]
+    # El cursor se calcula con el id aunque no se haya pedido
+    response = client.get("/customers/", params={"fields": "name", "limit": 2, "cursor": response.headers["X-Next-Cursor"]})
+    assert response.json() == [{"name": "Cliente 2"}]
+
+
+def test_customer_fields_with_include(client, create_customer):
+    '''
+    Test para combinar `fields=` con relaciones incluidas.
+    '''
+    customer_id = create_customer()
+    plan_id = client.post("/plans/", json={"name": "Básico", "price": 10, "description": "Plan básico"}).json()["id"]
+    client.post(f"/customers/{customer_id}/plans/{plan_id}/", params={"plan_status": "activo"})
+
+    response = client.get("/customers/", params={"fields": "id", "include": "plans"})
+    assert response.status_code == status.HTTP_200_OK
+    customers = response.json()
+    assert list(customers[0]) == ["id", "plans"]
+    assert customers[0]["id"] == customer_id
+    assert [plan["id"] for plan in customers[0]["plans"]] == [plan_id]
+
+    response = client.get(f"/read_customers/{customer_id}", params={"fields": "email"})
+    assert response.json() == {"email": "cliente0@prueba.com"}
+
+
+def test_transaction_and_plan_fields(client, create_customer, create_transactions):
+    '''
+    Test para proyectar columnas en transacciones (lista y página numerada) y planes.
+    '''
+    customer_id = create_customer()
+    create_transactions(customer_id, [{"date": "2024-01-15T10:30:00"}])
+    client.post("/plans/", json={"name": "Básico", "price": 10, "description": "Plan básico"})
+
+    assert client.get("/transactions/transactions", params={"fields": "ammount"}).json() == [{"ammount": 100}]
+    page = client.get("/transactions/transactions/number", params={"fields": "ammount,description"}).json()
+    assert page["items"] == [{"ammount": 100, "description": "Compra"}]
+    assert client.get("/plans/", params={"fields": "name"}).json() == [{"name": "Básico"}]
+    assert client.get("/plans/", params={"fields": "price", "limit": 10}).json() == [{"price": 10}]
+
+
+def test_unknown_fields(client):
+    '''
+    Test para rechazar campos que no existen o una lista vacía.
+    '''
+    for params in ({"fields": "name,password"}, {"fields": " , "}):
+        response = client.get("/customers/", params=params)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert client.get("/transactions/transactions", params={"fields": "total"}).status_code == status.HTTP_400_BAD_REQUEST
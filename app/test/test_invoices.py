@@ -0,0 +1,92 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import status
+
+from app.main import app
+
+
+PERIOD = {"period_start": "2024-01-01T00:00:00", "period_end": "2024-02-01T00:00:00"}
+
+
+def test_create_invoice(client, create_customer, create_transactions):
+    '''
+    Test para generar la factura de un cliente con los totales del periodo.
+    '''
+    customer_id = create_customer()
+    # La última transacción está fuera del periodo: no se factura
+    create_transactions(customer_id, [{"ammount": 100}, {"ammount": 250}, {"ammount": 999, "date": "2024-02-10T10:00:00"}])
+
+    response = client.post("/invoices/invoices/", json={"customer_id": customer_id, **PERIOD})
+    assert response.status_code == status.HTTP_201_CREATED
+    invoice = response.json()
+    assert invoice["total"] == 350
+    assert invoice["transaction_count"] == 2
+
+    response_read = client.get(f"/invoices/invoices/{invoice['id']}")
+    assert response_read.status_code == status.HTTP_200_OK
+    assert response_read.json()["total"] == 350
+
+    # La misma factura no se puede generar dos veces
+    response_duplicate = client.post("/invoices/invoices/", json={"customer_id": customer_id, **PERIOD})
+    assert response_duplicate.status_code == status.HTTP_409_CONFLICT
+
+
+def test_create_invoice_unknown_customer(client):
+    '''
+    Test para verificar que facturar a un cliente inexistente retorna 404.
+    '''
+    response = client.post("/invoices/invoices/", json={"customer_id": 999, **PERIOD})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_create_invoices_batch(client, create_customer, create_transactions):
+    '''
+    Test para facturar a todos los clientes del periodo en una sola pasada.
+    '''
+    first_id = create_customer(0)
+    create_transactions(first_id, [{"ammount": 100}, {"ammount": 200}])
+    create_transactions(create_customer(1), [{"ammount": 50}])
+    create_customer(2)
+
+    client.post("/invoices/invoices/", json={"customer_id": first_id, **PERIOD})
+
+    response = client.post("/invoices/invoices/batch", json=PERIOD)
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.json() == {"created": 1, "skipped": 1, "total": 50}
+
+
+@pytest.mark.anyio
+async def test_create_invoices_batch_concurrent(client, create_customer, create_transactions):
+    '''
+    Test para facturar el mismo periodo en dos lotes simultáneos sin fallar por el índice único.
+    '''
+    for number in range(3):
+        create_transactions(create_customer(number), [{"ammount": 100}])
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+        responses = await asyncio.gather(*(async_client.post("/invoices/invoices/batch", json=PERIOD) for _ in range(2)))
+
+    assert [response.status_code for response in responses] == [status.HTTP_201_CREATED] * 2
+    results = [response.json() for response in responses]
+    assert sum(result["created"] for result in results) == 3
+    assert sum(result["skipped"] for result in results) == 3
+    assert sum(result["total"] for result in results) == 300
+
+
+def test_create_invoice_with_timezone_period(client, create_customer, create_transactions):
+    '''
+    Test para convertir a UTC un periodo con zona horaria antes de facturar.
+    '''
+    customer_id = create_customer()
+    create_transactions(customer_id, [{"date": "2024-01-01T12:00:00"}])
+    period = {"period_start": "2024-01-01T15:00:00+05:00", "period_end": "2024-01-02T00:00:00+05:00"}
+    response = client.post("/invoices/invoices/", json={"customer_id": customer_id, **period})
+    assert response.status_code == status.HTTP_201_CREATED
+    invoice = response.json()
+    assert (invoice["period_start"], invoice["period_end"]) == ("2024-01-01T10:00:00", "2024-01-01T19:00:00")
+    assert invoice["total"] == 100
+
+    response = client.post("/invoices/invoices/batch", json=period)
+    assert response.json() == {"created": 0, "skipped": 1, "total": 0}
@@ -0,0 +1,234 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from fastapi import HTTPException, status
+from sqlmodel import select
+
+import app.routers.invoice
+import app.routers.jobs
+import app.routers.transactions
+from app.jobs import JobRunner, job_runner
+from app.main import app as fastapi_app
+from conftest import async_session_maker, sqlite_url
+from models import Job, JobStatusEnum, TransactionExportJobCreate, utcnow
+
+PERIOD = {"period_start": "2024-01-01T00:00:00", "period_end": "2024-02-01T00:00:00"}
+
+
+@pytest.fixture
+def runner(client, monkeypatch, tmp_path):
+    '''
+    El `job_runner` de la aplicación apuntando a la base de datos y a un directorio de pruebas.
+    '''
+    monkeypatch.setattr(job_runner, "session_maker", async_session_maker)
+    monkeypatch.setattr(job_runner, "database_url", sqlite_url)
+    monkeypatch.setattr(app.routers.transactions, "EXPORT_DIR", str(tmp_path))
+    monkeypatch.setattr(app.routers.jobs, "EXPORT_DIR", str(tmp_path))
+    return job_runner
+
+
+async def create_customers(async_client, count: int) -> list[int]:
+    '''
+    Crea clientes con una transacción en el periodo cada uno y retorna sus IDs.
+    '''
+    customer_ids = []
+    for number in range(count):
+        response = await async_client.post("/customers/", json={"name": f"Cliente {number}", "email": f"cliente{number}@prueba.com", "age": 30})
+        customer_ids.append(response.json()["id"])
+        await async_client.post("/transactions/transactions", json={
+            "ammount": 100 * (number + 1), "description": f"Compra {number}", "date": "2024-01-15T10:00:00", "customer_id": customer_ids[-1],
+        })
+    return customer_ids
+
+
+@pytest.mark.anyio
+async def test_invoice_batch_job(runner, monkeypatch):
+    '''
+    Test para facturar en segundo plano por tramos de clientes y consultar el resultado del trabajo.
+    '''
+    monkeypatch.setattr(app.routers.invoice, "INVOICE_JOB_CHUNK", 2)
+    transport = httpx.ASGITransport(app=fastapi_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+        await create_customers(async_client, 5)
+        try:
+            response = await async_client.post("/invoices/invoices/batch/jobs", json=PERIOD)
+            assert response.status_code == status.HTTP_202_ACCEPTED
+            assert response.json()["status"] == JobStatusEnum.PENDING.value
+            location = response.headers["Location"]
+            await runner.join()
+        finally:
+            await runner.stop()
+
+        job = (await async_client.get(location)).json()
+        assert job["status"] == JobStatusEnum.SUCCEEDED.value
+        assert job["result"] == {"created": 5, "skipped": 0, "total": 1500}
+        assert job["progress"] == job["total"] == 5
+        assert job["started_at"] is not None and job["finished_at"] is not None
+
+        listed = (await async_client.get("/jobs/", params={"kind": "invoice_batch"})).json()
+        assert [row["id"] for row in listed] == [job["id"]]
+
+
+@pytest.mark.anyio
+async def test_export_job_in_process_pool(runner, monkeypatch):
+    '''
+    Test para exportar en segundo plano repartiendo rangos de IDs entre procesos y descargar el archivo.
+    '''
+    monkeypatch.setattr(runner, "processes", 2)
+    transport = httpx.ASGITransport(app=fastapi_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+        customer_ids = await create_customers(async_client, 5)
+        try:
+            response = await async_client.post("/transactions/transactions/export/jobs", json={"ammount_min": 200})
+            assert response.status_code == status.HTTP_202_ACCEPTED
+            job_id = response.json()["id"]
+            assert (await async_client.get(f"/jobs/{job_id}/file")).status_code == status.HTTP_409_CONFLICT
+            await runner.join()
+        finally:
+            await runner.stop()
+
+        job = (await async_client.get(f"/jobs/{job_id}")).json()
+        assert job["status"] == JobStatusEnum.SUCCEEDED.value, job["error"]
+        assert job["result"]["rows"] == 4
+        response = await async_client.get(f"/jobs/{job_id}/file")
+        assert response.status_code == status.HTTP_200_OK
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert [row["customer_id"] for row in rows] == customer_ids[1:]
+
+
+@pytest.mark.anyio
+async def test_job_failure_and_bounded_queue(client):
+    '''
+    Test para guardar el error de un trabajo fallido y rechazar trabajos con la cola llena.
+    '''
+    runner = JobRunner(workers=1, queue_size=1)
+    runner.session_maker = async_session_maker
+    release = asyncio.Event()
+
+    @runner.register("wait")
+    async def wait(params: dict, job) -> dict:
+        await release.wait()
+        return {"waited": True}
+
+    @runner.register("fail")
+    async def fail(params: dict, job) -> dict:
+        raise ValueError("Periodo inválido")
+
+    try:
+        first = await runner.submit("wait", {})
+        await asyncio.sleep(0.1) # El worker toma el primero: la cola queda vacía
+        failing = await runner.submit("fail", {})
+        with pytest.raises(HTTPException) as error:
+            await runner.submit("wait", {})
+        assert error.value.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        release.set()
+        await runner.join()
+    finally:
+        await runner.stop()
+
+    async with async_session_maker() as session:
+        assert (await session.get(Job, first.id)).result == {"waited": True}
+        failed = await session.get(Job, failing.id)
+        assert failed.status == JobStatusEnum.FAILED
+        assert failed.error == "Periodo inválido"
+
+
+@pytest.mark.anyio
+async def test_jobs_recovered_on_start(client):
+    '''
+    Test para marcar como fallidos los trabajos interrumpidos y retomar los pendientes al arrancar.
+    '''
+    async with async_session_maker() as session:
+        interrupted = Job(kind="noop", status=JobStatusEnum.RUNNING)
+        pending = Job(kind="noop")
+        session.add_all([interrupted, pending])
+        await session.commit()
+
+    runner = JobRunner(workers=1)
+    runner.session_maker = async_session_maker
+
+    @runner.register("noop")
+    async def noop(params: dict, job) -> dict:
+        return {}
+
+    try:
+        await runner.start()
+        await runner.join()
+    finally:
+        await runner.stop()
+
+    async with async_session_maker() as session:
+        assert (await session.get(Job, interrupted.id)).status == JobStatusEnum.FAILED
+        assert (await session.get(Job, pending.id)).status == JobStatusEnum.SUCCEEDED
+
+
+@pytest.mark.anyio
+async def test_jobs_claimed_once_and_live_leases_kept(client):
+    '''
+    Test para ejecutar una sola vez un trabajo encolado dos veces y no tocar los trabajos con la reserva vigente.
+    '''
+    now = utcnow()
+    async with async_session_maker() as session:
+        live = Job(kind="noop", status=JobStatusEnum.RUNNING, lease_expires_at=now + timedelta(minutes=5))
+        stale = Job(kind="noop", status=JobStatusEnum.RUNNING, lease_expires_at=now - timedelta(minutes=5))
+        session.add_all([live, stale])
+        await session.commit()
+
+    runner = JobRunner(workers=2)
+    runner.session_maker = async_session_maker
+    runs = []
+
+    @runner.register("noop")
+    async def noop(params: dict, job) -> dict:
+        runs.append(job.job_id)
+        await asyncio.sleep(0.05)
+        return {}
+
+    try:
+        await runner.start()
+        job = await runner.submit("noop", {})
+        runner._queue.put_nowait(job.id) # Como si otro proceso lo hubiera encolado también
+        await runner.join()
+        assert not await runner.claim(job.id)
+    finally:
+        await runner.stop()
+
+    assert runs == [job.id]
+    async with async_session_maker() as session:
+        assert (await session.get(Job, live.id)).status == JobStatusEnum.RUNNING
+        assert (await session.get(Job, stale.id)).status == JobStatusEnum.FAILED
+
+
+@pytest.mark.anyio
+async def test_submit_reserves_queue_slot(client):
+    '''
+    Test para rechazar con 503, sin dejar filas huérfanas, los trabajos que llegan mientras otro ocupa el último lugar.
+    '''
+    runner = JobRunner(workers=0, queue_size=1)
+    runner.session_maker = async_session_maker
+
+    @runner.register("noop")
+    async def noop(params: dict, job) -> dict:
+        return {}
+
+    try:
+        results = await asyncio.gather(*(runner.submit("noop", {}) for _ in range(3)), return_exceptions=True)
+    finally:
+        await runner.stop()
+
+    assert sum(isinstance(result, Job) for result in results) == 1
+    assert all(result.status_code == status.HTTP_503_SERVICE_UNAVAILABLE for result in results if not isinstance(result, Job))
+    async with async_session_maker() as session:
+        assert len((await session.exec(select(Job))).all()) == 1
+
+
+def test_export_job_dates_normalized_to_utc():
+    '''
+    Test para guardar en UTC sin zona los límites con zona horaria de una exportación.
+    '''
+    export = TransactionExportJobCreate(date_from="2024-01-01T15:00:00+05:00", date_to="2024-01-02T00:00:00")
+    assert export.date_from == datetime(2024, 1, 1, 10, 0)
+    assert export.date_to == datetime(2024, 1, 2, 0, 0)
@@ -0,0 +1,84 @@
+import json
+import logging
+import queue
+
+from fastapi import status
+
+from app.main import app
+from app.metrics import JsonFormatter, MetricsMiddleware, RequestMetrics, StructuredQueueHandler
+
+
+def test_metrics_endpoint_uses_route_templates(client):
+    '''
+    Test para exponer las métricas por plantilla de ruta en formato Prometheus.
+    '''
+    client.get("/read_customers/1")
+    client.get("/read_customers/2")
+    client.get("/no-existe")
+
+    response = client.get("/metrics")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'http_requests_total{method="GET",route="/read_customers/{customer_id}",status="404"}' in body
+    assert 'route="<unmatched>"' in body
+    assert "http_request_duration_seconds_bucket" in body
+    assert "/read_customers/1" not in body
+
+
+def test_request_metrics_histogram():
+    '''
+    Test para los buckets acumulados del histograma de latencia.
+    '''
+    metrics = RequestMetrics(buckets=(0.1, 1.0))
+    metrics.observe("GET", "/plans/", 200, 0.05)
+    metrics.observe("GET", "/plans/", 200, 0.1)
+    metrics.observe("GET", "/plans/", 500, 3.0)
+
+    body = metrics.render()
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/plans/",le="0.1"} 2' in body
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/plans/",le="1.0"} 2' in body
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/plans/",le="+Inf"} 3' in body
+    assert 'http_requests_total{method="GET",route="/plans/",status="500"} 1' in body
+
+
+def test_access_log_never_includes_headers(client, caplog):
+    '''
+    Test para verificar que el log de accesos no incluye encabezados (credenciales).
+    '''
+    middleware = next(m for m in app.user_middleware if m.cls is MetricsMiddleware)
+    logger = middleware.kwargs["logger"]
+    logger.addHandler(caplog.handler)
+    try:
+        with caplog.at_level(logging.INFO, logger=logger.name):
+            client.get("/", auth=("luis", "luis"))
+    finally:
+        logger.removeHandler(caplog.handler)
+
+    record = next(record for record in caplog.records if record.name == logger.name)
+    assert record.fields["route"] == "/"
+    assert "headers" not in record.fields
+    assert "authorization" not in caplog.text.lower()
+
+
+def test_queued_log_keeps_exception_field():
+    '''
+    Test para formatear en el listener un registro con excepción, con el traceback en `exception`.
+    '''
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    logger = logging.getLogger("test.metrics.exceptions")
+    logger.addHandler(StructuredQueueHandler(log_queue))
+    logger.propagate = False
+    try:
+        try:
+            raise ValueError("Periodo inválido")
+        except ValueError:
+            logger.exception("job %s failed", 7, extra={"fields": {"job_id": 7}})
+    finally:
+        logger.handlers.clear()
+
+    payload = json.loads(JsonFormatter().format(log_queue.get_nowait()))
+    assert payload["message"] == "job 7 failed"
+    assert payload["job_id"] == 7
+    assert "ValueError: Periodo inválido" in payload["exception"]
+    assert "Traceback" not in payload["message"]
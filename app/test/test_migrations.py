@@ -0,0 +1,169 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlmodel import Session, SQLModel, select
+
+from migrations import INVALID_DATES_TABLE, MIGRATIONS, run_migrations
+from models import CustomerBalance, Transaction
+
+
+def test_migrate_legacy_transaction_dates(tmp_path):
+    '''
+    Test para migrar fechas guardadas como texto libre a columnas datetime.
+    '''
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.sqlite3'}")
+    SQLModel.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(text(
+            'INSERT INTO "transaction" (id, ammount, description, date, customer_id) VALUES '
+            "(1, 100, 'a', '2024-01-15T10:30:00', 1), "
+            "(2, 200, 'b', '2024-01-20T08:00:00+02:00', 1), "
+            "(3, 300, 'c', 'fecha inválida', 1)"
+        ))
+
+    assert run_migrations(engine) == len(MIGRATIONS)
+    assert run_migrations(engine) == 0
+
+    with Session(engine) as session:
+        in_range = session.exec(
+            select(Transaction.id)
+            .where(Transaction.date >= datetime(2024, 1, 15))
+            .where(Transaction.date < datetime(2024, 1, 21))
+            .order_by(Transaction.id)
+        ).all()
+        assert in_range == [1, 2]
+        migrated = session.exec(select(Transaction.date).where(Transaction.id == 2)).one()
+        assert migrated == datetime(2024, 1, 20, 6, 0)
+        # La fecha inválida no queda en `transaction`, donde rompería cada lectura
+        assert session.exec(select(Transaction.id)).all() == [1, 2]
+    with engine.begin() as connection:
+        moved = connection.execute(text(f"SELECT id, date FROM {INVALID_DATES_TABLE}")).all()
+        assert [tuple(row) for row in moved] == [(3, "fecha inválida")]
+    engine.dispose()
+
+
+def test_migrate_quarantines_invalid_dates_left_by_old_migration(tmp_path):
+    '''
+    Test para mover las fechas inválidas que dejó la migración 1 anterior y recalcular los saldos.
+    '''
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.sqlite3'}")
+    SQLModel.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(text(
+            'INSERT INTO "transaction" (id, ammount, description, date, customer_id) VALUES '
+            "(1, 100, 'a', '2024-01-15 10:30:00.000000', 1), "
+            "(2, 200, 'b', 'ayer', 1)"
+        ))
+        connection.execute(text(
+            "INSERT INTO customer_balance (customer_id, balance, transaction_count, last_transaction_date) "
+            "VALUES (1, 300, 2, 'ayer')"
+        ))
+        connection.execute(text("PRAGMA user_version = 7"))
+
+    assert run_migrations(engine) == len(MIGRATIONS) - 7
+
+    with Session(engine) as session:
+        assert session.exec(select(Transaction.id)).all() == [1]
+        balance = session.get(CustomerBalance, 1)
+        assert (balance.balance, balance.transaction_count) == (100, 1)
+        assert balance.last_transaction_date == datetime(2024, 1, 15, 10, 30)
+    with engine.begin() as connection:
+        assert connection.execute(text(f"SELECT id FROM {INVALID_DATES_TABLE}")).scalars().all() == [2]
+    engine.dispose()
+
+
+def test_migrate_customer_email_unique_index(tmp_path):
+    '''
+    Test para no crear el índice único de email mientras haya duplicados y crearlo al corregirlos.
+    '''
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.sqlite3'}")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE customer (id INTEGER PRIMARY KEY, name VARCHAR, description VARCHAR, email VARCHAR, age INTEGER)"))
+        connection.execute(text(
+            "INSERT INTO customer (id, name, email, age) VALUES "
+            "(1, 'Ana', 'ana@prueba.com', 30), (2, 'Ana', 'ana@prueba.com', 30), "
+            "(3, 'Luis', 'luis@prueba.com', 40), (4, 'Sin email', NULL, 20), (5, 'Sin email', NULL, 20)"
+        ))
+        connection.execute(text("PRAGMA user_version = 8"))
+    SQLModel.metadata.create_all(engine)
+
+    with pytest.raises(RuntimeError, match=r"1 emails repetidos: ana@prueba\.com \(IDs 1, 2\)"):
+        run_migrations(engine)
+    with engine.begin() as connection:
+        assert connection.execute(text("PRAGMA user_version")).scalar_one() == 8
+        connection.execute(text("UPDATE customer SET email = 'ana2@prueba.com' WHERE id = 2"))
+
+    assert run_migrations(engine) == 1
+
+    with engine.begin() as connection:
+        indexes = {row.name: row.unique for row in connection.execute(text("PRAGMA index_list(customer)"))}
+        assert indexes["ix_customer_email"] == 1
+    engine.dispose()
+
+
+def test_migrate_table_versions(tmp_path):
+    '''
+    Test para agregar updated_at y los triggers de versión a una base de datos anterior.
+    '''
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.sqlite3'}")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE plan (id INTEGER PRIMARY KEY, name VARCHAR, price INTEGER, description VARCHAR)"))
+        connection.execute(text("INSERT INTO plan (name, price, description) VALUES ('Básico', 10, 'Plan básico')"))
+        connection.execute(text("PRAGMA user_version = 1"))
+    SQLModel.metadata.create_all(engine)
+
+    run_migrations(engine)
+
+    with engine.begin() as connection:
+        assert connection.execute(text("SELECT updated_at FROM plan")).scalar_one() is not None
+        version_query = text("SELECT version FROM table_version WHERE name = 'plan'")
+        version = connection.execute(version_query).scalar_one()
+        connection.execute(text("UPDATE plan SET price = 20"))
+        assert connection.execute(version_query).scalar_one() == version + 1
+    engine.dispose()
+
+
+def test_migrate_transaction_idempotency_key(tmp_path):
+    '''
+    Test para agregar la clave de idempotencia única a una tabla de transacciones anterior.
+    '''
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.sqlite3'}")
+    with engine.begin() as connection:
+        connection.execute(text(
+            'CREATE TABLE "transaction" (id INTEGER PRIMARY KEY, ammount INTEGER, description VARCHAR, date DATETIME, customer_id INTEGER)'
+        ))
+        connection.execute(text("PRAGMA user_version = 3"))
+    SQLModel.metadata.create_all(engine)
+
+    assert run_migrations(engine) == len(MIGRATIONS) - 3
+
+    with engine.begin() as connection:
+        indexes = {row.name: row.unique for row in connection.execute(text('PRAGMA index_list("transaction")'))}
+        assert indexes["ix_transaction_idempotency_key"] == 1
+    engine.dispose()
+
+
+def test_migrate_transaction_fts(tmp_path):
+    '''
+    Test para indexar en FTS5 las descripciones de transacciones anteriores a la tabla de búsqueda.
+    '''
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.sqlite3'}")
+    with engine.begin() as connection:
+        connection.execute(text(
+            'CREATE TABLE "transaction" (id INTEGER PRIMARY KEY, ammount INTEGER, description VARCHAR, '
+            "date DATETIME, customer_id INTEGER, idempotency_key VARCHAR)"
+        ))
+        connection.execute(text(
+            'INSERT INTO "transaction" (ammount, description, date, customer_id) VALUES '
+            "(100, 'Compra en farmacia', '2024-01-15 10:30:00.000000', 1)"
+        ))
+        connection.execute(text("PRAGMA user_version = 4"))
+    SQLModel.metadata.create_all(engine)
+
+    assert run_migrations(engine) == len(MIGRATIONS) - 4
+
+    with engine.begin() as connection:
+        match_query = text("SELECT rowid FROM transaction_fts WHERE transaction_fts MATCH '\"farma\"'")
+        assert connection.execute(match_query).scalars().all() == [1]
+    engine.dispose()
@@ -0,0 +1,151 @@
+from datetime import datetime
+
+import pytest
+from fastapi import status
+
+from app.pagination import count_cache, encode_cursor
+from models import Transaction
+
+
+@pytest.fixture
+def create_customer_with_transactions(create_customer, create_transactions):
+    '''
+    Fábrica de un cliente con varias transacciones: `create_customer_with_transactions(n)` retorna su ID.
+    '''
+    def create(number_transactions: int) -> int:
+        customer_id = create_customer()
+        create_transactions(customer_id, [
+            {"ammount": 100 + x, "description": f"Transacción {x}", "date": f"2024-01-{(x % 3) + 1:02d}"}
+            for x in range(number_transactions)
+        ])
+        return customer_id
+    return create
+
+
+def walk_transaction_pages(client, limit: int, order_by: str) -> list[dict]:
+    '''
+    Recorre todas las páginas de transacciones siguiendo el encabezado X-Next-Cursor.
+    '''
+    transactions = []
+    params = {"limit": limit, "order_by": order_by}
+    while True:
+        response = client.get("/transactions/transactions", params=params)
+        assert response.status_code == status.HTTP_200_OK
+        transactions.extend(response.json())
+        next_cursor = response.headers.get("X-Next-Cursor")
+        if next_cursor is None:
+            return transactions
+        assert len(response.json()) == limit
+        params["cursor"] = next_cursor
+
+
+def test_list_transactions_by_cursor(client, create_customer_with_transactions):
+    '''
+    Test para recorrer las transacciones por cursor sin repetir ni omitir registros.
+    '''
+    create_customer_with_transactions(7)
+
+    transactions = walk_transaction_pages(client, limit=3, order_by="id")
+    ids = [transaction["id"] for transaction in transactions]
+    assert ids == sorted(ids)
+    assert len(set(ids)) == 7
+
+
+def test_list_transactions_by_date_cursor(client, create_customer_with_transactions):
+    '''
+    Test para paginar por (date, id) cuando varias transacciones comparten fecha.
+    '''
+    create_customer_with_transactions(7)
+
+    transactions = walk_transaction_pages(client, limit=2, order_by="date")
+    keys = [(transaction["date"], transaction["id"]) for transaction in transactions]
+    assert keys == sorted(keys)
+    assert len(set(keys)) == 7
+
+
+def test_list_transactions_invalid_cursor(client):
+    '''
+    Test para verificar que un cursor inválido retorna 400.
+    '''
+    response = client.get("/transactions/transactions", params={"cursor": "no-es-un-cursor"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_list_cursor_values_type_checked(client, create_customer_with_transactions):
+    '''
+    Test para rechazar con 400 un cursor bien formado cuyos valores no tienen el tipo de la clave.
+    '''
+    create_customer_with_transactions(2)
+    for values, order_by in [([{"id": 1}], "id"), ([[1]], "id"), (["1"], "id"), ([True], "id"), ([1, 1], "date"), (["2024-01-01", "1"], "date")]:
+        response = client.get("/transactions/transactions", params={"cursor": encode_cursor(values), "order_by": order_by})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST, values
+    for path in ["/customers/", "/plans/"]:
+        assert client.get(path, params={"cursor": encode_cursor([{}])}).status_code == status.HTTP_400_BAD_REQUEST
+    response = client.get("/transactions/transactions", params={"cursor": encode_cursor(["2024-01-01T00:00:00", 1]), "order_by": "date"})
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_list_limit_bounds(client):
+    '''
+    Test para rechazar con 422 límites de página menores que 1 o mayores que el máximo.
+    '''
+    for path in ["/transactions/transactions", "/customers/", "/plans/"]:
+        for limit in [0, -1, 1001]:
+            assert client.get(path, params={"limit": limit}).status_code == status.HTTP_422_UNPROCESSABLE_CONTENT, (path, limit)
+
+
+def test_list_customers_by_cursor(client, create_customer):
+    '''
+    Test para paginar clientes con el paginador reutilizable.
+    '''
+    for x in range(3):
+        create_customer(x)
+
+    response = client.get("/customers/", params={"limit": 2})
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()) == 2
+    next_cursor = response.headers["X-Next-Cursor"]
+
+    response_next = client.get("/customers/", params={"limit": 2, "cursor": next_cursor})
+    assert response_next.status_code == status.HTTP_200_OK
+    assert [customer["name"] for customer in response_next.json()] == ["Cliente 2"]
+    assert "X-Next-Cursor" not in response_next.headers
+
+
+def test_list_number_transactions(client, create_customer_with_transactions, create_transactions):
+    '''
+    Test para la paginación por número de página con el total en caché.
+    '''
+    customer_id = create_customer_with_transactions(5)
+
+    response = client.get("/transactions/transactions/number", params={"registros_por_pagina": 2, "numero_pagina": 3})
+    assert response.status_code == status.HTTP_200_OK
+    page = response.json()
+    assert page["total"] == 5
+    assert page["pages"] == 3
+    assert page["page"] == 3
+    assert len(page["items"]) == 1
+
+    # Crear una transacción invalida el total en caché
+    create_transactions(customer_id, [{"ammount": 500, "description": "Nueva", "date": "2024-02-01"}])
+    response = client.get("/transactions/transactions/number", params={"registros_por_pagina": 2, "numero_pagina": 3})
+    assert response.json()["total"] == 6
+    assert len(response.json()["items"]) == 2
+
+
+def test_count_cache_expires_after_external_writes(client, session, monkeypatch, create_customer_with_transactions):
+    '''
+    Test para reflejar en `total` las escrituras de otro proceso cuando vence el TTL del conteo.
+    '''
+    clock = [0.0]
+    monkeypatch.setattr(count_cache, "clock", lambda: clock[0])
+    customer_id = create_customer_with_transactions(2)
+    params = {"registros_por_pagina": 2, "numero_pagina": 1}
+    assert client.get("/transactions/transactions/number", params=params).json()["total"] == 2
+
+    # Inserción por otro engine, sin pasar por la API (otro worker, seed, una carga externa)
+    session.add(Transaction(ammount=10, description="Externa", date=datetime(2024, 2, 1), customer_id=customer_id))
+    session.commit()
+    assert client.get("/transactions/transactions/number", params=params).json()["total"] == 2
+    clock[0] += count_cache.ttl
+    assert client.get("/transactions/transactions/number", params=params).json()["total"] == 3
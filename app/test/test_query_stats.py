@@ -0,0 +1,46 @@
+from fastapi import status
+
+
+def test_server_timing_header(client):
+    '''
+    Test para verificar que cada respuesta informa las consultas y el tiempo de base de datos.
+    '''
+    response = client.post("/customers", json={"name": "Luis", "email": "luis@example.com", "age": 33})
+    assert response.status_code == status.HTTP_201_CREATED
+    server_timing = response.headers["server-timing"]
+    assert server_timing.startswith("db;dur=")
+    assert 'queries"' in server_timing
+
+    response = client.get("/format/24h")
+    assert response.headers["server-timing"].endswith('desc="0 queries"')
+
+
+def test_create_transaction_max_queries(client, max_queries):
+    '''
+    Test para verificar que crear una transacción no carga el cliente completo ni recarga la fila creada:
+    existencia del cliente, INSERT y UPSERT del saldo y de los totales por periodo.
+    '''
+    customer = client.post("/customers", json={"name": "Luis", "email": "luis@example.com", "age": 33}).json()
+    with max_queries(4) as stats:
+        response = client.post(
+            "/transactions/transactions",
+            json={"customer_id": customer["id"], "ammount": 100, "description": "x", "date": "2024-01-15T10:00:00"},
+        )
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.json()["id"] is not None
+    assert stats.count == 4
+
+
+def test_subscribe_customer_to_plan_max_queries(client, max_queries):
+    '''
+    Test para verificar que suscribir un cliente a un plan usa una consulta de existencia y el INSERT.
+    '''
+    customer = client.post("/customers", json={"name": "Luis", "email": "luis@example.com", "age": 33}).json()
+    plan = client.post("/plans/", json={"name": "Básico", "price": 10, "description": "Plan básico"}).json()
+    with max_queries(2):
+        response = client.post(f"/customers/{customer['id']}/plans/{plan['id']}/", params={"plan_status": "activo"})
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.json()["customer_id"] == customer["id"]
+
+    response = client.post(f"/customers/{customer['id']}/plans/999/", params={"plan_status": "activo"})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
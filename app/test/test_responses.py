@@ -0,0 +1,39 @@
+from datetime import datetime
+
+from fastapi import status
+from sqlmodel import select
+
+import app.responses
+from app.responses import FastJSONResponse
+from models import Customer, Transaction
+
+
+def test_list_endpoints_match_response_models(client, session):
+    '''
+    Test para verificar que las listas serializadas por columnas coinciden con los modelos de respuesta.
+    '''
+    customer_id = client.post("/customers/", json={"name": "John Doe", "email": "prueba@prueba.com", "age": 30}).json()["id"]
+    client.post("/transactions/transactions", json={
+        "customer_id": customer_id, "ammount": 100, "description": "Compra", "date": "2024-01-15T10:30:00.123456",
+    })
+
+    response = client.get("/transactions/transactions")
+    assert response.status_code == status.HTTP_200_OK
+    expected = [transaction.model_dump(mode="json") for transaction in session.exec(select(Transaction)).all()]
+    assert response.json() == expected
+    assert response.json()[0]["date"] == "2024-01-15T10:30:00.123456"
+
+    response = client.get("/customers/")
+    assert response.headers["etag"]
+    expected = [customer.model_dump(mode="json") for customer in session.exec(select(Customer)).all()]
+    assert response.json() == expected
+
+
+def test_fast_json_response_without_orjson(monkeypatch):
+    '''
+    Test para serializar con el codificador estándar cuando orjson no está instalado.
+    '''
+    content = [{"date": datetime(2024, 1, 15, 10, 30), "ammount": 100}]
+    with_orjson = FastJSONResponse(content).body
+    monkeypatch.setattr(app.responses, "orjson", None)
+    assert FastJSONResponse(content).body.replace(b" ", b"") == with_orjson
@@ -0,0 +1,54 @@
+from datetime import datetime
+
+from fastapi import status
+
+from app.timezones import country_timezones, parse_zone_tab
+
+ZONE_TAB = (
+    "# comentario\n"
+    "AR\t-3436-05827\tAmerica/Argentina/Buenos_Aires\tBuenos Aires (BA, CF)\n"
+    "US\t+404251-0740023\tAmerica/New_York\tEastern (most areas)\n"
+    "US\t+415100-0873900\tAmerica/Chicago\tCentral (most areas)\n"
+)
+
+
+def test_parse_zone_tab():
+    '''
+    Test para leer las zonas de cada país en el orden de `zone.tab`.
+    '''
+    assert parse_zone_tab(ZONE_TAB) == {
+        "AR": ("America/Argentina/Buenos_Aires",),
+        "US": ("America/New_York", "America/Chicago"),
+    }
+
+
+def test_time_by_iso_code_from_index(client):
+    '''
+    Test para responder la hora de cualquier país del índice y 404 para códigos desconocidos.
+    '''
+    assert len(country_timezones) > 200
+    assert country_timezones["MX"].key == "America/Mexico_City"
+    response = client.get("/time/jp")
+    assert response.status_code == status.HTTP_200_OK
+    assert datetime.fromisoformat(response.json()["time"]).utcoffset().total_seconds() == 9 * 3600
+    assert client.get("/time/XX").status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_time_batch(client):
+    '''
+    Test para obtener la hora de varios países en varios formatos en una sola llamada.
+    '''
+    response = client.get("/time", params={"codes": "us, MX,us,ar", "formats": "24h,iso"})
+    assert response.status_code == status.HTTP_200_OK
+    times = response.json()
+    assert list(times) == ["US", "MX", "AR"]
+    assert times["AR"]["timezone"] == "America/Argentina/Buenos_Aires"
+    assert set(times["US"]) == {"timezone", "24h", "iso"}
+    assert times["AR"]["iso"].endswith("-0300")
+    assert list(client.get("/time", params={"codes": "US"}).json()["US"]) == ["timezone", "iso"]
+
+    response = client.get("/time", params={"codes": "US,XX"})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert "XX" in response.json()["detail"]
+    assert client.get("/time", params={"codes": "US", "formats": "13h"}).status_code == status.HTTP_404_NOT_FOUND
+    assert client.get("/time", params={"codes": ","}).status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,89 @@
+import sqlite3
+
+from fastapi import status
+from sqlalchemy.exc import IntegrityError
+
+from app.routers.transactions import is_idempotency_conflict
+
+
+def transaction(customer_id: int, key: str | None, ammount: int = 100) -> dict:
+    return {
+        "customer_id": customer_id,
+        "ammount": ammount,
+        "description": "Pago",
+        "date": "2024-01-15T10:00:00",
+        "idempotency_key": key,
+    }
+
+
+def test_create_transactions_batch(client, max_queries, create_customer):
+    '''
+    Test para ingerir un lote con un número fijo de consultas y rechazar clientes inexistentes.
+    '''
+    customer_id = create_customer()
+    other_customer_id = create_customer(1)
+    batch = [transaction(customer_id if x % 2 else other_customer_id, f"pago-{x}") for x in range(200)]
+    batch.append(transaction(999, "pago-sin-cliente"))
+    batch.append(transaction(customer_id, None, ammount=50))
+
+    # Clientes IN, claves IN, INSERT, UPSERT de saldos y de totales por periodo
+    with max_queries(5):
+        response = client.post("/transactions/transactions/batch", json=batch)
+    assert response.status_code == status.HTTP_201_CREATED
+    result = response.json()
+    assert result["created"] == 201
+    assert result["duplicates"] == 0
+    assert result["errors"] == [{"index": 200, "detail": "Cliente con ID 999 no encontrado"}]
+    assert client.get(f"/customers/{customer_id}/summary").json()["balance"] == 100 * 100 + 50
+
+
+def test_create_transactions_batch_idempotent(client, create_customer):
+    '''
+    Test para reenviar un lote sin duplicar las transacciones.
+    '''
+    customer_id = create_customer()
+    batch = [transaction(customer_id, f"pago-{x}") for x in range(10)]
+    batch.append(transaction(customer_id, "pago-0"))
+    first = client.post("/transactions/transactions/batch", json=batch).json()
+    assert (first["created"], first["duplicates"]) == (10, 1)
+
+    retry = client.post("/transactions/transactions/batch", json=batch).json()
+    assert (retry["created"], retry["duplicates"]) == (0, 11)
+    summary = client.get(f"/customers/{customer_id}/summary").json()
+    assert (summary["transaction_count"], summary["balance"]) == (10, 1000)
+
+    response = client.post("/transactions/transactions", json=transaction(customer_id, "pago-3"))
+    assert response.status_code == status.HTTP_409_CONFLICT
+
+
+def test_create_transactions_batch_limits(client):
+    '''
+    Test para rechazar lotes vacíos.
+    '''
+    response = client.post("/transactions/transactions/batch", json=[])
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+
+
+def test_create_transactions_missing_fields(client, create_customer):
+    '''
+    Test para rechazar con 422 (y no como conflicto de idempotency_key) transacciones sin campos obligatorios.
+    '''
+    customer_id = create_customer()
+    for field in ["date", "ammount", "description", "customer_id"]:
+        incomplete = transaction(customer_id, f"pago-{field}")
+        del incomplete[field]
+        batch = client.post("/transactions/transactions/batch", json=[transaction(customer_id, "pago-ok"), incomplete])
+        assert batch.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT, field
+        single = client.post("/transactions/transactions", json=incomplete)
+        assert single.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT, field
+    assert client.get(f"/customers/{customer_id}/summary").json()["transaction_count"] == 0
+
+
+def test_idempotency_conflict_only_for_its_index():
+    '''
+    Test para distinguir la violación del índice de idempotency_key de otras restricciones.
+    '''
+    unique = IntegrityError("INSERT", {}, sqlite3.IntegrityError("UNIQUE constraint failed: transaction.idempotency_key"))
+    not_null = IntegrityError("INSERT", {}, sqlite3.IntegrityError("NOT NULL constraint failed: transaction.date"))
+    assert is_idempotency_conflict(unique)
+    assert not is_idempotency_conflict(not_null)
@@ -0,0 +1,52 @@
+import csv
+import io
+import json
+
+import pytest
+from fastapi import status
+
+
+@pytest.fixture
+def customer_ids(create_customer, create_transactions) -> tuple[int, int]:
+    '''
+    Dos clientes con transacciones en distintas fechas.
+    '''
+    customer_ids = create_customer(0), create_customer(1)
+    for day in range(1, 6):
+        for customer_id in customer_ids:
+            create_transactions(customer_id, [
+                {"ammount": 100 * day, "description": f"Compra, día {day}", "date": f"2024-01-{day:02d}T10:00:00"},
+            ])
+    return customer_ids
+
+
+def test_export_transactions_ndjson(client, customer_ids):
+    '''
+    Test para exportar en NDJSON filtrando por cliente y rango de fechas.
+    '''
+    customer_id, _ = customer_ids
+
+    response = client.get("/transactions/transactions/export", params={
+        "customer_id": customer_id,
+        "date_from": "2024-01-02T00:00:00",
+        "date_to": "2024-01-05T00:00:00",
+    })
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["ammount"] for row in rows] == [200, 300, 400]
+    assert all(row["customer_id"] == customer_id for row in rows)
+
+
+def test_export_transactions_csv(client, customer_ids):
+    '''
+    Test para exportar en CSV con encabezado.
+    '''
+    response = client.get("/transactions/transactions/export", params={"format": "csv"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/csv")
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 10
+    assert rows[0]["description"] == "Compra, día 1"
@@ -0,0 +1,107 @@
+import pytest
+from fastapi import status
+from sqlmodel import select
+
+from models import Transaction
+
+
+@pytest.fixture
+def customer_ids(create_customer, create_transactions) -> tuple[int, int]:
+    '''
+    Dos clientes con transacciones de distintos montos, fechas y descripciones.
+    '''
+    customer_ids = create_customer(0), create_customer(1)
+    descriptions = ["Compra en farmacia", "Pago de luz", "Compra en supermercado", "100% reembolso", "Pago de agua"]
+    for day, description in enumerate(descriptions, start=1):
+        for customer_id in customer_ids:
+            create_transactions(customer_id, [
+                {"ammount": 100 * day, "description": description, "date": f"2024-01-{day:02d}T10:00:00"},
+            ])
+    return customer_ids
+
+
+def test_search_transactions_filters(client, customer_ids):
+    '''
+    Test para combinar los filtros por cliente, monto, fecha y descripción.
+    '''
+    customer_id, _ = customer_ids
+
+    response = client.get("/transactions/transactions/search", params={
+        "customer_id": customer_id, "ammount_min": 200, "ammount_max": 400,
+    })
+    assert response.status_code == status.HTTP_200_OK
+    assert [row["ammount"] for row in response.json()] == [200, 300, 400]
+    assert {row["customer_id"] for row in response.json()} == {customer_id}
+
+    response = client.get("/transactions/transactions/search", params={
+        "date_from": "2024-01-02T00:00:00", "date_to": "2024-01-03T00:00:00", "fields": "description",
+    })
+    assert response.json() == [{"description": "Pago de luz"}] * 2
+    # Límites con zona horaria: 2024-01-02T15:00:00+05:00 es 10:00 UTC, la hora de las transacciones
+    response = client.get("/transactions/transactions/search", params={
+        "date_from": "2024-01-02T15:00:00+05:00", "date_to": "2024-01-02T10:00:01Z", "fields": "description",
+    })
+    assert response.json() == [{"description": "Pago de luz"}] * 2
+
+    response = client.get("/transactions/transactions/search", params={"customer_id": customer_id, "q": "COMPRA"})
+    assert [row["description"] for row in response.json()] == ["Compra en farmacia", "Compra en supermercado"]
+
+
+def test_search_transactions_description(client, customer_ids):
+    '''
+    Test para buscar subcadenas en la descripción, cortas y con caracteres especiales.
+    '''
+    customer_id, _ = customer_ids
+    search = lambda q: [
+        row["description"]
+        for row in client.get("/transactions/transactions/search", params={"customer_id": customer_id, "q": q}).json()
+    ]
+    assert search("mercado") == ["Compra en supermercado"]
+    assert search("de") == ["Pago de luz", "Pago de agua"]
+    assert search("0%") == ["100% reembolso"]
+    assert search('"luz') == []
+    assert search("sin coincidencias") == []
+
+
+def test_search_transactions_cursor(client, customer_ids):
+    '''
+    Test para recorrer los resultados de la búsqueda por cursor.
+    '''
+    seen = []
+    params = {"q": "Pago", "limit": 3, "order_by": "date"}
+    while True:
+        response = client.get("/transactions/transactions/search", params=params)
+        seen += [row["id"] for row in response.json()]
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["X-Next-Cursor"]
+    assert len(seen) == 4 and len(set(seen)) == 4
+
+
+def test_search_index_follows_updates(client, session, customer_ids):
+    '''
+    Test para verificar que los triggers mantienen el índice FTS5 al modificar y eliminar transacciones.
+    '''
+    transaction = session.exec(select(Transaction).where(Transaction.description == "Pago de luz")).first()
+    transaction.description = "Pago de gas"
+    session.add(transaction)
+    session.commit()
+
+    search = lambda q: [row["id"] for row in client.get("/transactions/transactions/search", params={"q": q}).json()]
+    assert transaction.id in search("gas")
+    assert transaction.id not in search("luz")
+
+    session.delete(transaction)
+    session.commit()
+    assert search("gas") == []
+
+
+def test_export_uses_search_filters(client, customer_ids):
+    '''
+    Test para exportar en NDJSON solo las transacciones que coinciden con la búsqueda.
+    '''
+    response = client.get("/transactions/transactions/export", params={"q": "farmacia", "ammount_max": 100})
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.text.splitlines()) == 2
+    response = client.get("/transactions/transactions/export", params={"date_from": "2024-01-05T15:00:00+05:00"})
+    assert len(response.text.splitlines()) == 2
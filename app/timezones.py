@@ -0,0 +1,64 @@
+'''
+Índice de códigos de país ISO-3166 a zonas horarias IANA, construido una sola vez al importar.
+
+Se lee `zone.tab` de la base de datos de zonas horarias, con la misma precedencia que `zoneinfo`:
+primero las rutas del sistema (`zoneinfo.TZPATH`) y después el paquete `tzdata`. Cada zona se
+carga una vez como `ZoneInfo`, así las solicitudes solo hacen una búsqueda en un diccionario.
+
+Un país puede tener varias zonas (US, MX, AR...). Se usa la primera de `zone.tab`, que es la de
+la capital o la más poblada (America/New_York, America/Mexico_City...); las demás quedan en
+`country_zones`.
+'''
+import os
+import zoneinfo
+from importlib import resources
+from zoneinfo import ZoneInfo
+
+ZONE_TAB = "zone.tab"
+
+
+def read_zone_tab() -> str:
+    '''
+    Contenido de `zone.tab` del sistema o, si no está, del paquete `tzdata`.
+    Raises:
+    - FileNotFoundError: Si no hay base de datos de zonas horarias.
+    '''
+    for directory in zoneinfo.TZPATH:
+        path = os.path.join(directory, ZONE_TAB)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as file:
+                return file.read()
+    try:
+        return resources.files("tzdata.zoneinfo").joinpath(ZONE_TAB).read_text(encoding="utf-8")
+    except ModuleNotFoundError:
+        raise FileNotFoundError(f"No se encontró {ZONE_TAB}: instale el paquete 'tzdata'") from None
+
+
+def parse_zone_tab(content: str) -> dict[str, tuple[str, ...]]:
+    '''
+    Zonas de cada país en el orden de `zone.tab` (columnas: código, coordenadas, zona, comentario).
+    '''
+    zones: dict[str, list[str]] = {}
+    for line in content.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        code, _, zone = line.split("\t")[:3]
+        zones.setdefault(code, []).append(zone)
+    return {code: tuple(names) for code, names in zones.items()}
+
+
+def build_timezone_index(zones: dict[str, tuple[str, ...]]) -> dict[str, ZoneInfo]:
+    '''
+    `ZoneInfo` precargado de la zona principal de cada país. Las zonas que no se pueden cargar se omiten.
+    '''
+    index = {}
+    for code, names in zones.items():
+        try:
+            index[code] = ZoneInfo(names[0])
+        except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+            continue
+    return index
+
+
+country_zones = parse_zone_tab(read_zone_tab())
+country_timezones = build_timezone_index(country_zones)
@@ -0,0 +1,102 @@
+'''
+Mantenimiento de `customer_balance`, el agregado por cliente de `transaction`.
+
+Cada alta de transacciones suma su monto y su número al agregado con un UPSERT en la
+misma transacción, así `GET /customers/{id}/summary` lee una sola fila por clave primaria.
+`rebuild_customer_balances` lo recalcula desde cero (datos anteriores o cargados por fuera de la API).
+
+Uso manual:
+    python balances.py
+'''
+from collections.abc import Iterable
+
+from sqlalchemy import Engine, bindparam, delete, func, insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from models import CustomerBalance, Transaction, utcnow
+
+
+def balance_increments(transactions: Iterable[Transaction]) -> list[dict]:
+    '''
+    Agrupa transacciones nuevas por cliente.
+    Parámetros:
+    - transactions: Transacciones a sumar al agregado.
+    Retorna:
+    - Parámetros para `increment_balances_statement`, uno por cliente.
+    '''
+    increments: dict[int, dict] = {}
+    for transaction in transactions:
+        increment = increments.setdefault(transaction.customer_id, {
+            "customer_id": transaction.customer_id,
+            "balance": 0,
+            "transaction_count": 0,
+            "last_transaction_date": None,
+            "updated_at": utcnow(),
+        })
+        increment["balance"] += transaction.ammount
+        increment["transaction_count"] += 1
+        if increment["last_transaction_date"] is None or transaction.date > increment["last_transaction_date"]:
+            increment["last_transaction_date"] = transaction.date
+    return list(increments.values())
+
+
+def increment_balances_statement():
+    '''
+    UPSERT (SQLite) que crea la fila del cliente o le suma el incremento.
+    Se ejecuta con la lista de `balance_increments` como parámetros.
+    '''
+    table = CustomerBalance.__table__
+    statement = sqlite_insert(table).values(
+        customer_id=bindparam("customer_id"),
+        balance=bindparam("balance"),
+        transaction_count=bindparam("transaction_count"),
+        last_transaction_date=bindparam("last_transaction_date"),
+        updated_at=bindparam("updated_at"),
+    )
+    return statement.on_conflict_do_update(
+        index_elements=[table.c.customer_id],
+        set_={
+            "balance": table.c.balance + statement.excluded.balance,
+            "transaction_count": table.c.transaction_count + statement.excluded.transaction_count,
+            # max() con dos argumentos es el máximo escalar de SQLite, no el agregado
+            "last_transaction_date": func.max(table.c.last_transaction_date, statement.excluded.last_transaction_date),
+            "updated_at": statement.excluded.updated_at,
+        },
+    )
+
+
+def rebuild_customer_balances(connection) -> int:
+    '''
+    Recalcula `customer_balance` desde `transaction` con una sola agregación en SQL.
+    Parámetros:
+    - connection: Conexión con una transacción abierta.
+    Retorna:
+    - El número de clientes con transacciones.
+    '''
+    connection.execute(delete(CustomerBalance))
+    aggregate = (
+        select(
+            Transaction.customer_id,
+            func.sum(Transaction.ammount),
+            func.count(),
+            func.max(Transaction.date),
+        )
+        .group_by(Transaction.customer_id)
+    )
+    columns = ["customer_id", "balance", "transaction_count", "last_transaction_date"]
+    connection.execute(insert(CustomerBalance).from_select(columns, aggregate))
+    return connection.execute(select(func.count()).select_from(CustomerBalance)).scalar_one()
+
+
+def rebuild(engine: Engine) -> int:
+    '''
+    Reconstruye el agregado en su propia transacción.
+    '''
+    with engine.begin() as connection:
+        return rebuild_customer_balances(connection)
+
+
+if __name__ == "__main__":
+    from db import engine
+
+    print(f"Clientes con saldo reconstruido: {rebuild(engine)}")
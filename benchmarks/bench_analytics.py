@@ -0,0 +1,114 @@
+'''
+Benchmark de `GET /analytics/transactions` (lee `transaction_rollup`) frente a la misma
+agregación calculada desde `transaction` con GROUP BY.
+
+Uso:
+    python -m benchmarks.bench_analytics --transactions 1000000
+'''
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+import httpx
+from sqlalchemy import create_engine, func, select
+
+QUERIES = {
+    "mes, un cliente": {"bucket": "month", "customer_id": 42},
+    "semana, por plan": {"bucket": "week", "group_by": "plan"},
+    "día, un mes de todos": {"bucket": "day", "date_from": "2023-03-01", "date_to": "2023-04-01", "limit": 10_000},
+}
+
+
+def raw_query(params: dict):
+    '''
+    La consulta equivalente sobre `transaction`, sin el rollup.
+    '''
+    from models import CustomerPlan, StatusEnum, Transaction
+    from rollups import period_start_sql
+
+    period_start = period_start_sql(params["bucket"], Transaction.date)
+    if params.get("group_by") == "plan":
+        return (
+            select(period_start, CustomerPlan.plan_id, func.sum(Transaction.ammount), func.count())
+            .join(CustomerPlan, CustomerPlan.customer_id == Transaction.customer_id)
+            .where(CustomerPlan.status == StatusEnum.ACTIVE)
+            .group_by(period_start, CustomerPlan.plan_id)
+        )
+    query = select(period_start, Transaction.customer_id, func.sum(Transaction.ammount), func.count())
+    if "customer_id" in params:
+        query = query.where(Transaction.customer_id == params["customer_id"])
+    if "date_from" in params:
+        query = query.where(Transaction.date >= params["date_from"]).where(Transaction.date < params["date_to"])
+    return query.group_by(period_start, Transaction.customer_id)
+
+
+def median_ms(function, repetitions: int) -> float:
+    timings = []
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+async def endpoint_timings(repetitions: int) -> dict[str, float]:
+    '''
+    Mide el endpoint en proceso (ASGI): mediana en milisegundos.
+    '''
+    from app.main import app
+    from db import async_engine
+
+    timings = {}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark") as client:
+        for name, params in QUERIES.items():
+            samples = []
+            for _ in range(repetitions):
+                start = time.perf_counter()
+                response = await client.get("/analytics/transactions", params=params)
+                samples.append((time.perf_counter() - start) * 1000)
+                assert response.status_code == 200
+            timings[name] = statistics.median(samples)
+    await async_engine.dispose()
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--customers", type=int, default=10_000, help="Clientes a sembrar")
+    parser.add_argument("--plans", type=int, default=10, help="Planes a sembrar (un plan por cliente)")
+    parser.add_argument("--transactions", type=int, default=1_000_000, help="Transacciones a sembrar")
+    parser.add_argument("--repetitions", type=int, default=5, help="Repeticiones (se reporta la mediana)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        database = os.path.join(directory, "analytics.sqlite3")
+        # La configuración se lee de variables de entorno al importar `db`
+        os.environ["DATABASE_URL"] = f"sqlite:///{database}"
+        os.environ["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{database}"
+        os.environ.setdefault("ACCESS_LOG_SAMPLE_RATE", "0")
+        os.environ.setdefault("SLOW_QUERY_THRESHOLD_MS", "10000")
+        from rollups import rebuild
+        from seed import seed
+
+        engine = create_engine(os.environ["DATABASE_URL"])
+        seed(engine, args.customers, args.plans, 1, args.transactions)
+        start = time.perf_counter()
+        rows = rebuild(engine)
+        print(f"Backfill de {args.transactions} transacciones: {rows} filas en {time.perf_counter() - start:.1f} s")
+
+        raw = {}
+        with engine.connect() as connection:
+            for name, params in QUERIES.items():
+                raw[name] = median_ms(lambda: connection.execute(raw_query(params)).all(), args.repetitions)
+        engine.dispose()
+
+        print(f"Consultas (mediana de {args.repetitions}):")
+        for name, milliseconds in asyncio.run(endpoint_timings(args.repetitions)).items():
+            print(f"  {name:<22} rollup (endpoint) {milliseconds:8.1f} ms   GROUP BY sobre transaction {raw[name]:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+'''
+Benchmark de solicitudes autenticadas por segundo (`GET /` con HTTP Basic): verificando scrypt
+en cada solicitud frente a la caché de credenciales verificadas. También mide la latencia de
+un endpoint sin autenticación mientras se verifican contraseñas, para comprobar que el hash
+corre en el thread pool y no bloquea el event loop.
+
+Uso:
+    python -m benchmarks.bench_auth --requests 200 --concurrency 20
+'''
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+import httpx
+
+CREDENTIALS = ("benchmark", "clave-de-prueba")
+
+
+async def authenticated_rate(client: httpx.AsyncClient, requests: int, concurrency: int) -> float:
+    '''
+    Envía `requests` solicitudes autenticadas con `concurrency` clientes a la vez y retorna las solicitudes por segundo.
+    '''
+    pending = iter(range(requests))
+
+    async def worker():
+        for _ in pending:
+            response = await client.get("/", auth=CREDENTIALS)
+            assert response.status_code == 200, response.text
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return requests / (time.perf_counter() - start)
+
+
+async def unauthenticated_latency(client: httpx.AsyncClient, stop: asyncio.Event) -> float:
+    '''
+    Mediana en milisegundos de `GET /cache/stats` mientras corre la carga autenticada.
+    '''
+    samples = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get("/cache/stats")
+        samples.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.005)
+    return statistics.median(samples)
+
+
+async def run(requests: int, concurrency: int) -> None:
+    import app.auth
+    from app.auth import credential_cache
+    from app.main import app as fastapi_app
+    from db import async_engine
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=fastapi_app), base_url="http://benchmark") as client:
+        for name, ttl in [("sin caché (scrypt por solicitud)", 0), ("con caché de credenciales", 60)]:
+            app.auth.AUTH_CACHE_TTL = ttl
+            await credential_cache.clear()
+            stop = asyncio.Event()
+            latency = asyncio.create_task(unauthenticated_latency(client, stop))
+            rate = await authenticated_rate(client, requests, concurrency)
+            stop.set()
+            print(f"  {name:<34} {rate:9.1f} req/s   /cache/stats en paralelo: {await latency:6.2f} ms (mediana)")
+    await async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200, help="Solicitudes autenticadas por escenario")
+    parser.add_argument("--concurrency", type=int, default=20, help="Solicitudes simultáneas")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        database = os.path.join(directory, "auth.sqlite3")
+        # La configuración se lee de variables de entorno al importar `db`
+        os.environ["DATABASE_URL"] = f"sqlite:///{database}"
+        os.environ["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{database}"
+        os.environ.setdefault("ACCESS_LOG_SAMPLE_RATE", "0")
+        os.environ.setdefault("SLOW_QUERY_THRESHOLD_MS", "10000")
+        from sqlmodel import Session, SQLModel
+
+        from app.auth import hash_password
+        from db import engine
+        from models import User
+
+        SQLModel.metadata.create_all(engine)
+        with Session(engine) as session:
+            session.add(User(username=CREDENTIALS[0], password_hash=hash_password(CREDENTIALS[1])))
+            session.commit()
+        engine.dispose()
+
+        print(f"GET / autenticado ({args.requests} solicitudes, {args.concurrency} simultáneas):")
+        asyncio.run(run(args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
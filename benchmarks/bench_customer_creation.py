@@ -0,0 +1,74 @@
+'''
+Benchmark de creación masiva de clientes: validación de email con consulta por fila
+(comportamiento anterior de `CustomerBase.validate_email`) frente al índice único.
+
+Uso:
+    python -m benchmarks.bench_customer_creation --rows 2000
+'''
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from models import Customer
+
+
+def create_with_select(engine, rows: int) -> None:
+    '''
+    Antes: por cada cliente se abre una sesión nueva y se consulta el email antes de insertar.
+    '''
+    with Session(engine) as session:
+        for x in range(rows):
+            email = f"cliente{x}@prueba.com"
+            with Session(engine) as validation_session:
+                if validation_session.exec(select(Customer).where(Customer.email == email)).first():
+                    continue
+            session.add(Customer(name=f"Cliente {x}", email=email, age=30))
+            session.commit()
+
+
+def create_with_unique_index(engine, rows: int) -> None:
+    '''
+    Después: se inserta directamente y el índice único rechaza los duplicados.
+    '''
+    with Session(engine) as session:
+        for x in range(rows):
+            session.add(Customer(name=f"Cliente {x}", email=f"cliente{x}@prueba.com", age=30))
+            try:
+                session.commit()
+            except IntegrityError:
+                session.rollback()
+
+
+def run(strategy, rows: int) -> float:
+    '''
+    Ejecuta una estrategia sobre una base de datos SQLite temporal y retorna los segundos transcurridos.
+    '''
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.sqlite3')}")
+        SQLModel.metadata.create_all(engine)
+        start = time.perf_counter()
+        strategy(engine, rows)
+        elapsed = time.perf_counter() - start
+        engine.dispose()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000, help="Número de clientes a crear")
+    args = parser.parse_args()
+
+    before = run(create_with_select, args.rows)
+    after = run(create_with_unique_index, args.rows)
+    print(f"Clientes: {args.rows}")
+    print(f"Antes (SELECT por validación): {before:.3f} s ({args.rows / before:.0f} filas/s)")
+    print(f"Después (índice único):        {after:.3f} s ({args.rows / after:.0f} filas/s)")
+    print(f"Mejora: {before / after:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+'''
+Benchmark del número de consultas al listar clientes con sus planes y transacciones:
+carga perezosa (una consulta por cliente y relación) frente a `selectinload` (`?include=`).
+
+Uso:
+    python -m benchmarks.bench_customer_includes --customers 10 100 1000
+'''
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import insert
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.query_stats import QueryStats, current_query_stats, instrument_engine
+from models import Customer, CustomerPlan, Plan, Transaction
+
+TRANSACTIONS_PER_CUSTOMER = 5
+
+
+def seed(engine, customers: int) -> None:
+    '''
+    Crea los clientes, un plan por cliente y varias transacciones por cliente.
+    '''
+    with engine.begin() as connection:
+        connection.execute(insert(Plan), [{"name": "Básico", "price": 10, "description": "Plan básico"}])
+        connection.execute(insert(Customer), [
+            {"name": f"Cliente {x}", "email": f"cliente{x}@prueba.com", "age": 30} for x in range(customers)
+        ])
+        connection.execute(insert(CustomerPlan), [{"plan_id": 1, "customer_id": x + 1} for x in range(customers)])
+        connection.execute(insert(Transaction), [
+            {"customer_id": x + 1, "ammount": 100, "description": "Compra", "date": datetime(2024, 1, 15)}
+            for x in range(customers)
+            for _ in range(TRANSACTIONS_PER_CUSTOMER)
+        ])
+
+
+def load_lazy(session: Session) -> int:
+    '''
+    Antes: cada acceso a `customer.plans` o `customer.transaction` dispara una consulta.
+    '''
+    customers = session.exec(select(Customer)).all()
+    return sum(len(customer.plans) + len(customer.transaction) for customer in customers)
+
+
+def load_selectin(session: Session) -> int:
+    '''
+    Después: una consulta por relación para todos los clientes, como `GET /customers/?include=plans,transactions`.
+    '''
+    query = select(Customer).options(selectinload(Customer.plans), selectinload(Customer.transaction))
+    customers = session.exec(query).all()
+    return sum(len(customer.plans) + len(customer.transaction) for customer in customers)
+
+
+def measure(engine, strategy) -> tuple[int, float]:
+    '''
+    Ejecuta una estrategia con una sesión nueva y retorna (consultas, milisegundos).
+    '''
+    stats = QueryStats()
+    token = current_query_stats.set(stats)
+    try:
+        with Session(engine) as session:
+            start = time.perf_counter()
+            strategy(session)
+            elapsed = time.perf_counter() - start
+    finally:
+        current_query_stats.reset(token)
+    return stats.count, elapsed * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--customers", type=int, nargs="+", default=[10, 100, 1000], help="Números de clientes a probar")
+    args = parser.parse_args()
+
+    print(f"{'clientes':>8}  {'perezosa':>22}  {'selectinload':>22}")
+    for customers in args.customers:
+        with tempfile.TemporaryDirectory() as directory:
+            engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.sqlite3')}")
+            SQLModel.metadata.create_all(engine)
+            seed(engine, customers)
+            instrument_engine(engine)
+            lazy_queries, lazy_ms = measure(engine, load_lazy)
+            selectin_queries, selectin_ms = measure(engine, load_selectin)
+            engine.dispose()
+        print(
+            f"{customers:>8}  {lazy_queries:>6} consultas {lazy_ms:>7.1f} ms"
+            f"  {selectin_queries:>6} consultas {selectin_ms:>7.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
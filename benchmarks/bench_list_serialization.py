@@ -0,0 +1,125 @@
+'''
+Benchmark de respuestas de listas grandes (10k filas por defecto).
+
+Compara, para la misma consulta de transacciones:
+- objetos ORM + validación con `response_model` + `json` (camino estándar de FastAPI);
+- objetos ORM + validación + `orjson` (solo cambia la clase de respuesta);
+- filas de columnas + `orjson` (`rows_response`).
+Además mide de punta a punta `GET /transactions/transactions` y `GET /customers/` en proceso (ASGI).
+
+Uso:
+    python -m benchmarks.bench_list_serialization --rows 10000
+'''
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+
+import httpx
+import orjson
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlmodel import Session, select
+
+
+def best_of(function, repetitions: int) -> float:
+    '''
+    Ejecuta la función varias veces y retorna la mediana en milisegundos.
+    '''
+    timings = []
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def serialization_timings(engine, rows: int, repetitions: int) -> dict[str, float]:
+    '''
+    Mide las estrategias de serialización sobre las primeras `rows` transacciones.
+    '''
+    from models import Transaction
+
+    adapter = TypeAdapter(list[Transaction])
+    columns = tuple(Transaction.__table__.columns)
+
+    def orm_validated() -> list:
+        with Session(engine) as session:
+            transactions = session.exec(select(Transaction).limit(rows)).all()
+            return adapter.dump_python(adapter.validate_python(transactions, from_attributes=True), mode="json")
+
+    def orm_json() -> bytes:
+        return json.dumps(orm_validated(), ensure_ascii=False, separators=(",", ":")).encode()
+
+    def orm_orjson() -> bytes:
+        return orjson.dumps(orm_validated())
+
+    def columns_orjson() -> bytes:
+        with Session(engine) as session:
+            return orjson.dumps([row._asdict() for row in session.exec(select(*columns).limit(rows)).all()])
+
+    assert json.loads(orm_json()) == json.loads(columns_orjson())
+    return {
+        "ORM + response_model + json": best_of(orm_json, repetitions),
+        "ORM + response_model + orjson": best_of(orm_orjson, repetitions),
+        "columnas + orjson": best_of(columns_orjson, repetitions),
+    }
+
+
+async def endpoint_timings(rows: int, repetitions: int) -> dict[str, float]:
+    '''
+    Mide los endpoints de listas de punta a punta, en proceso.
+    '''
+    from app.main import app
+    from db import async_engine
+
+    timings = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        for name, url, params in (
+            ("GET /transactions/transactions", "/transactions/transactions", {"limit": rows}),
+            ("GET /customers/", "/customers/", {"limit": rows}),
+        ):
+            samples = []
+            for _ in range(repetitions):
+                start = time.perf_counter()
+                response = await client.get(url, params=params)
+                samples.append((time.perf_counter() - start) * 1000)
+                assert response.status_code == 200 and len(response.json()) == rows
+            timings[name] = statistics.median(samples)
+    await async_engine.dispose()
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000, help="Filas por respuesta")
+    parser.add_argument("--repetitions", type=int, default=10, help="Repeticiones (se reporta la mediana)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        database = os.path.join(directory, "bench.sqlite3")
+        # La configuración se lee de variables de entorno al importar `db`
+        os.environ["DATABASE_URL"] = f"sqlite:///{database}"
+        os.environ["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{database}"
+        os.environ.setdefault("ACCESS_LOG_SAMPLE_RATE", "0")
+        from seed import seed
+
+        engine = create_engine(os.environ["DATABASE_URL"])
+        seed(engine, customers=args.rows, plans=1, subscriptions=0, transactions=args.rows)
+
+        print(f"Serialización de {args.rows} transacciones (mediana de {args.repetitions}):")
+        for name, milliseconds in serialization_timings(engine, args.rows, args.repetitions).items():
+            print(f"  {name:<32} {milliseconds:8.1f} ms")
+        engine.dispose()
+
+        print(f"Endpoints con {args.rows} filas (ASGI en proceso):")
+        for name, milliseconds in asyncio.run(endpoint_timings(args.rows, args.repetitions)).items():
+            print(f"  {name:<32} {milliseconds:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+'''
+Microbenchmark del costo por solicitud de `/time`: construir `ZoneInfo` en cada solicitud
+(comportamiento anterior) frente al índice de `app.timezones` con las zonas precargadas, y el
+endpoint por lotes frente a una solicitud por país.
+
+Uso:
+    python -m benchmarks.bench_time --number 20000
+'''
+import argparse
+import asyncio
+import statistics
+import time
+import timeit
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import httpx
+
+CODES = ["US", "MX", "AR", "CL", "CO", "PE", "ES", "BR", "JP", "DE"]
+
+
+def per_lookup_microseconds(number: int) -> dict[str, float]:
+    '''
+    Costo de resolver la zona y formatear la hora, sin HTTP (microsegundos por llamada).
+    '''
+    from app.timezones import country_timezones, country_zones
+
+    names = {code: country_zones[code][0] for code in CODES}
+
+    def construct():
+        for code in CODES:
+            datetime.now(ZoneInfo(names[code])).isoformat()
+
+    def construct_uncached():
+        # `ZoneInfo.no_cache` lee y parsea el archivo de zona, como ocurre al salir de la caché de `ZoneInfo`
+        for code in CODES:
+            datetime.now(ZoneInfo.no_cache(names[code])).isoformat()
+
+    def indexed():
+        for code in CODES:
+            datetime.now(country_timezones[code]).isoformat()
+
+    # Sin caché cada llamada lee el archivo de zona: se repite 10 veces menos
+    strategies = {
+        "ZoneInfo por solicitud": (construct, number),
+        "ZoneInfo sin caché": (construct_uncached, max(1, number // 10)),
+        "índice precargado": (indexed, number),
+    }
+    return {
+        name: timeit.timeit(function, number=calls) / calls / len(CODES) * 1e6
+        for name, (function, calls) in strategies.items()
+    }
+
+
+async def endpoint_milliseconds(repetitions: int) -> dict[str, float]:
+    '''
+    Mediana en milisegundos de obtener la hora de `CODES` por HTTP (ASGI en proceso).
+    '''
+    from app.main import app
+
+    async def one_per_country(client):
+        for code in CODES:
+            assert (await client.get(f"/time/{code}")).status_code == 200
+
+    async def batch(client):
+        assert (await client.get("/time", params={"codes": ",".join(CODES), "formats": "iso,24h,12h"})).status_code == 200
+
+    timings = {}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark") as client:
+        for name, request in [(f"{len(CODES)} × /time/{{iso_code}}", one_per_country), ("1 × /time?codes=...", batch)]:
+            samples = []
+            for _ in range(repetitions):
+                start = time.perf_counter()
+                await request(client)
+                samples.append((time.perf_counter() - start) * 1000)
+            timings[name] = statistics.median(samples)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=20_000, help="Llamadas por estrategia")
+    parser.add_argument("--repetitions", type=int, default=50, help="Repeticiones por HTTP (se reporta la mediana)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    import app.timezones
+    print(f"Índice cargado en {(time.perf_counter() - start) * 1000:.1f} ms ({len(app.timezones.country_timezones)} países)")
+    print("Zona + hora por país:")
+    for name, microseconds in per_lookup_microseconds(args.number).items():
+        print(f"  {name:<24} {microseconds:8.2f} µs")
+    print(f"Hora de {len(CODES)} países por HTTP (mediana de {args.repetitions}):")
+    for name, milliseconds in asyncio.run(endpoint_milliseconds(args.repetitions)).items():
+        print(f"  {name:<24} {milliseconds:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
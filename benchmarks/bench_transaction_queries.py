@@ -0,0 +1,118 @@
+'''
+Benchmark de consultas por cliente y por cliente + rango de fechas sobre `transaction`:
+esquema anterior (fecha como texto, sin índices) frente al actual (datetime + índice compuesto).
+
+Uso:
+    python -m benchmarks.bench_transaction_queries --rows 1000000
+'''
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, func, insert, select
+from sqlmodel import SQLModel
+
+from models import Transaction
+
+INSERT_BATCH_SIZE = 50_000
+START_DATE = datetime(2022, 1, 1)
+
+legacy_metadata = MetaData()
+legacy_transaction = Table(
+    "transaction",
+    legacy_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("ammount", Integer),
+    Column("description", String),
+    Column("date", String),
+    Column("customer_id", Integer),
+)
+
+
+def generate_rows(rows: int, customers: int, as_text: bool):
+    '''
+    Genera filas de transacciones en lotes, con fechas en texto ISO (esquema anterior) o datetime.
+    '''
+    generator = random.Random(42)
+    batch = []
+    for x in range(rows):
+        date = START_DATE + timedelta(minutes=generator.randrange(3 * 365 * 24 * 60))
+        batch.append({
+            "ammount": generator.randint(100, 1000),
+            "description": "Compra",
+            "date": date.isoformat() if as_text else date,
+            "customer_id": generator.randint(1, customers),
+        })
+        if len(batch) == INSERT_BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def measure(engine, queries: list, repetitions: int) -> float:
+    '''
+    Ejecuta las consultas y retorna el tiempo medio por consulta en milisegundos.
+    '''
+    with engine.connect() as connection:
+        start = time.perf_counter()
+        for _ in range(repetitions):
+            for query in queries:
+                connection.execute(query).all()
+        return (time.perf_counter() - start) * 1000 / (repetitions * len(queries))
+
+
+def run(table, create_schema, rows: int, customers: int, as_text: bool, repetitions: int) -> dict:
+    '''
+    Crea una base de datos temporal con el esquema dado, la llena y mide las consultas.
+    '''
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.sqlite3')}")
+        create_schema(engine)
+        with engine.begin() as connection:
+            for batch in generate_rows(rows, customers, as_text):
+                connection.execute(insert(table), batch)
+
+        date_from = datetime(2023, 1, 1)
+        date_to = datetime(2023, 4, 1)
+        if as_text:
+            date_from, date_to = date_from.isoformat(), date_to.isoformat()
+        customer_ids = random.Random(7).sample(range(1, customers + 1), 20)
+        by_customer = [
+            select(func.count(), func.sum(table.c.ammount)).where(table.c.customer_id == customer_id)
+            for customer_id in customer_ids
+        ]
+        by_customer_and_date = [
+            select(table.c.id, table.c.ammount, table.c.date)
+            .where(table.c.customer_id == customer_id)
+            .where(table.c.date >= date_from)
+            .where(table.c.date < date_to)
+            for customer_id in customer_ids
+        ]
+        result = {
+            "por cliente": measure(engine, by_customer, repetitions),
+            "por cliente + fechas": measure(engine, by_customer_and_date, repetitions),
+        }
+        engine.dispose()
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Número de transacciones")
+    parser.add_argument("--customers", type=int, default=10_000, help="Número de clientes distintos")
+    parser.add_argument("--repetitions", type=int, default=5, help="Repeticiones de cada consulta")
+    args = parser.parse_args()
+
+    before = run(legacy_transaction, legacy_metadata.create_all, args.rows, args.customers, True, args.repetitions)
+    after = run(Transaction.__table__, SQLModel.metadata.create_all, args.rows, args.customers, False, args.repetitions)
+    print(f"Transacciones: {args.rows}, clientes: {args.customers}")
+    for name in before:
+        print(f"{name:<22} antes: {before[name]:8.2f} ms  después: {after[name]:8.2f} ms  ({before[name] / after[name]:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
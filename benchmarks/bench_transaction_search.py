@@ -0,0 +1,121 @@
+'''
+Benchmark de `GET /transactions/transactions/search` sobre una tabla grande.
+
+Siembra una base de datos temporal y mide, en proceso (ASGI), la primera página y una página
+siguiente (por cursor) de varias combinaciones de filtros. Con `--explain` imprime además el
+plan de consulta de SQLite de cada combinación, para comprobar qué índice usa.
+
+Uso:
+    python -m benchmarks.bench_transaction_search --transactions 1000000 --explain
+'''
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+import httpx
+from sqlalchemy import create_engine, text
+
+SEARCHES = {
+    "cliente": {"customer_id": 42},
+    "cliente + fechas": {"customer_id": 42, "date_from": "2023-01-01T00:00:00", "date_to": "2023-07-01T00:00:00"},
+    "cliente + montos": {"customer_id": 42, "ammount_min": 500, "ammount_max": 600},
+    "fechas": {"date_from": "2023-03-01T00:00:00", "date_to": "2023-03-02T00:00:00", "order_by": "date"},
+    "montos": {"ammount_min": 999, "ammount_max": 1000},
+    "texto": {"q": "{word}"},
+    "texto + cliente": {"q": "{word}", "customer_id": 42},
+}
+
+
+async def search_timings(word: str, repetitions: int) -> dict[str, tuple[float, float, int]]:
+    '''
+    Mide cada búsqueda: mediana de la primera página y de la siguiente, en milisegundos.
+    '''
+    from app.main import app
+    from db import async_engine
+
+    timings = {}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark") as client:
+        for name, params in SEARCHES.items():
+            params = {key: value.format(word=word) if isinstance(value, str) else value for key, value in params.items()}
+            first, following = [], []
+            for _ in range(repetitions):
+                start = time.perf_counter()
+                response = await client.get("/transactions/transactions/search", params=params)
+                first.append((time.perf_counter() - start) * 1000)
+                assert response.status_code == 200
+                rows = len(response.json())
+                if cursor := response.headers.get("X-Next-Cursor"):
+                    start = time.perf_counter()
+                    await client.get("/transactions/transactions/search", params=params | {"cursor": cursor})
+                    following.append((time.perf_counter() - start) * 1000)
+            timings[name] = (statistics.median(first), statistics.median(following) if following else 0.0, rows)
+    await async_engine.dispose()
+    return timings
+
+
+def explain(engine, word: str) -> None:
+    '''
+    Imprime el plan de consulta de SQLite de cada búsqueda (primera página).
+    '''
+    from sqlalchemy.dialects import sqlite
+    from sqlmodel import select
+
+    from app.routers.transactions import transaction_filters, transaction_paginators
+    from models import Transaction
+
+    for name, params in SEARCHES.items():
+        params = {key: value.format(word=word) if isinstance(value, str) else value for key, value in params.items()}
+        order_by = params.pop("order_by", "id")
+        filters = transaction_filters(**{
+            key: params.get(key) for key in ("customer_id", "ammount_min", "ammount_max", "date_from", "date_to", "q")
+        })
+        query = transaction_paginators[order_by].apply(select(Transaction.id).where(*filters), None, 50)
+        compiled = query.compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True})
+        with engine.connect() as connection:
+            plan = connection.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+        print(f"  {name}: " + "; ".join(row.detail for row in plan))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--customers", type=int, default=10_000, help="Clientes a sembrar")
+    parser.add_argument("--transactions", type=int, default=1_000_000, help="Transacciones a sembrar")
+    parser.add_argument("--repetitions", type=int, default=20, help="Repeticiones (se reporta la mediana)")
+    parser.add_argument("--explain", action="store_true", help="Imprimir el plan de consulta de cada búsqueda")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        database = os.path.join(directory, "search.sqlite3")
+        # La configuración se lee de variables de entorno al importar `db`
+        os.environ["DATABASE_URL"] = f"sqlite:///{database}"
+        os.environ["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{database}"
+        os.environ.setdefault("ACCESS_LOG_SAMPLE_RATE", "0")
+        os.environ.setdefault("SLOW_QUERY_THRESHOLD_MS", "1000")
+        from db import create_missing_indexes
+        from seed import seed
+
+        start = time.perf_counter()
+        engine = create_engine(os.environ["DATABASE_URL"])
+        seed(engine, customers=args.customers, plans=1, subscriptions=0, transactions=args.transactions)
+        create_missing_indexes()
+        with engine.connect() as connection:
+            connection.execute(text("ANALYZE"))
+            # Una palabra poco frecuente de las descripciones sembradas
+            word = connection.execute(text('SELECT description FROM "transaction" WHERE id = 1')).scalar_one().split()[0]
+        print(f"Base de datos sembrada en {time.perf_counter() - start:.1f} s ({args.transactions} transacciones)")
+
+        if args.explain:
+            print("Planes de consulta:")
+            explain(engine, word)
+        engine.dispose()
+
+        print(f"Búsquedas (mediana de {args.repetitions}; texto = {word!r}):")
+        for name, (first, following, rows) in asyncio.run(search_timings(word, args.repetitions)).items():
+            print(f"  {name:<18} primera {first:7.2f} ms  siguiente {following:7.2f} ms  ({rows} filas)")
+
+
+if __name__ == "__main__":
+    main()
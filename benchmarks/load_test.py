@@ -0,0 +1,260 @@
+'''
+Prueba de carga de la API con escenarios: alta de clientes, listado paginado de transacciones,
+suscripciones a planes y generación de facturas.
+
+Se ejecuta contra la aplicación en proceso (ASGI, con `httpx.AsyncClient`) o contra un
+uvicorn local que el script arranca con la misma base de datos. Antes de medir llena una
+base de datos SQLite temporal con el tamaño indicado (ver `seed.py`).
+
+El reporte JSON (req/s y latencias p50/p95/p99 por escenario) se puede comparar con el de
+otra ejecución con `--compare`.
+
+Uso:
+    python -m benchmarks.load_test --customers 10000 --transactions 1000000 --output after.json
+    python -m benchmarks.load_test --target uvicorn --workers 4 --compare after.json
+'''
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import httpx
+from sqlalchemy import create_engine
+
+INVOICE_PERIOD_START = datetime(2023, 1, 1)
+INVOICE_PERIOD_DAYS = 90
+PAGE_SIZE = 50
+UVICORN_PORT = 8765
+SCENARIOS = ("create_customer", "list_transactions", "subscribe", "invoice")
+
+
+class Scenarios:
+    '''
+    Solicitudes de cada escenario. Un contador por escenario numera sus solicitudes (incluido
+    el calentamiento), así las altas no repiten emails y las facturas no repiten periodo.
+    Las suscripciones no se repiten mientras no superen `customers * plans`.
+    * Parámetros:
+        - customers: Clientes sembrados.
+        - plans: Planes sembrados.
+    '''
+
+    def __init__(self, customers: int, plans: int):
+        self.customers = customers
+        self.plans = plans
+        self.cursors: dict[int, str | None] = {}
+        self.counters = {name: itertools.count() for name in SCENARIOS}
+
+    async def create_customer(self, client: httpx.AsyncClient, worker: int) -> httpx.Response:
+        index = next(self.counters["create_customer"])
+        return await client.post("/customers/", json={"name": f"Carga {index}", "email": f"carga{index}@prueba.com", "age": 30})
+
+    async def list_transactions(self, client: httpx.AsyncClient, worker: int) -> httpx.Response:
+        # Cada worker recorre las páginas siguiendo su propio cursor
+        params = {"limit": PAGE_SIZE}
+        if cursor := self.cursors.get(worker):
+            params["cursor"] = cursor
+        response = await client.get("/transactions/transactions", params=params)
+        self.cursors[worker] = response.headers.get("X-Next-Cursor")
+        return response
+
+    async def subscribe(self, client: httpx.AsyncClient, worker: int) -> httpx.Response:
+        index = next(self.counters["subscribe"])
+        customer_id = index % self.customers + 1
+        plan_id = (index // self.customers) % self.plans + 1
+        return await client.post(f"/customers/{customer_id}/plans/{plan_id}/", params={"plan_status": "activo"})
+
+    async def invoice(self, client: httpx.AsyncClient, worker: int) -> httpx.Response:
+        index = next(self.counters["invoice"])
+        customer_id = index % self.customers + 1
+        period_start = INVOICE_PERIOD_START + timedelta(days=INVOICE_PERIOD_DAYS * (index // self.customers))
+        return await client.post("/invoices/invoices/", json={
+            "customer_id": customer_id,
+            "period_start": period_start.isoformat(),
+            "period_end": (period_start + timedelta(days=INVOICE_PERIOD_DAYS)).isoformat(),
+        })
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    '''
+    Percentil por el método del rango más cercano sobre valores ya ordenados.
+    '''
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario, requests: int, concurrency: int) -> dict:
+    '''
+    Ejecuta `requests` solicitudes de un escenario con `concurrency` workers concurrentes.
+    Retorna:
+    - Resumen con req/s, errores (código >= 400) y latencias en milisegundos.
+    '''
+    latencies: list[float] = []
+    errors = 0
+    pending = requests
+
+    async def worker(worker_id: int) -> None:
+        nonlocal errors, pending
+        while pending > 0:
+            pending -= 1
+            start = time.perf_counter()
+            response = await scenario(client, worker_id)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(worker_id) for worker_id in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "rps": round(requests / elapsed, 1),
+        "mean_ms": round(statistics.fmean(latencies), 3),
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+    }
+
+
+async def wait_for_server(base_url: str, timeout: float = 30.0) -> None:
+    '''
+    Espera a que uvicorn acepte conexiones.
+    '''
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while True:
+            try:
+                await client.get("/metrics")
+                return
+            except httpx.TransportError:
+                if time.monotonic() > deadline:
+                    raise
+                await asyncio.sleep(0.2)
+
+
+async def run_all(args, scenarios: Scenarios, base_url: str | None) -> dict:
+    '''
+    Ejecuta los escenarios pedidos, en orden, con un cliente contra ASGI o contra uvicorn.
+    '''
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    if base_url is None:
+        from app.main import app
+
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark")
+    else:
+        await wait_for_server(base_url)
+        client = httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0)
+    results = {}
+    async with client:
+        for name in args.scenarios:
+            # Calentamiento: primeras conexiones, cachés y planes de consulta
+            await run_scenario(client, getattr(scenarios, name), min(args.warmup, args.requests), args.concurrency)
+            results[name] = await run_scenario(client, getattr(scenarios, name), args.requests, args.concurrency)
+            print(f"{name:<18} {results[name]['rps']:>9.1f} req/s  p50 {results[name]['p50_ms']:>8.2f} ms"
+                  f"  p95 {results[name]['p95_ms']:>8.2f} ms  p99 {results[name]['p99_ms']:>8.2f} ms"
+                  f"  errores {results[name]['errors']}")
+    if base_url is None:
+        from db import async_engine
+
+        await async_engine.dispose()
+    return results
+
+
+def compare(results: dict, baseline_path: Path) -> None:
+    '''
+    Imprime la variación de req/s y p95 respecto de un reporte anterior.
+    '''
+    baseline = json.loads(baseline_path.read_text())["scenarios"]
+    print(f"\nComparación con {baseline_path}:")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before = baseline[name]
+        print(f"{name:<18} req/s {before['rps']:>9.1f} -> {result['rps']:>9.1f} ({result['rps'] / before['rps'] - 1:+.1%})"
+              f"  p95 {before['p95_ms']:>8.2f} -> {result['p95_ms']:>8.2f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=("asgi", "uvicorn"), default="asgi", help="Aplicación en proceso o uvicorn local")
+    parser.add_argument("--workers", type=int, default=1, help="Workers de uvicorn (solo --target uvicorn)")
+    parser.add_argument("--customers", type=int, default=10_000, help="Clientes a sembrar")
+    parser.add_argument("--transactions", type=int, default=10_000, help="Transacciones a sembrar")
+    parser.add_argument("--plans", type=int, default=10, help="Planes a sembrar")
+    parser.add_argument("--requests", type=int, default=2000, help="Solicitudes medidas por escenario")
+    parser.add_argument("--warmup", type=int, default=100, help="Solicitudes de calentamiento por escenario")
+    parser.add_argument("--concurrency", type=int, default=32, help="Solicitudes concurrentes")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS), help="Escenarios a ejecutar")
+    parser.add_argument("--output", type=Path, help="Archivo JSON donde guardar el reporte")
+    parser.add_argument("--compare", type=Path, help="Reporte JSON anterior con el que comparar")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        database = os.path.join(directory, "load.sqlite3")
+        # La configuración se lee de variables de entorno al importar `db`, también en uvicorn
+        os.environ["DATABASE_URL"] = f"sqlite:///{database}"
+        os.environ["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{database}"
+        os.environ.setdefault("ACCESS_LOG_SAMPLE_RATE", "0")
+        os.environ.setdefault("SLOW_QUERY_THRESHOLD_MS", "1000")
+
+        start = time.perf_counter()
+        from seed import seed # Importa `db`: después de fijar las variables de entorno
+
+        engine = create_engine(os.environ["DATABASE_URL"])
+        seed(engine, args.customers, args.plans, 0, args.transactions)
+        engine.dispose()
+        print(f"Base de datos sembrada en {time.perf_counter() - start:.1f} s "
+              f"({args.customers} clientes, {args.transactions} transacciones, {args.plans} planes)")
+
+        scenarios = Scenarios(args.customers, args.plans)
+        server = None
+        base_url = None
+        if args.target == "uvicorn":
+            base_url = f"http://127.0.0.1:{UVICORN_PORT}"
+            server = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(UVICORN_PORT),
+                 "--workers", str(args.workers), "--log-level", "warning", "--no-access-log"],
+                env=os.environ.copy(),
+            )
+        try:
+            results = asyncio.run(run_all(args, scenarios, base_url))
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "target": args.target,
+            "workers": args.workers if args.target == "uvicorn" else None,
+            "customers": args.customers,
+            "transactions": args.transactions,
+            "plans": args.plans,
+            "concurrency": args.concurrency,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "scenarios": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Reporte guardado en {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,35 @@
+import asyncio
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlmodel import create_engine, SQLModel, Session
 from sqlalchemy import create_engine
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import NullPool, StaticPool
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.main import app
-from db import get_session
+from db import get_async_session
+from app.pagination import count_cache
+from app.cache import cache
+from app.query_stats import assert_max_queries, instrument_engine
 
 
-sqlite_name = "db.sqlite3"
+sqlite_name = "test.sqlite3"
 sqlite_url = f"sqlite:///{sqlite_name}"
+async_sqlite_url = f"sqlite+aiosqlite:///{sqlite_name}"
 
 engine = create_engine(
-    sqlite_url, 
+    sqlite_url,
     connect_args={"check_same_thread": False},
     poolclass=StaticPool,
     )
 
+# NullPool: cada petición abre su propia conexión, igual que varios clientes concurrentes
+async_engine = create_async_engine(async_sqlite_url, poolclass=NullPool)
+async_session_maker = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+instrument_engine(async_engine.sync_engine)
+
 @pytest.fixture(name="session")
 def session_fixture() -> Session: # type: ignore
     '''
@@ -34,16 +47,35 @@ def session_fixture() -> Session: # type: ignore
 @pytest.fixture(name="client")
 def client_fixture(session: Session) -> TestClient: # type: ignore
     '''
-    
+    Cliente de pruebas con la sesión asíncrona apuntando a la base de datos de pruebas.
     '''
-    def get_session_override() -> Session:
+    async def get_async_session_override():
         '''
-        Obtener una sesión de base de datos.
+        Obtener una sesión asíncrona de base de datos.
         Retorna:
-        - Una sesión de base de datos.
+        - Una sesión asíncrona de base de datos.
         '''
-        return session
-    app.dependency_overrides[get_session] = get_session_override
+        async with async_session_maker() as async_session:
+            yield async_session
+    app.dependency_overrides[get_async_session] = get_async_session_override
+    count_cache.clear()
+    asyncio.run(cache.clear())
     client = TestClient(app)
     yield client
-    app.dependency_overrides.clear()
\ No newline at end of file
+    app.dependency_overrides.clear()
+
+@pytest.fixture
+def anyio_backend() -> str:
+    '''
+    Backend de anyio para los tests asíncronos (`@pytest.mark.anyio`).
+    '''
+    return "asyncio"
+
+
+@pytest.fixture
+def max_queries():
+    '''
+    Limita las consultas que ejecuta el cliente de pruebas dentro de un bloque:
+    `with max_queries(2): client.get(...)`.
+    '''
+    return lambda maximum: assert_max_queries(async_engine.sync_engine, maximum)
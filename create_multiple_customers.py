@@ -1,21 +1,8 @@
-from sqlmodel import Session
-from faker import Faker
-
+'''
+Crea 100 clientes de prueba. Para volúmenes grandes usar `python seed.py`.
+'''
 from db import engine
-from models import Customer
-
-session = Session(engine)
-faker = Faker()
+from seed import seed
 
-for x in range(100):
-    # Usamos unique.email para garantizar que no se repitan en la misma ejecución
-    customer = Customer(
-        name=faker.name(),
-        description=faker.sentence(),
-        email=faker.unique.email(),
-        age=faker.random_int(min=18, max=80)
-    )
-    session.add(customer)
-    # Hacemos commit en cada iteración para que el validador de email funcione correctamente
-    # contra la base de datos para el siguiente cliente.
-    session.commit()
\ No newline at end of file
+created = seed(engine, customers=100, plans=0, subscriptions=0, transactions=0)
+print(f"Se han creado {created['customer']} clientes.")
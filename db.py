@@ -1,13 +1,132 @@
+import os
 from fastapi import FastAPI
 from typing import Annotated
 
 from fastapi import Depends
+from pydantic import BaseModel
+from sqlalchemy import Engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlmodel import Session, create_engine, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 sqlite_name = "db.sqlite3"
-sqlite_url = f"sqlite:///{sqlite_name}"
 
-engine = create_engine(sqlite_url)
+
+# Driver asíncrono de cada backend, para derivar `ASYNC_DATABASE_URL` de `DATABASE_URL`
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg", "mysql": "aiomysql"}
+
+
+def async_database_url(url: str) -> str:
+    '''
+    URL asíncrona de la misma base de datos que `url`, con el driver asíncrono de su backend.
+    Raises:
+    - ValueError: Si el backend no tiene un driver asíncrono conocido.
+    '''
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"Defina ASYNC_DATABASE_URL: no hay driver asíncrono conocido para '{backend}'")
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+class DatabaseSettings(BaseModel):
+    '''
+    Configuración de la base de datos, leída de variables de entorno.
+    Parámetros:
+    - url / async_url: URLs síncrona y asíncrona; deben apuntar a la misma base de datos.
+    - pool_size / max_overflow: Conexiones permanentes y adicionales del pool.
+    - pool_pre_ping: Verificar la conexión antes de usarla.
+    - pool_recycle: Segundos tras los que se recicla una conexión (-1 para nunca).
+    - sqlite_busy_timeout_ms: Espera máxima por un lock de SQLite.
+    - sqlite_cache_size_kib: Tamaño de la caché de páginas de SQLite.
+    - sqlite_mmap_size: Bytes de la base de datos mapeados en memoria.
+    '''
+    url: str = f"sqlite:///{sqlite_name}"
+    async_url: str = f"sqlite+aiosqlite:///{sqlite_name}"
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_pre_ping: bool = False
+    pool_recycle: int = -1
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_cache_size_kib: int = 64_000
+    sqlite_mmap_size: int = 268_435_456
+
+    @classmethod
+    def from_env(cls) -> "DatabaseSettings":
+        '''
+        Crea la configuración a partir de variables de entorno `DATABASE_URL`, `ASYNC_DATABASE_URL`
+        y `DB_<CAMPO>` (por ejemplo `DB_POOL_SIZE`, `DB_SQLITE_MMAP_SIZE`).
+        Sin `ASYNC_DATABASE_URL`, la URL asíncrona se deriva de `DATABASE_URL`: las dos apuntan
+        siempre a la misma base de datos.
+        '''
+        url = os.getenv("DATABASE_URL")
+        async_url = os.getenv("ASYNC_DATABASE_URL")
+        if async_url is None and url is not None:
+            async_url = async_database_url(url)
+        values = {"url": url, "async_url": async_url}
+        for name in cls.model_fields:
+            if name not in values:
+                values[name] = os.getenv(f"DB_{name.upper()}")
+        return cls.model_validate({name: value for name, value in values.items() if value is not None})
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record, settings: DatabaseSettings) -> None:
+    '''
+    Aplica los PRAGMA de rendimiento a cada conexión SQLite nueva.
+    Con WAL los lectores no bloquean al escritor (ni al revés) entre varios workers de uvicorn.
+    '''
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}")
+    cursor.execute(f"PRAGMA cache_size=-{settings.sqlite_cache_size_kib}")
+    cursor.execute(f"PRAGMA mmap_size={settings.sqlite_mmap_size}")
+    cursor.close()
+
+
+def engine_options(url: str, settings: DatabaseSettings) -> dict:
+    '''
+    Opciones de `create_engine` según el backend.
+    SQLite en memoria usa un pool propio sin tamaño configurable.
+    '''
+    options = {"pool_pre_ping": settings.pool_pre_ping, "pool_recycle": settings.pool_recycle}
+    parsed_url = make_url(url)
+    if parsed_url.get_backend_name() != "sqlite" or parsed_url.database not in (None, "", ":memory:"):
+        options |= {"pool_size": settings.pool_size, "max_overflow": settings.max_overflow}
+    return options
+
+
+def configure_engine(sync_engine: Engine, settings: DatabaseSettings) -> None:
+    '''
+    Registra los PRAGMA de SQLite en un engine (para el asíncrono, en su `sync_engine`).
+    '''
+    if sync_engine.dialect.name == "sqlite":
+        event.listen(
+            sync_engine,
+            "connect",
+            lambda dbapi_connection, connection_record: set_sqlite_pragmas(dbapi_connection, connection_record, settings),
+        )
+
+
+def create_db_engines(settings: DatabaseSettings):
+    '''
+    Crea los engines síncrono y asíncrono con la configuración dada.
+    Retorna:
+    - Una tupla (engine, async_engine).
+    '''
+    sync_engine = create_engine(settings.url, **engine_options(settings.url, settings))
+    configure_engine(sync_engine, settings)
+    async_engine = create_async_engine(settings.async_url, **engine_options(settings.async_url, settings))
+    configure_engine(async_engine.sync_engine, settings)
+    return sync_engine, async_engine
+
+
+settings = DatabaseSettings.from_env()
+engine, async_engine = create_db_engines(settings)
+
+# expire_on_commit=False evita recargas perezosas (lazy) fuera del contexto asíncrono tras un commit
+async_session_maker = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
 
 
 def create_all_tables(app: FastAPI):
@@ -18,9 +137,28 @@ def create_all_tables(app: FastAPI):
     Retorna:
     - None
     '''
-    SQLModel.metadata.create_all(engine)  
+    from migrations import run_migrations # Importación diferida: migrations importa los modelos
+
+    SQLModel.metadata.create_all(engine)
+    run_migrations(engine) # Antes de los índices: pueden depender de columnas que agrega una migración
+    create_missing_indexes()
     yield
 
+def create_missing_indexes():
+    '''
+    Crear los índices declarados en los modelos que no existan en tablas ya creadas.
+    `create_all` no modifica tablas existentes, así que una base de datos anterior
+    no tendría, por ejemplo, los índices compuestos de `transaction`.
+    Los índices únicos los crean las migraciones (ver `migrations.py`), que antes
+    comprueban que no haya valores repetidos.
+    Retorna:
+    - None
+    '''
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            if not index.unique:
+                index.create(engine, checkfirst=True)
+
 def get_session():
     '''
     Obtener una sesión de base de datos.
@@ -31,3 +169,16 @@ def get_session():
         yield session
 
 SessionDep = Annotated[Session, Depends(get_session)] # Dependencia para obtener la sesión de base de datos
+
+
+async def get_async_session():
+    '''
+    Obtener una sesión asíncrona de base de datos.
+    Las consultas se esperan con `await`, por lo que no bloquean el event loop.
+    Retorna:
+    - Una sesión asíncrona de base de datos.
+    '''
+    async with async_session_maker() as session:
+        yield session
+
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_session)] # Dependencia para obtener la sesión asíncrona
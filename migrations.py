@@ -0,0 +1,284 @@
+'''
+Migraciones de datos para bases de datos SQLite existentes.
+
+`SQLModel.metadata.create_all` solo crea tablas nuevas; no modifica las existentes.
+Las migraciones de este módulo se aplican en orden y la versión aplicada se guarda
+en `PRAGMA user_version`, así cada una se ejecuta una sola vez por base de datos.
+
+Uso manual:
+    python migrations.py
+'''
+import logging
+from datetime import datetime
+
+from sqlalchemy import Engine, bindparam, text, update
+
+from balances import rebuild_customer_balances
+from rollups import rebuild_transaction_rollups
+from models import TRANSACTION_FTS_TABLE, VERSIONED_TABLES, Transaction, table_version_ddl, to_naive_utc, transaction_fts_ddl
+
+# Filas por lote al reescribir datos
+MIGRATION_BATCH_SIZE = 10_000
+# Tabla aparte para las transacciones cuya fecha no se puede interpretar
+INVALID_DATES_TABLE = "transaction_invalid_date"
+# `automerge` por omisión de FTS5: fusiona segmentos a medida que se agregan filas
+FTS_AUTOMERGE = 4
+# Emails repetidos que se listan en el error de la migración 9
+DUPLICATE_EMAILS_SHOWN = 20
+
+logger = logging.getLogger(__name__)
+
+
+def parse_legacy_date(value: str) -> datetime | None:
+    '''
+    Convierte una fecha guardada como texto libre (ISO 8601) en datetime sin zona horaria (UTC).
+    Parámetros:
+    - value: El texto de la fecha.
+    Retorna:
+    - El datetime, o None si el texto no es una fecha ISO válida.
+    '''
+    try:
+        return to_naive_utc(datetime.fromisoformat(value))
+    except ValueError:
+        return None
+
+
+def quarantine_transactions(connection, transaction_ids: list[int]) -> None:
+    '''
+    Mueve transacciones a `transaction_invalid_date` (con su fecha original como texto) y las
+    elimina de `transaction`, donde romperían cada lectura de la columna `DateTime`.
+    Parámetros:
+    - connection: Conexión con una transacción abierta.
+    - transaction_ids: IDs de las transacciones a mover.
+    '''
+    if not transaction_ids:
+        return
+    connection.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {INVALID_DATES_TABLE} (id INTEGER PRIMARY KEY, customer_id INTEGER, "
+        "ammount INTEGER, description VARCHAR, date TEXT, moved_at DATETIME DEFAULT CURRENT_TIMESTAMP)"
+    ))
+    for start in range(0, len(transaction_ids), MIGRATION_BATCH_SIZE):
+        ids = {"ids": transaction_ids[start:start + MIGRATION_BATCH_SIZE]}
+        connection.execute(text(
+            f"INSERT OR REPLACE INTO {INVALID_DATES_TABLE} (id, customer_id, ammount, description, date) "
+            'SELECT id, customer_id, ammount, description, CAST(date AS TEXT) FROM "transaction" WHERE id IN :ids'
+        ).bindparams(bindparam("ids", expanding=True)), ids)
+        connection.execute(
+            text('DELETE FROM "transaction" WHERE id IN :ids').bindparams(bindparam("ids", expanding=True)), ids
+        )
+    logger.warning(
+        "%d transacciones con fecha inválida movidas a %s", len(transaction_ids), INVALID_DATES_TABLE
+    )
+
+
+def migrate_transaction_dates(connection) -> None:
+    '''
+    Migración 1: reescribe `transaction.date` con el formato de `DateTime` de SQLAlchemy.
+    Antes la fecha era un `str` libre (p. ej. `2024-01-01T10:00:00`), que no ordena ni compara
+    igual que los parámetros `datetime` de las consultas por rango.
+    Las fechas que no se pueden interpretar se mueven a `transaction_invalid_date`.
+    Parámetros:
+    - connection: Conexión con una transacción abierta.
+    '''
+    table = Transaction.__table__
+    statement = (
+        update(table)
+        .where(table.c.id == bindparam("transaction_id"))
+        .values(date=bindparam("new_date"))
+    )
+    last_id = 0
+    invalid_ids = []
+    while True:
+        rows = connection.execute(
+            text('SELECT id, date FROM "transaction" WHERE id > :last_id ORDER BY id LIMIT :limit'),
+            {"last_id": last_id, "limit": MIGRATION_BATCH_SIZE},
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        params = []
+        for row in rows:
+            if row.date is None:
+                continue
+            parsed = parse_legacy_date(row.date)
+            if parsed is None:
+                invalid_ids.append(row.id)
+            else:
+                params.append({"transaction_id": row.id, "new_date": parsed})
+        if params:
+            connection.execute(statement, params)
+    quarantine_transactions(connection, invalid_ids)
+
+
+def add_table_versions(connection) -> None:
+    '''
+    Migración 2: agrega `updated_at` a las tablas versionadas y crea sus triggers de versión.
+    SQLite no admite un DEFAULT no constante en ADD COLUMN, así que la columna
+    se agrega vacía y se rellena con la fecha actual.
+    Parámetros:
+    - connection: Conexión con una transacción abierta.
+    '''
+    for table_name in VERSIONED_TABLES:
+        columns = {row.name for row in connection.execute(text(f"PRAGMA table_info({table_name})"))}
+        if "updated_at" not in columns:
+            connection.execute(text(f"ALTER TABLE {table_name} ADD COLUMN updated_at DATETIME"))
+            connection.execute(text(f"UPDATE {table_name} SET updated_at = CURRENT_TIMESTAMP"))
+        for statement in table_version_ddl(table_name):
+            connection.execute(text(statement))
+
+
+def build_customer_balances(connection) -> None:
+    '''
+    Migración 3: calcula `customer_balance` para las transacciones ya existentes.
+    Parámetros:
+    - connection: Conexión con una transacción abierta.
+    '''
+    rebuild_customer_balances(connection)
+
+
+def add_transaction_idempotency_key(connection) -> None:
+    '''
+    Migración 4: agrega `transaction.idempotency_key` con su índice único.
+    Parámetros:
+    - connection: Conexión con una transacción abierta.
+    '''
+    columns = {row.name for row in connection.execute(text('PRAGMA table_info("transaction")'))}
+    if "idempotency_key" not in columns:
+        connection.execute(text('ALTER TABLE "transaction" ADD COLUMN idempotency_key VARCHAR'))
+    connection.execute(text(
+        'CREATE UNIQUE INDEX IF NOT EXISTS ix_transaction_idempotency_key ON "transaction" (idempotency_key)'
+    ))
+
+
+def rebuild_transaction_fts(connection) -> None:
+    '''
+    Crea (si falta) el índice FTS5 de `transaction.description` y lo reconstruye desde la tabla.
+    En cargas masivas es mucho más rápido que indexar fila por fila con el trigger de INSERT.
+    Durante la reconstrucción no se fusionan segmentos (`automerge` 0): se fusionan todos una
+    sola vez al final con `optimize` y se restablece `automerge` para las altas siguientes.
+    Parámetros:
+    - connection: Conexión con una transacción abierta.
+    '''
+    fts = TRANSACTION_FTS_TABLE
+    for statement in transaction_fts_ddl():
+        connection.execute(text(statement))
+    connection.execute(text(f"INSERT INTO {fts} ({fts}, rank) VALUES ('automerge', 0)"))
+    connection.execute(text(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')"))
+    connection.execute(text(f"INSERT INTO {fts} ({fts}) VALUES ('optimize')"))
+    connection.execute(text(f"INSERT INTO {fts} ({fts}, rank) VALUES ('automerge', {FTS_AUTOMERGE})"))
+
+
+def build_transaction_fts(connection) -> None:
+    '''
+    Migración 5: crea el índice FTS5 de `transaction.description` y lo llena con las filas existentes.
+    Los índices compuestos nuevos de `transaction` los crea `create_missing_indexes`.
+    Parámetros:
+    - connection: Conexión con una transacción abierta.
+    '''
+    rebuild_transaction_fts(connection)
+
+
+def build_transaction_rollups(connection) -> None:
+    '''
+    Migración 6: calcula `transaction_rollup` para las transacciones ya existentes.
+    Parámetros:
+    - connection: Conexión con una transacción abierta.
+    '''
+    rebuild_transaction_rollups(connection)
+
+
+def add_job_lease(connection) -> None:
+    '''
+    Migración 7: agrega `job.lease_expires_at`, la reserva de los trabajos en curso.
+    Si la tabla aún no existe la crea `create_all` con la columna.
+    Parámetros:
+    - connection: Conexión con una transacción abierta.
+    '''
+    columns = {row.name for row in connection.execute(text('PRAGMA table_info("job")'))}
+    if columns and "lease_expires_at" not in columns:
+        connection.execute(text("ALTER TABLE job ADD COLUMN lease_expires_at DATETIME"))
+
+
+def quarantine_invalid_transaction_dates(connection) -> None:
+    '''
+    Migración 8: mueve a `transaction_invalid_date` las fechas que la migración 1 dejaba sin
+    cambios (p. ej. `ayer`) y recalcula los agregados que las copiaron.
+    Tras la migración 1 las fechas válidas tienen el formato de SQLAlchemy
+    (`2024-01-15 10:30:00.000000`): solo se revisan en Python las que no lo tienen.
+    Parámetros:
+    - connection: Conexión con una transacción abierta.
+    '''
+    candidates = connection.execute(text(
+        'SELECT id, date FROM "transaction" WHERE date IS NOT NULL '
+        "AND date NOT GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9] [0-9][0-9]:[0-9][0-9]:[0-9][0-9]*'"
+    )).all()
+    invalid_ids = [row.id for row in candidates if parse_legacy_date(str(row.date)) is None]
+    if not invalid_ids:
+        return
+    quarantine_transactions(connection, invalid_ids)
+    rebuild_customer_balances(connection)
+    rebuild_transaction_rollups(connection)
+
+
+def add_customer_email_unique_index(connection) -> None:
+    '''
+    Migración 9: crea el índice único de `customer.email` en bases de datos anteriores, que no
+    lo tenían y pueden contener emails repetidos. No borra ni combina clientes: si hay
+    duplicados falla sin crear el índice y los lista para corregirlos a mano.
+    Parámetros:
+    - connection: Conexión con una transacción abierta.
+    Raises:
+    - RuntimeError: Si hay emails repetidos (con los IDs de los clientes de cada uno).
+    '''
+    duplicates = connection.execute(text(
+        "SELECT email, group_concat(id, ', ') AS ids FROM customer WHERE email IS NOT NULL "
+        "GROUP BY email HAVING count(*) > 1 ORDER BY email"
+    )).all()
+    if duplicates:
+        listed = "; ".join(f"{row.email} (IDs {row.ids})" for row in duplicates[:DUPLICATE_EMAILS_SHOWN])
+        more = f" y {len(duplicates) - DUPLICATE_EMAILS_SHOWN} más" if len(duplicates) > DUPLICATE_EMAILS_SHOWN else ""
+        raise RuntimeError(
+            f"No se puede crear el índice único de customer.email: {len(duplicates)} emails repetidos: "
+            f"{listed}{more}. Corríjalos y vuelva a iniciar la aplicación."
+        )
+    connection.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ix_customer_email ON customer (email)"))
+
+
+# Migraciones en orden; la posición + 1 es la versión del esquema
+MIGRATIONS = [
+    migrate_transaction_dates,
+    add_table_versions,
+    build_customer_balances,
+    add_transaction_idempotency_key,
+    build_transaction_fts,
+    build_transaction_rollups,
+    add_job_lease,
+    quarantine_invalid_transaction_dates,
+    add_customer_email_unique_index,
+]
+
+
+def run_migrations(engine: Engine) -> int:
+    '''
+    Aplica las migraciones pendientes según `PRAGMA user_version`.
+    Parámetros:
+    - engine: El engine de la base de datos (solo SQLite).
+    Retorna:
+    - El número de migraciones aplicadas.
+    '''
+    if engine.dialect.name != "sqlite":
+        return 0
+    applied = 0
+    with engine.begin() as connection:
+        version = connection.execute(text("PRAGMA user_version")).scalar_one()
+        for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+            migration(connection)
+            connection.execute(text(f"PRAGMA user_version = {number}"))
+            applied += 1
+    return applied
+
+
+if __name__ == "__main__":
+    from db import engine
+
+    print(f"Migraciones aplicadas: {run_migrations(engine)}")
@@ -1,7 +1,35 @@
+from datetime import date, datetime, timezone
+from typing import Literal
+
 from pydantic import BaseModel, EmailStr, field_validator
-from sqlmodel import SQLModel, Field, Relationship, select, Session
+from sqlalchemy import DDL, JSON, Column, Index, UniqueConstraint, event, func
+from sqlmodel import SQLModel, Field, Relationship
 from enum import Enum
-from db import engine
+
+
+def utcnow() -> datetime:
+    '''
+    Fecha y hora actual en UTC sin zona horaria (igual que CURRENT_TIMESTAMP de SQLite).
+    '''
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def to_naive_utc(value: datetime) -> datetime:
+    '''
+    Convierte una fecha con zona horaria a UTC sin zona (como se guardan en la base de datos).
+    Las fechas sin zona se consideran ya en UTC y no cambian.
+    '''
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def updated_at_field():
+    '''
+    Campo `updated_at`: se asigna al crear (también en inserciones masivas con Core)
+    y se actualiza en cada UPDATE hecho con SQLAlchemy.
+    '''
+    return Field(default_factory=utcnow, sa_column_kwargs={"default": utcnow, "onupdate": utcnow})
 
 
 class StatusEnum(str, Enum):
@@ -14,10 +42,17 @@ class CustomerPlan(SQLModel, table=True):
     Parámetros:
     - plan_id: Identificador del plan.
     - customer_id: Identificador del cliente.
+    - updated_at: Fecha de la última modificación.
+    Índices:
+    - La clave primaria (plan_id, customer_id) sirve para buscar por plan; (customer_id) para
+      buscar los planes de un cliente, por ejemplo al agrupar los totales por plan.
     '''
+    __table_args__ = (Index("ix_customerplan_customer_id", "customer_id"),)
+
     plan_id: int = Field(foreign_key="plan.id", primary_key=True)
     customer_id: int = Field(foreign_key="customer.id", primary_key=True)
     status: StatusEnum = Field(default=StatusEnum.ACTIVE)
+    updated_at: datetime | None = updated_at_field()
     
 
 class PlanBase(SQLModel):
@@ -40,8 +75,11 @@ class PlanCreate(PlanBase):
 class Plan(PlanBase, table=True):
     '''
     Tabla de planes.
+    Parámetros:
+    - updated_at: Fecha de la última modificación.
     '''
     id: int | None = Field(default=None, primary_key=True)
+    updated_at: datetime | None = updated_at_field()
     customers: list["Customer"] = Relationship(back_populates="plans", link_model=CustomerPlan)
 
 
@@ -60,25 +98,6 @@ class CustomerBase(SQLModel):
     description: str | None = Field(default=None)
     email: EmailStr | None = Field(default=None)
     age: int = Field(default=None)
-    
-    @field_validator("email")   #campo que se busca validar
-    @classmethod    #convierte a class method para usar la funcion
-    def validate_email(cls, value) -> str:
-        '''
-        Valida que no exista un cliente con la misma dirección de correo electrónico.
-        Parámetros:
-        - value: Dirección de correo electrónico a validar.
-        Retorna:
-        - La dirección de correo electrónico válida.
-        Raises:
-        - ValueError: Si ya existe un cliente con la misma dirección de correo electrónico.
-        '''
-        session = Session(engine) 
-        query = select(Customer).where(Customer.email == value)
-        result = session.exec(query).first()
-        if result:
-            raise ValueError("Ya existe un cliente con esta dirección de correo electrónico")
-        return value
 
 
 class CustomerCreate(CustomerBase):
@@ -94,15 +113,139 @@ class Customer(CustomerBase, table=True):
     Tabla de clientes.
     Parámetros:
     - id: Identificador único del cliente.
+    - email: Dirección de correo electrónico, única (índice único en base de datos).
+    - updated_at: Fecha de la última modificación.
     - transaction: Transacciones asociadas al cliente.
     '''
     id: int | None = Field(default=None, primary_key=True)
+    email: EmailStr | None = Field(default=None, unique=True, index=True)
+    updated_at: datetime | None = updated_at_field()
     transaction: list["Transaction"] = Relationship(back_populates="customer")
     plans: list[Plan] = Relationship(back_populates="customers", link_model=CustomerPlan)
     
 
 
 
+class TableVersion(SQLModel, table=True):
+    '''
+    Versión de cada tabla versionada, incrementada por triggers en cada INSERT/UPDATE/DELETE.
+    Permite responder a un GET condicional (ETag) con una sola lectura por clave primaria.
+    Parámetros:
+    - name: Nombre de la tabla.
+    - version: Contador de cambios.
+    - updated_at: Fecha del último cambio (UTC).
+    '''
+    __tablename__ = "table_version"
+
+    name: str = Field(primary_key=True)
+    version: int = Field(default=0)
+    updated_at: datetime = Field(default_factory=utcnow, sa_column_kwargs={"server_default": func.current_timestamp()})
+
+
+# Tablas cuyas escrituras incrementan su versión en `table_version`
+VERSIONED_TABLES = ("customer", "plan", "customerplan")
+
+
+def table_version_ddl(table_name: str) -> list[str]:
+    '''
+    Sentencias (idempotentes) que registran la tabla en `table_version` y crean sus triggers.
+    Parámetros:
+    - table_name: Nombre de la tabla versionada.
+    Retorna:
+    - Lista de sentencias SQL para SQLite.
+    '''
+    statements = [f"INSERT OR IGNORE INTO table_version (name, version, updated_at) VALUES ('{table_name}', 0, CURRENT_TIMESTAMP)"]
+    for operation in ("INSERT", "UPDATE", "DELETE"):
+        statements.append(
+            f"CREATE TRIGGER IF NOT EXISTS {table_name}_version_{operation.lower()} "
+            f"AFTER {operation} ON {table_name} BEGIN "
+            f"UPDATE table_version SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE name = '{table_name}'; "
+            f"END"
+        )
+    return statements
+
+
+@event.listens_for(SQLModel.metadata, "after_create")
+def create_table_versions(metadata, connection, **kw) -> None:
+    '''
+    Tras `create_all`, registra las tablas versionadas y crea sus triggers (solo SQLite).
+    '''
+    if connection.dialect.name != "sqlite":
+        return
+    for table_name in VERSIONED_TABLES:
+        for statement in table_version_ddl(table_name):
+            connection.execute(DDL(statement))
+
+
+# Índice de texto completo de `transaction.description`. Con el tokenizador trigram,
+# MATCH encuentra subcadenas (de 3 caracteres o más) sin recorrer la tabla.
+TRANSACTION_FTS_TABLE = "transaction_fts"
+
+
+def transaction_fts_ddl() -> list[str]:
+    '''
+    Sentencias (idempotentes) que crean la tabla FTS5 de descripciones y los triggers que la
+    mantienen sincronizada con `transaction`. Es una tabla de contenido externo: guarda solo
+    el índice y lee el texto de `transaction` por `rowid` (el id de la transacción).
+    Retorna:
+    - Lista de sentencias SQL para SQLite.
+    '''
+    fts = TRANSACTION_FTS_TABLE
+    insert_new = f"INSERT INTO {fts} (rowid, description) VALUES (new.id, new.description);"
+    delete_old = f"INSERT INTO {fts} ({fts}, rowid, description) VALUES ('delete', old.id, old.description);"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"description, content='transaction', content_rowid='id', tokenize='trigram')",
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON "transaction" BEGIN {insert_new} END',
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON "transaction" BEGIN {delete_old} END',
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF description ON "transaction" '
+        f"BEGIN {delete_old} {insert_new} END",
+    ]
+
+
+@event.listens_for(SQLModel.metadata, "after_create")
+def create_transaction_fts(metadata, connection, **kw) -> None:
+    '''
+    Tras `create_all`, crea la tabla FTS5 de descripciones y sus triggers (solo SQLite).
+    '''
+    if connection.dialect.name != "sqlite":
+        return
+    for statement in transaction_fts_ddl():
+        connection.execute(DDL(statement))
+
+
+@event.listens_for(SQLModel.metadata, "after_drop")
+def drop_transaction_fts(metadata, connection, **kw) -> None:
+    '''
+    Tras `drop_all`, elimina la tabla FTS5 (los triggers se eliminan con `transaction`).
+    '''
+    if connection.dialect.name == "sqlite":
+        connection.execute(DDL(f"DROP TABLE IF EXISTS {TRANSACTION_FTS_TABLE}"))
+
+
+class BulkRowError(BaseModel):
+    '''
+    Error de una fila en una importación masiva.
+    Parámetros:
+    - index: Posición de la fila en la entrada (empezando en 0).
+    - detail: Descripción del error.
+    '''
+    index: int
+    detail: str
+
+
+class BulkImportResult(BaseModel):
+    '''
+    Resultado de una importación masiva.
+    Parámetros:
+    - created: Número de registros creados.
+    - errors: Errores por fila; las filas con error no detienen el lote.
+    '''
+    created: int = 0
+    errors: list[BulkRowError] = []
+
+
+
 class TransactionBase(SQLModel):
     '''
     Clase base para transacciones.
@@ -113,7 +256,15 @@ class TransactionBase(SQLModel):
     '''
     ammount: int = Field(default=None)
     description: str = Field(default=None)
-    date: str = Field(default=None)
+    date: datetime = Field(default=None)
+
+    @field_validator("date")
+    @classmethod
+    def normalize_date(cls, value: datetime | None) -> datetime | None:
+        '''
+        Guarda las fechas con zona horaria convertidas a UTC sin zona; así todas son comparables.
+        '''
+        return None if value is None else to_naive_utc(value)
     
 class Transaction(TransactionBase, table=True):
     '''
@@ -121,15 +272,83 @@ class Transaction(TransactionBase, table=True):
     Parámetros:
     - id: Identificador único de la transacción.
     - customer_id: Identificador del cliente asociado a la transacción.
+    - idempotency_key: Clave opcional del cliente de la API; el índice único evita duplicar reintentos.
     - customer: Cliente asociado a la transacción.
+    Índices:
+    - (customer_id, date): consultas por cliente y por cliente + rango de fechas.
+      Como customer_id es la primera columna, también sirve para buscar solo por cliente.
+    - (customer_id, ammount): consultas por cliente + rango de montos.
+    - (date): rangos de fechas sin cliente; SQLite agrega el id a cada entrada, así que
+      también sirve para paginar por (date, id).
+    - (ammount): rangos de montos sin cliente.
+    La descripción se busca en la tabla FTS5 `transaction_fts` (ver `transaction_fts_ddl`).
     '''
+    __table_args__ = (
+        Index("ix_transaction_customer_id_date", "customer_id", "date"),
+        Index("ix_transaction_customer_id_ammount", "customer_id", "ammount"),
+        Index("ix_transaction_date", "date"),
+        Index("ix_transaction_ammount", "ammount"),
+    )
+
     id: int = Field(default=None, primary_key=True)
     customer_id: int = Field(default=None, foreign_key="customer.id") #acceder al id de customer
+    idempotency_key: str | None = Field(default=None, unique=True, index=True)
     customer: Customer = Relationship(back_populates="transaction")
     
 
+class CustomerBalance(SQLModel, table=True):
+    '''
+    Agregado por cliente de sus transacciones, actualizado en la misma transacción que cada alta.
+    Se reconstruye desde `transaction` con `python balances.py`.
+    Parámetros:
+    - customer_id: Identificador del cliente.
+    - balance: Suma de los montos.
+    - transaction_count: Número de transacciones.
+    - last_transaction_date: Fecha de la transacción más reciente.
+    - updated_at: Fecha de la última actualización.
+    '''
+    __tablename__ = "customer_balance"
+
+    customer_id: int = Field(foreign_key="customer.id", primary_key=True)
+    balance: int = Field(default=0)
+    transaction_count: int = Field(default=0)
+    last_transaction_date: datetime | None = Field(default=None)
+    updated_at: datetime | None = updated_at_field()
+
+
+class TransactionRollup(SQLModel, table=True):
+    '''
+    Totales de transacciones por cliente y periodo (día, semana o mes), actualizados en la misma
+    transacción que cada alta. Se reconstruyen desde `transaction` con `python rollups.py`.
+    Parámetros:
+    - bucket: Granularidad: `day`, `week` (semana ISO, desde el lunes) o `month`.
+    - period_start: Primer día del periodo.
+    - customer_id: Identificador del cliente.
+    - total: Suma de los montos del periodo.
+    - transaction_count: Número de transacciones del periodo.
+    Índices:
+    - Clave primaria (bucket, period_start, customer_id): rangos de periodos de todos los clientes.
+    - (bucket, customer_id, period_start): rangos de periodos de un cliente.
+    '''
+    __tablename__ = "transaction_rollup"
+    __table_args__ = (Index("ix_transaction_rollup_customer", "bucket", "customer_id", "period_start"),)
+
+    bucket: str = Field(primary_key=True)
+    period_start: date = Field(primary_key=True)
+    customer_id: int = Field(foreign_key="customer.id", primary_key=True)
+    total: int = Field(default=0)
+    transaction_count: int = Field(default=0)
+
+
 class TransactionCreate(TransactionBase):
-    customer_id: int = Field(default=None, foreign_key="customer.id")
+    '''
+    Alta de una transacción: monto, descripción, fecha y cliente son obligatorios (422 si faltan).
+    '''
+    ammount: int
+    description: str
+    date: datetime
+    customer_id: int = Field(foreign_key="customer.id")
+    idempotency_key: str | None = Field(default=None, min_length=1, max_length=255)
 
 
 
@@ -139,26 +358,205 @@ class TransactionUpdate(TransactionBase):
     pass
 
 
+class TransactionExportJobCreate(BaseModel):
+    '''
+    Exportación de transacciones en segundo plano.
+    Parámetros:
+    - format: `ndjson` o `csv`.
+    - customer_id, ammount_min, ammount_max, date_from, date_to, q: Los filtros de la búsqueda.
+    '''
+    format: Literal["ndjson", "csv"] = "ndjson"
+    customer_id: int | None = None
+    ammount_min: int | None = None
+    ammount_max: int | None = None
+    date_from: datetime | None = None
+    date_to: datetime | None = None
+    q: str | None = Field(default=None, min_length=1, max_length=200)
+
+    @field_validator("date_from", "date_to")
+    @classmethod
+    def normalize_dates(cls, value: datetime | None) -> datetime | None:
+        '''
+        Convierte a UTC sin zona, como `Transaction.date`, para comparar en el mismo huso.
+        '''
+        return None if value is None else to_naive_utc(value)
+
+
+class TransactionBatchResult(BaseModel):
+    '''
+    Resultado de la ingesta de un lote de transacciones.
+    Parámetros:
+    - created: Número de transacciones creadas.
+    - duplicates: Transacciones omitidas porque su `idempotency_key` ya estaba registrada (reintentos).
+    - errors: Filas rechazadas, por ejemplo por un cliente inexistente.
+    '''
+    created: int = 0
+    duplicates: int = 0
+    errors: list[BulkRowError] = []
+
 
-class Invoice(BaseModel):
+class TransactionTotals(BaseModel):
     '''
-    Clase para facturas.
+    Totales de transacciones de un periodo, por cliente o por plan.
+    Parámetros:
+    - period_start: Primer día del periodo.
+    - customer_id: Cliente (al agrupar por cliente).
+    - plan_id: Plan (al agrupar por plan): suma las transacciones de los clientes suscritos.
+    - total: Suma de los montos.
+    - transaction_count: Número de transacciones.
+    '''
+    period_start: date
+    customer_id: int | None = None
+    plan_id: int | None = None
+    total: int
+    transaction_count: int
+
+
+class CustomerRead(CustomerBase):
+    '''
+    Cliente con las relaciones pedidas en `?include=` anidadas; las no pedidas se omiten de la respuesta.
+    Parámetros:
+    - plans: Planes del cliente.
+    - transactions: Transacciones del cliente.
+    '''
+    id: int
+    updated_at: datetime | None = None
+    plans: list[Plan] = []
+    transactions: list[Transaction] = []
+
+
+
+class InvoiceBase(SQLModel):
+    '''
+    Clase base para facturas.
+    Parámetros:
+    - customer_id: Identificador del cliente facturado.
+    - period_start: Inicio del periodo facturado (inclusive).
+    - period_end: Fin del periodo facturado (exclusivo).
+    '''
+    customer_id: int = Field(foreign_key="customer.id")
+    period_start: datetime
+    period_end: datetime
+
+    @field_validator("period_start", "period_end")
+    @classmethod
+    def normalize_period(cls, value: datetime | None) -> datetime | None:
+        '''
+        Convierte a UTC sin zona, como `Transaction.date`, para comparar en el mismo huso.
+        '''
+        return None if value is None else to_naive_utc(value)
+
+
+class InvoiceCreate(InvoiceBase):
+    pass
+
+
+class Invoice(InvoiceBase, table=True):
+    '''
+    Tabla de facturas. Los totales se calculan en SQL (`SUM`/`COUNT`) al generar la factura.
     Parámetros:
     - id: Identificador único de la factura.
-    - customer: Cliente asociado a la factura.
-    - transactions: Transacciones asociadas a la factura.
+    - transaction_count: Número de transacciones del periodo.
     - total: Total de la factura.
     '''
-    id: int
-    customer: Customer
-    transactions: list[Transaction]
-    total: int
+    __table_args__ = (UniqueConstraint("customer_id", "period_start", "period_end"),)
+
+    id: int | None = Field(default=None, primary_key=True)
+    transaction_count: int = Field(default=0)
+    total: int = Field(default=0)
+
 
-    @property
-    def ammount_total(self):
+class InvoiceBatchCreate(BaseModel):
+    '''
+    Periodo para facturar a todos los clientes.
+    Parámetros:
+    - period_start: Inicio del periodo (inclusive).
+    - period_end: Fin del periodo (exclusivo).
+    '''
+    period_start: datetime
+    period_end: datetime
+
+    @field_validator("period_start", "period_end")
+    @classmethod
+    def normalize_period(cls, value: datetime | None) -> datetime | None:
         '''
-        Calcula el total de la factura.
-        Retorna:
-        - El total de la factura.
+        Convierte a UTC sin zona, como `Transaction.date`, para comparar en el mismo huso.
         '''
-        return sum(transaction.ammount for transaction in self.transactions)
\ No newline at end of file
+        return None if value is None else to_naive_utc(value)
+
+
+class InvoiceBatchResult(BaseModel):
+    '''
+    Resultado de la facturación por lotes.
+    Parámetros:
+    - created: Número de facturas creadas.
+    - skipped: Clientes con transacciones que ya tenían factura para el periodo.
+    - total: Suma de los totales de las facturas creadas.
+    '''
+    created: int
+    skipped: int
+    total: int
+
+
+class JobStatusEnum(str, Enum):
+    PENDING = "pendiente"
+    RUNNING = "en_curso"
+    SUCCEEDED = "completado"
+    FAILED = "fallido"
+
+
+class Job(SQLModel, table=True):
+    '''
+    Trabajo en segundo plano (ver `app/jobs.py`). El estado se guarda en la base de datos para
+    consultarlo desde cualquier worker de la API y conservarlo tras un reinicio.
+    Parámetros:
+    - id: Identificador del trabajo.
+    - kind: Tipo de trabajo, por ejemplo `invoice_batch` o `transaction_export`.
+    - status: Estado: pendiente, en curso, completado o fallido.
+    - params: Parámetros del trabajo (JSON).
+    - result: Resultado del trabajo completado (JSON).
+    - error: Mensaje de error del trabajo fallido.
+    - progress / total: Avance (unidades procesadas y total, si se conoce).
+    - created_at / started_at / finished_at: Fechas de alta, inicio y fin (UTC).
+    - lease_expires_at: Hasta cuándo el worker que lo ejecuta lo tiene reservado; lo renueva
+      mientras corre. Un trabajo en curso con la reserva vencida quedó huérfano (worker caído).
+    '''
+    id: int | None = Field(default=None, primary_key=True)
+    kind: str = Field(index=True)
+    status: JobStatusEnum = Field(default=JobStatusEnum.PENDING, index=True)
+    params: dict = Field(default_factory=dict, sa_column=Column(JSON, nullable=False))
+    result: dict | None = Field(default=None, sa_column=Column(JSON))
+    error: str | None = Field(default=None)
+    progress: int = Field(default=0)
+    total: int | None = Field(default=None)
+    created_at: datetime = Field(default_factory=utcnow)
+    started_at: datetime | None = Field(default=None)
+    finished_at: datetime | None = Field(default=None)
+    lease_expires_at: datetime | None = Field(default=None)
+
+
+class UserBase(SQLModel):
+    username: str = Field(min_length=1, max_length=150, unique=True, index=True)
+
+
+class User(UserBase, table=True):
+    '''
+    Usuario de la API (autenticación Basic, ver `app/auth.py`).
+    Parámetros:
+    - id: Identificador del usuario.
+    - username: Nombre de usuario (único).
+    - password_hash: Hash scrypt de la contraseña con su sal y sus parámetros; nunca la contraseña.
+    - is_active: Si puede autenticarse.
+    - created_at: Fecha de alta (UTC).
+    '''
+    id: int | None = Field(default=None, primary_key=True)
+    password_hash: str
+    is_active: bool = Field(default=True)
+    created_at: datetime = Field(default_factory=utcnow)
+
+
+class UserRead(UserBase):
+    '''
+    Usuario autenticado, sin el hash de la contraseña.
+    '''
+    id: int
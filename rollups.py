@@ -0,0 +1,140 @@
+'''
+Mantenimiento de `transaction_rollup`, los totales de `transaction` por cliente y periodo.
+
+Cada alta de transacciones suma su monto y su número a los periodos día, semana y mes con un
+UPSERT en la misma transacción, así `GET /analytics/transactions` lee los totales ya agregados
+en lugar de recorrer `transaction`. `rebuild_transaction_rollups` es el backfill: recalcula
+los totales desde cero (datos anteriores o cargados por fuera de la API).
+
+Uso manual:
+    python rollups.py
+'''
+from collections.abc import Iterable
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import Engine, bindparam, delete, func, insert, literal, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from models import Transaction, TransactionRollup
+
+BUCKETS = ("day", "week", "month")
+
+
+def period_starts(moment: datetime) -> dict[str, date]:
+    '''
+    Primer día del día, la semana (lunes) y el mes de una fecha.
+    '''
+    day = moment.date()
+    return {"day": day, "week": day - timedelta(days=day.weekday()), "month": day.replace(day=1)}
+
+
+def period_start_sql(bucket: str, column):
+    '''
+    Lo mismo que `period_starts` en SQL (SQLite), para agrupar en la base de datos.
+    `weekday 0` avanza al domingo (o se queda si ya lo es); 6 días antes es el lunes.
+    '''
+    modifiers = {"day": (), "week": ("weekday 0", "-6 days"), "month": ("start of month",)}
+    return func.date(column, *modifiers[bucket])
+
+
+def rollup_increments(transactions: Iterable[Transaction]) -> list[dict]:
+    '''
+    Agrupa transacciones nuevas por periodo y cliente.
+    Parámetros:
+    - transactions: Transacciones a sumar a los totales.
+    Retorna:
+    - Parámetros para `increment_rollups_statement`, uno por (bucket, periodo, cliente).
+    '''
+    increments: dict[tuple, dict] = {}
+    for transaction in transactions:
+        for bucket, period_start in period_starts(transaction.date).items():
+            increment = increments.setdefault((bucket, period_start, transaction.customer_id), {
+                "bucket": bucket,
+                "period_start": period_start,
+                "customer_id": transaction.customer_id,
+                "total": 0,
+                "transaction_count": 0,
+            })
+            increment["total"] += transaction.ammount
+            increment["transaction_count"] += 1
+    return list(increments.values())
+
+
+def increment_rollups_statement():
+    '''
+    UPSERT (SQLite) que crea la fila del periodo o le suma el incremento.
+    Se ejecuta con la lista de `rollup_increments` como parámetros.
+    '''
+    table = TransactionRollup.__table__
+    statement = sqlite_insert(table).values(
+        bucket=bindparam("bucket"),
+        period_start=bindparam("period_start"),
+        customer_id=bindparam("customer_id"),
+        total=bindparam("total"),
+        transaction_count=bindparam("transaction_count"),
+    )
+    return statement.on_conflict_do_update(
+        index_elements=[table.c.bucket, table.c.period_start, table.c.customer_id],
+        set_={
+            "total": table.c.total + statement.excluded.total,
+            "transaction_count": table.c.transaction_count + statement.excluded.transaction_count,
+        },
+    )
+
+
+def rebuild_transaction_rollups(connection) -> int:
+    '''
+    Recalcula `transaction_rollup` desde `transaction` con un INSERT ... SELECT por bucket.
+    Solo los totales por día recorren `transaction`; los de semana y mes se agregan a partir
+    de los de día, que son menos filas y ya tienen la fecha calculada. El índice por cliente
+    se quita durante la carga y se crea una sola vez al final.
+    Las fechas que SQLite no puede interpretar (texto anterior a la migración 1) se omiten.
+    Parámetros:
+    - connection: Conexión con una transacción abierta.
+    Retorna:
+    - El número de filas de totales.
+    '''
+    columns = ["bucket", "period_start", "customer_id", "total", "transaction_count"]
+    connection.execute(delete(TransactionRollup))
+    for index in TransactionRollup.__table__.indexes:
+        index.drop(connection, checkfirst=True)
+
+    day = period_start_sql("day", Transaction.date)
+    days = (
+        select(literal("day"), day, Transaction.customer_id, func.sum(Transaction.ammount), func.count())
+        .where(day.is_not(None))
+        .group_by(day, Transaction.customer_id)
+    )
+    connection.execute(insert(TransactionRollup).from_select(columns, days))
+    for bucket in BUCKETS[1:]:
+        period_start = period_start_sql(bucket, TransactionRollup.period_start)
+        periods = (
+            select(
+                literal(bucket),
+                period_start,
+                TransactionRollup.customer_id,
+                func.sum(TransactionRollup.total),
+                func.sum(TransactionRollup.transaction_count),
+            )
+            .where(TransactionRollup.bucket == "day")
+            .group_by(period_start, TransactionRollup.customer_id)
+        )
+        connection.execute(insert(TransactionRollup).from_select(columns, periods))
+
+    for index in TransactionRollup.__table__.indexes:
+        index.create(connection)
+    return connection.execute(select(func.count()).select_from(TransactionRollup)).scalar_one()
+
+
+def rebuild(engine: Engine) -> int:
+    '''
+    Reconstruye los totales en su propia transacción.
+    '''
+    with engine.begin() as connection:
+        return rebuild_transaction_rollups(connection)
+
+
+if __name__ == "__main__":
+    from db import engine
+
+    print(f"Filas de totales reconstruidas: {rebuild(engine)}")